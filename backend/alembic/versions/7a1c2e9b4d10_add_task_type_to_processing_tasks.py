@@ -0,0 +1,29 @@
+"""add_task_type_to_processing_tasks
+
+Revision ID: 7a1c2e9b4d10
+Revises: 3580c0dcd005
+Create Date: 2026-10-19 10:12:31.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a1c2e9b4d10'
+down_revision: Union[str, None] = '3580c0dcd005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'processing_tasks',
+        sa.Column('task_type', sa.String(length=50), nullable=False, server_default='process')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('processing_tasks', 'task_type')
@@ -0,0 +1,38 @@
+"""add_vector_generations
+
+Revision ID: a7d2e4b9c1f5
+Revises: f1c4a8e2b6d3
+Create Date: 2026-10-19 21:14:37.208145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d2e4b9c1f5'
+down_revision: Union[str, None] = 'f1c4a8e2b6d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('knowledge_bases', sa.Column('vector_generation', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('knowledge_bases', sa.Column('vector_config', sa.JSON(), nullable=True))
+    op.add_column('knowledge_bases', sa.Column('rebuild_generation', sa.Integer(), nullable=True))
+    op.add_column('knowledge_bases', sa.Column('rebuild_config', sa.JSON(), nullable=True))
+    op.add_column('knowledge_bases', sa.Column('retired_generations', sa.JSON(), nullable=True))
+    op.add_column('document_chunks', sa.Column('generation', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('idx_kb_generation', 'document_chunks', ['kb_id', 'generation'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_kb_generation', table_name='document_chunks')
+    op.drop_column('document_chunks', 'generation')
+    op.drop_column('knowledge_bases', 'retired_generations')
+    op.drop_column('knowledge_bases', 'rebuild_config')
+    op.drop_column('knowledge_bases', 'rebuild_generation')
+    op.drop_column('knowledge_bases', 'vector_config')
+    op.drop_column('knowledge_bases', 'vector_generation')
@@ -0,0 +1,48 @@
+"""add_kb_tombstone_and_background_jobs
+
+Revision ID: b4e8f1a6c3d2
+Revises: 7a1c2e9b4d10
+Create Date: 2026-10-19 11:03:47.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f1a6c3d2'
+down_revision: Union[str, None] = '7a1c2e9b4d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('knowledge_bases', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_knowledge_bases_deleted_at'), 'knowledge_bases', ['deleted_at'], unique=False)
+
+    op.create_table(
+        'background_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('target_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False, server_default='pending'),
+        sa.Column('progress', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP')),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_background_jobs_id'), 'background_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_background_jobs_job_type'), 'background_jobs', ['job_type'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_background_jobs_job_type'), table_name='background_jobs')
+    op.drop_index(op.f('ix_background_jobs_id'), table_name='background_jobs')
+    op.drop_table('background_jobs')
+    op.drop_index(op.f('ix_knowledge_bases_deleted_at'), table_name='knowledge_bases')
+    op.drop_column('knowledge_bases', 'deleted_at')
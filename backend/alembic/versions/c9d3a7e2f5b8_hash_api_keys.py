@@ -0,0 +1,43 @@
+"""hash_api_keys
+
+Revision ID: c9d3a7e2f5b8
+Revises: b4e8f1a6c3d2
+Create Date: 2026-10-19 13:41:09.662184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d3a7e2f5b8'
+down_revision: Union[str, None] = 'b4e8f1a6c3d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('api_keys', sa.Column('key_prefix', sa.String(length=16), nullable=True))
+    op.add_column('api_keys', sa.Column('key_hash', sa.String(length=64), nullable=True))
+    # 11 characters = "sk-" + 8 hex digits, matching APIKeyService.KEY_PREFIX_LENGTH
+    op.execute("UPDATE api_keys SET key_hash = SHA2(`key`, 256), key_prefix = LEFT(`key`, 11)")
+    op.alter_column('api_keys', 'key_prefix', existing_type=sa.String(length=16), nullable=False)
+    op.alter_column('api_keys', 'key_hash', existing_type=sa.String(length=64), nullable=False)
+    op.create_index(op.f('ix_api_keys_key_prefix'), 'api_keys', ['key_prefix'], unique=False)
+    op.create_unique_constraint('uq_api_keys_key_hash', 'api_keys', ['key_hash'])
+    op.drop_index(op.f('ix_api_keys_key'), table_name='api_keys')
+    op.drop_column('api_keys', 'key')
+
+
+def downgrade() -> None:
+    # Plaintext keys cannot be recovered; the hash is restored in their place
+    op.add_column('api_keys', sa.Column('key', sa.String(length=128), nullable=True))
+    op.execute("UPDATE api_keys SET `key` = key_hash")
+    op.alter_column('api_keys', 'key', existing_type=sa.String(length=128), nullable=False)
+    op.create_index(op.f('ix_api_keys_key'), 'api_keys', ['key'], unique=True)
+    op.drop_constraint('uq_api_keys_key_hash', 'api_keys', type_='unique')
+    op.drop_index(op.f('ix_api_keys_key_prefix'), table_name='api_keys')
+    op.drop_column('api_keys', 'key_hash')
+    op.drop_column('api_keys', 'key_prefix')
@@ -0,0 +1,56 @@
+"""add_knowledge_base_stats
+
+Revision ID: d2f6b9c4e1a7
+Revises: c9d3a7e2f5b8
+Create Date: 2026-10-19 15:20:54.371926
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b9c4e1a7'
+down_revision: Union[str, None] = 'c9d3a7e2f5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'knowledge_base_stats',
+        sa.Column('knowledge_base_id', sa.Integer(), nullable=False),
+        sa.Column('document_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('chunk_count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('total_bytes', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('last_updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['knowledge_base_id'], ['knowledge_bases.id'], ),
+        sa.PrimaryKeyConstraint('knowledge_base_id')
+    )
+    # Backfill counters for existing knowledge bases
+    op.execute("""
+        INSERT INTO knowledge_base_stats
+            (knowledge_base_id, document_count, chunk_count, total_bytes, last_updated_at)
+        SELECT kb.id,
+               COALESCE(d.document_count, 0),
+               COALESCE(c.chunk_count, 0),
+               COALESCE(d.total_bytes, 0),
+               kb.updated_at
+        FROM knowledge_bases kb
+        LEFT JOIN (
+            SELECT knowledge_base_id, COUNT(*) AS document_count, SUM(file_size) AS total_bytes
+            FROM documents
+            GROUP BY knowledge_base_id
+        ) d ON d.knowledge_base_id = kb.id
+        LEFT JOIN (
+            SELECT kb_id, COUNT(*) AS chunk_count
+            FROM document_chunks
+            GROUP BY kb_id
+        ) c ON c.kb_id = kb.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('knowledge_base_stats')
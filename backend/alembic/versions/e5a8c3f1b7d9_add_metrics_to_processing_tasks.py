@@ -0,0 +1,26 @@
+"""add_metrics_to_processing_tasks
+
+Revision ID: e5a8c3f1b7d9
+Revises: d2f6b9c4e1a7
+Create Date: 2026-10-19 16:02:47.318265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c3f1b7d9'
+down_revision: Union[str, None] = 'd2f6b9c4e1a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('processing_tasks', sa.Column('metrics', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processing_tasks', 'metrics')
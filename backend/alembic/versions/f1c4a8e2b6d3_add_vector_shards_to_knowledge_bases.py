@@ -0,0 +1,26 @@
+"""add_vector_shards_to_knowledge_bases
+
+Revision ID: f1c4a8e2b6d3
+Revises: e5a8c3f1b7d9
+Create Date: 2026-10-19 18:02:11.504817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c4a8e2b6d3'
+down_revision: Union[str, None] = 'e5a8c3f1b7d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('knowledge_bases', sa.Column('vector_shards', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('knowledge_bases', 'vector_shards')
@@ -34,13 +34,13 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = security.get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
     return user
 
 @router.post("/register", response_model=UserResponse)
-def register(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
+async def register(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
     """
     Register a new user.
     """
@@ -65,7 +65,7 @@ def register(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
         user = User(
             email=user_in.email,
             username=user_in.username,
-            hashed_password=security.get_password_hash(user_in.password),
+            hashed_password=await security.get_password_hash_async(user_in.password),
         )
         db.add(user)
         db.commit()
@@ -78,14 +78,14 @@ def register(*, db: Session = Depends(get_db), user_in: UserCreate) -> Any:
         ) from e
 
 @router.post("/token", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
     user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -15,6 +15,7 @@ from app.schemas.chat import (
 )
 from app.api.api_v1.auth import get_current_user
 from app.services.chat_service import generate_response
+from app.services.vector_store.filters import normalize_filter
 
 router = APIRouter()
 
@@ -30,7 +31,8 @@ def create_chat(
         db.query(KnowledgeBase)
         .filter(
             KnowledgeBase.id.in_(chat_in.knowledge_base_ids),
-            KnowledgeBase.user_id == current_user.id
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None)
         )
         .all()
     )
@@ -111,6 +113,12 @@ async def create_message(
     if last_message["role"] != "user":
         raise HTTPException(status_code=400, detail="Last message must be from user")
     
+    # Optional metadata filter on the retrieved chunks
+    try:
+        search_filter = normalize_filter(messages.get("filter"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # Get knowledge base IDs
     knowledge_base_ids = [kb.id for kb in chat.knowledge_bases]
 
@@ -120,7 +128,8 @@ async def create_message(
             messages=messages,
             knowledge_base_ids=knowledge_base_ids,
             chat_id=chat_id,
-            db=db
+            db=db,
+            filter=search_filter
         ):
             yield chunk
 
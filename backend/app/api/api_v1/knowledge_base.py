@@ -1,33 +1,64 @@
 import hashlib
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from langchain_chroma import Chroma
 from sqlalchemy import text
 import logging
 from datetime import datetime, timedelta
 from pydantic import BaseModel
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 import time
 import asyncio
 
 from app.db.session import get_db
 from app.models.user import User
 from app.core.security import get_current_user
-from app.models.knowledge import KnowledgeBase, Document, ProcessingTask, DocumentChunk, DocumentUpload
+from app.models.knowledge import KnowledgeBase, KnowledgeBaseStats, Document, ProcessingTask, DocumentChunk, DocumentUpload
+from app.models.job import BackgroundJob
+from app.schemas.job import BackgroundJobResponse
 from app.schemas.knowledge import (
     KnowledgeBaseCreate,
     KnowledgeBaseResponse,
     KnowledgeBaseUpdate,
+    KnowledgeBaseSummary,
     DocumentResponse,
-    PreviewRequest
+    DocumentListItem,
+    DocumentPage,
+    PreviewRequest,
+    ReprocessRequest,
+    RebuildRequest,
+    RebuildCompareRequest
+)
+from app.services.document_processor import (
+    process_document_background,
+    reprocess_document_background,
+    delete_document_background,
+    upload_document,
+    preview_document,
+    PreviewResult
 )
-from app.services.document_processor import process_document_background, upload_document, preview_document, PreviewResult
 from app.core.config import settings
+from app.core.metrics import retrieval_latency, ingestion_task_queued
 from app.core.minio import get_minio_client
 from minio.error import MinioException
 from app.services.vector_store import VectorStoreFactory
 from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.services.cleanup import teardown_knowledge_base_background
+from app.services.garbage_collector import run_garbage_collection
+from app.services.kb_rebuild import (
+    active_rebuild_job,
+    start_rebuild,
+    rebuild_knowledge_base_background,
+    swap_generation,
+    cancel_rebuild
+)
+from app.services.vector_store.generations import get_kb_layout
+from app.services.vector_store.filters import normalize_filter
+from app.services.task_events import TaskEventBusFactory, stream_task_events
+from app.services.task_metrics import aggregate_stage_timings
+from app.services.kb_ownership import user_owns_kb, invalidate_kb_ownership
 
 router = APIRouter()
 
@@ -37,8 +68,155 @@ class TestRetrievalRequest(BaseModel):
     query: str
     kb_id: int
     top_k: int
+    generation: Optional[int] = None  # Vector generation to search, e.g. one being rebuilt; defaults to the searched one
+    filter: Optional[Dict[str, Any]] = None  # Metadata filter, see app/services/vector_store/filters.py
+
+@router.post("/{kb_id}/rebuild")
+def rebuild_knowledge_base(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: int,
+    rebuild_request: RebuildRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Re-chunk and re-embed every document into a new vector generation in
+    background, while searches keep using the current one and new
+    documents are written to both. Poll /knowledge-base/jobs/{job_id},
+    compare with /{kb_id}/rebuild/compare, then swap it in.
+    """
+    kb = db.query(KnowledgeBase).filter(
+        KnowledgeBase.id == kb_id,
+        KnowledgeBase.user_id == current_user.id,
+        KnowledgeBase.deleted_at.is_(None)
+    ).first()
+    if not kb:
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+    if active_rebuild_job(db, kb_id):
+        raise HTTPException(status_code=409, detail=f"Knowledge base {kb_id} is already being rebuilt")
+
+    try:
+        config = {
+            **EmbeddingsFactory.resolve_config(rebuild_request.embeddings_provider, rebuild_request.embeddings_model),
+            "chunk_size": rebuild_request.chunk_size,
+            "chunk_overlap": rebuild_request.chunk_overlap,
+        }
+        job = start_rebuild(db, kb, config, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(rebuild_knowledge_base_background, kb_id, job.id)
+    logger.info(f"Rebuild of knowledge base {kb_id} into generation {kb.rebuild_generation} scheduled as job {job.id}")
+    return {
+        "message": "Knowledge base rebuild scheduled",
+        "job_id": job.id,
+        "generation": kb.rebuild_generation
+    }
 
-@router.post("", response_model=KnowledgeBaseResponse)
+@router.post("/{kb_id}/rebuild/compare")
+async def compare_rebuild(
+    kb_id: int,
+    request: RebuildCompareRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Run a query against both the searched and the rebuilt vector generation.
+    """
+    if not user_owns_kb(db, current_user.id, kb_id):
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+    layout = get_kb_layout(kb_id)
+    if layout.rebuild_generation is None:
+        raise HTTPException(status_code=404, detail=f"Knowledge base {kb_id} is not being rebuilt")
+    try:
+        search_filter = normalize_filter(request.filter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    embeddings = EmbeddingsFactory.create()
+    generations = layout.live_generations()
+    vector_stores = [
+        VectorStoreFactory.create_for_kb(
+            store_type=settings.VECTOR_STORE_TYPE,
+            kb_id=kb_id,
+            embedding_function=embeddings,
+            generation=generation,
+            layout=layout,
+        )
+        for generation in generations
+    ]
+    results = await asyncio.gather(*(
+        vector_store.asimilarity_search_with_score(request.query, k=request.top_k, filter=search_filter)
+        for vector_store in vector_stores
+    ))
+    return {
+        "query": request.query,
+        "generations": [
+            {
+                "generation": generation,
+                "searched": generation == layout.generation,
+                "config": layout.config_of(generation),
+                "results": [
+                    {"content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+                    for doc, score in hits
+                ]
+            }
+            for generation, hits in zip(generations, results)
+        ]
+    }
+
+@router.post("/{kb_id}/rebuild/swap")
+def swap_rebuild(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: int,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Make the rebuilt vector generation the searched one. The previous one
+    is dropped by garbage collection after VECTOR_GENERATION_RETENTION_HOURS.
+    """
+    if not user_owns_kb(db, current_user.id, kb_id):
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+    try:
+        return swap_generation(db, kb_id)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.delete("/{kb_id}/rebuild")
+def cancel_knowledge_base_rebuild(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: int,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Abandon a rebuild; its job stops and its vectors are garbage-collected.
+    """
+    if not user_owns_kb(db, current_user.id, kb_id):
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+    generation = cancel_rebuild(db, kb_id)
+    if generation is None:
+        raise HTTPException(status_code=404, detail=f"Knowledge base {kb_id} is not being rebuilt")
+    return {"message": "Knowledge base rebuild cancelled", "generation": generation}
+
+def _kb_summary(kb: KnowledgeBase) -> KnowledgeBaseSummary:
+    stats = kb.stats
+    return KnowledgeBaseSummary(
+        id=kb.id,
+        name=kb.name,
+        description=kb.description,
+        user_id=kb.user_id,
+        created_at=kb.created_at,
+        updated_at=kb.updated_at,
+        document_count=stats.document_count if stats else 0,
+        chunk_count=stats.chunk_count if stats else 0,
+        total_bytes=stats.total_bytes if stats else 0,
+        last_updated_at=stats.last_updated_at if stats else None,
+    )
+
+@router.post("", response_model=KnowledgeBaseSummary)
 def create_knowledge_base(
     *,
     db: Session = Depends(get_db),
@@ -53,13 +231,15 @@ def create_knowledge_base(
         description=kb_in.description,
         user_id=current_user.id
     )
+    kb.stats = KnowledgeBaseStats()
     db.add(kb)
     db.commit()
     db.refresh(kb)
+    invalidate_kb_ownership(current_user.id)
     logger.info(f"Knowledge base created: {kb.name} for user {current_user.id}")
-    return kb
+    return _kb_summary(kb)
 
-@router.get("", response_model=List[KnowledgeBaseResponse])
+@router.get("", response_model=List[KnowledgeBaseSummary])
 def get_knowledge_bases(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -67,18 +247,23 @@ def get_knowledge_bases(
     limit: int = 100
 ) -> Any:
     """
-    Retrieve knowledge bases.
+    Retrieve knowledge bases with their document/chunk counts.
     """
     knowledge_bases = (
         db.query(KnowledgeBase)
-        .filter(KnowledgeBase.user_id == current_user.id)
+        .options(joinedload(KnowledgeBase.stats))
+        .filter(
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None)
+        )
+        .order_by(KnowledgeBase.id)
         .offset(skip)
         .limit(limit)
         .all()
     )
-    return knowledge_bases
+    return [_kb_summary(kb) for kb in knowledge_bases]
 
-@router.get("/{kb_id}", response_model=KnowledgeBaseResponse)
+@router.get("/{kb_id}", response_model=KnowledgeBaseSummary)
 def get_knowledge_base(
     *,
     db: Session = Depends(get_db),
@@ -86,19 +271,15 @@ def get_knowledge_base(
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
-    Get knowledge base by ID.
+    Get knowledge base by ID. Documents are listed by /{kb_id}/documents.
     """
-    from sqlalchemy.orm import joinedload
-    
     kb = (
         db.query(KnowledgeBase)
-        .options(
-            joinedload(KnowledgeBase.documents)
-            .joinedload(Document.processing_tasks)
-        )
+        .options(joinedload(KnowledgeBase.stats))
         .filter(
             KnowledgeBase.id == kb_id,
-            KnowledgeBase.user_id == current_user.id
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None)
         )
         .first()
     )
@@ -106,9 +287,9 @@ def get_knowledge_base(
     if not kb:
         raise HTTPException(status_code=404, detail="Knowledge base not found")
     
-    return kb
+    return _kb_summary(kb)
 
-@router.put("/{kb_id}", response_model=KnowledgeBaseResponse)
+@router.put("/{kb_id}", response_model=KnowledgeBaseSummary)
 def update_knowledge_base(
     *,
     db: Session = Depends(get_db),
@@ -121,7 +302,8 @@ def update_knowledge_base(
     """
     kb = db.query(KnowledgeBase).filter(
         KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
+        KnowledgeBase.user_id == current_user.id,
+        KnowledgeBase.deleted_at.is_(None)
     ).first()
     
     if not kb:
@@ -134,20 +316,22 @@ def update_knowledge_base(
     db.commit()
     db.refresh(kb)
     logger.info(f"Knowledge base updated: {kb.name} for user {current_user.id}")
-    return kb
+    return _kb_summary(kb)
 
 @router.delete("/{kb_id}")
 async def delete_knowledge_base(
     *,
     db: Session = Depends(get_db),
     kb_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Delete knowledge base and all associated resources.
+
+    The knowledge base is tombstoned immediately and torn down by a
+    background job; poll /knowledge-base/jobs/{job_id} for progress.
     """
-    logger = logging.getLogger(__name__)
-    
     kb = (
         db.query(KnowledgeBase)
         .filter(
@@ -158,59 +342,85 @@ async def delete_knowledge_base(
     )
     if not kb:
         raise HTTPException(status_code=404, detail="Knowledge base not found")
-    
-    try:
-        # Get all document file paths before deletion
-        document_paths = [doc.file_path for doc in kb.documents]
-        
-        # Initialize services
-        minio_client = get_minio_client()
-        embeddings = EmbeddingsFactory.create()
 
-        vector_store = VectorStoreFactory.create(
-            store_type=settings.VECTOR_STORE_TYPE,
-            collection_name=f"kb_{kb_id}",
-            embedding_function=embeddings,
+    # A tombstoned KB may only be deleted again if its previous teardown failed
+    job = db.query(BackgroundJob).filter(
+        BackgroundJob.job_type == "kb_teardown",
+        BackgroundJob.target_id == kb_id,
+        BackgroundJob.status.in_(["pending", "processing"])
+    ).first()
+    if not job:
+        kb.deleted_at = kb.deleted_at or datetime.utcnow()
+        job = BackgroundJob(
+            job_type="kb_teardown",
+            target_id=kb_id,
+            user_id=current_user.id,
+            status="pending",
+            progress={}
         )
-        
-        # Clean up external resources first
-        cleanup_errors = []
-        
-        # 1. Clean up MinIO files
-        try:
-            # Delete all objects with prefix kb_{kb_id}/
-            objects = minio_client.list_objects(settings.MINIO_BUCKET_NAME, prefix=f"kb_{kb_id}/")
-            for obj in objects:
-                minio_client.remove_object(settings.MINIO_BUCKET_NAME, obj.object_name)
-            logger.info(f"Cleaned up MinIO files for knowledge base {kb_id}")
-        except MinioException as e:
-            cleanup_errors.append(f"Failed to clean up MinIO files: {str(e)}")
-            logger.error(f"MinIO cleanup error for kb {kb_id}: {str(e)}")
-        
-        # 2. Clean up vector store
-        try:
-            vector_store._store.delete_collection(f"kb_{kb_id}")
-            logger.info(f"Cleaned up vector store for knowledge base {kb_id}")
-        except Exception as e:
-            cleanup_errors.append(f"Failed to clean up vector store: {str(e)}")
-            logger.error(f"Vector store cleanup error for kb {kb_id}: {str(e)}")
-        
-        # Finally, delete database records in a single transaction
-        db.delete(kb)
+        db.add(job)
         db.commit()
-        
-        # Report any cleanup errors in the response
-        if cleanup_errors:
-            return {
-                "message": "Knowledge base deleted with cleanup warnings",
-                "warnings": cleanup_errors
-            }
-        
-        return {"message": "Knowledge base and all associated resources deleted successfully"}
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to delete knowledge base {kb_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to delete knowledge base: {str(e)}")
+        db.refresh(job)
+        invalidate_kb_ownership(current_user.id)
+        background_tasks.add_task(teardown_knowledge_base_background, kb_id, job.id)
+        logger.info(f"Knowledge base {kb_id} tombstoned, teardown scheduled as job {job.id}")
+
+    return {
+        "message": "Knowledge base deletion scheduled",
+        "job_id": job.id,
+        "status": job.status
+    }
+
+@router.get("/tasks/metrics")
+def get_processing_task_metrics(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: Optional[int] = Query(None, description="Restrict to one knowledge base"),
+    task_type: str = Query("process", description="process, reprocess or delete"),
+    limit: int = Query(1000, ge=1, le=10000, description="Number of most recent tasks to aggregate"),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    p50/p95 seconds per processing stage, grouped by file type and size bucket,
+    over the most recent completed tasks of the current user's knowledge bases.
+    """
+    query = (
+        db.query(ProcessingTask.metrics)
+        .join(KnowledgeBase, ProcessingTask.knowledge_base_id == KnowledgeBase.id)
+        .filter(
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None),
+            ProcessingTask.task_type == task_type,
+            ProcessingTask.status == "completed",
+            ProcessingTask.metrics.isnot(None)
+        )
+    )
+    if kb_id is not None:
+        query = query.filter(ProcessingTask.knowledge_base_id == kb_id)
+    rows = query.order_by(ProcessingTask.id.desc()).limit(limit).all()
+    return {
+        "task_type": task_type,
+        "tasks": len(rows),
+        "groups": aggregate_stage_timings(row.metrics for row in rows)
+    }
+
+@router.get("/jobs/{job_id}", response_model=BackgroundJobResponse)
+def get_background_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Get progress of a knowledge base background job.
+    """
+    job = db.query(BackgroundJob).filter(
+        BackgroundJob.id == job_id,
+        BackgroundJob.user_id == current_user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 # Batch upload documents
 @router.post("/{kb_id}/documents/upload")
@@ -223,11 +433,7 @@ async def upload_kb_documents(
     """
     Upload multiple documents to MinIO.
     """
-    kb = db.query(KnowledgeBase).filter(
-        KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
-    if not kb:
+    if not user_owns_kb(db, current_user.id, kb_id):
         raise HTTPException(status_code=404, detail="Knowledge base not found")
     
     results = []
@@ -309,7 +515,8 @@ async def preview_kb_documents(
         document = db.query(Document).join(KnowledgeBase).filter(
             Document.id == doc_id,
             Document.knowledge_base_id == kb_id,
-            KnowledgeBase.user_id == current_user.id
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None)
         ).first()
         
         if document:
@@ -318,7 +525,8 @@ async def preview_kb_documents(
             upload = db.query(DocumentUpload).join(KnowledgeBase).filter(
                 DocumentUpload.id == doc_id,
                 DocumentUpload.knowledge_base_id == kb_id,
-                KnowledgeBase.user_id == current_user.id
+                KnowledgeBase.user_id == current_user.id,
+                KnowledgeBase.deleted_at.is_(None)
             ).first()
             
             if not upload:
@@ -348,12 +556,7 @@ async def process_kb_documents(
     """
     start_time = time.time()
     
-    kb = db.query(KnowledgeBase).filter(
-        KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
-    
-    if not kb:
+    if not user_owns_kb(db, current_user.id, kb_id):
         raise HTTPException(status_code=404, detail="Knowledge base not found")
     
     task_info = []
@@ -413,6 +616,7 @@ async def process_kb_documents(
         task_data,
         kb_id
     )
+    ingestion_task_queued(len(task_data))
     
     return {"tasks": task_info}
 
@@ -432,32 +636,86 @@ async def add_processing_tasks_to_queue(task_data, kb_id):
 
 @router.post("/cleanup")
 async def cleanup_temp_files(
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Clean up expired temporary files.
+    Trigger a garbage collection pass for expired uploads and orphaned
+    objects and vectors. Poll /knowledge-base/jobs/{job_id} for the result.
     """
-    expired_time = datetime.utcnow() - timedelta(hours=24)
-    expired_uploads = db.query(DocumentUpload).filter(
-        DocumentUpload.created_at < expired_time
-    ).all()
-    
-    minio_client = get_minio_client()
-    for upload in expired_uploads:
-        try:
-            minio_client.remove_object(
-                bucket_name=settings.MINIO_BUCKET_NAME,
-                object_name=upload.temp_path
-            )
-        except MinioException as e:
-            logger.error(f"Failed to delete temp file {upload.temp_path}: {str(e)}")
-        
-        db.delete(upload)
-    
+    job = BackgroundJob(
+        job_type="gc",
+        user_id=current_user.id,
+        status="pending",
+        progress={}
+    )
+    db.add(job)
     db.commit()
-    
-    return {"message": f"Cleaned up {len(expired_uploads)} expired uploads"}
+    db.refresh(job)
+    background_tasks.add_task(run_garbage_collection, job.id)
+    return {"message": "Garbage collection scheduled", "job_id": job.id}
+
+@router.get("/{kb_id}/documents", response_model=DocumentPage)
+def list_documents(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: int,
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    file_type: Optional[str] = Query(None, description="File extension, e.g. pdf"),
+    q: Optional[str] = Query(None, description="Substring of the file name"),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    List a knowledge base's documents, newest first, in keyset-paginated pages.
+    """
+    if not user_owns_kb(db, current_user.id, kb_id):
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+
+    query = db.query(Document).filter(Document.knowledge_base_id == kb_id)
+    if cursor is not None:
+        query = query.filter(Document.id < cursor)
+    if file_type:
+        query = query.filter(Document.file_name.endswith(f".{file_type.lstrip('.')}", autoescape=True))
+    if q:
+        query = query.filter(Document.file_name.contains(q, autoescape=True))
+    # Fetch one extra row to know whether another page exists
+    documents = query.order_by(Document.id.desc()).limit(limit + 1).all()
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+
+    # Latest task per document on this page, in one query
+    latest_tasks = {}
+    if documents:
+        for task in (
+            db.query(ProcessingTask.document_id, ProcessingTask.status, ProcessingTask.task_type)
+            .filter(ProcessingTask.document_id.in_([doc.id for doc in documents]))
+            .order_by(ProcessingTask.id)
+        ):
+            latest_tasks[task.document_id] = task
+
+    items = []
+    for doc in documents:
+        task = latest_tasks.get(doc.id)
+        items.append(DocumentListItem(
+            id=doc.id,
+            file_name=doc.file_name,
+            file_path=doc.file_path,
+            file_hash=doc.file_hash,
+            file_size=doc.file_size,
+            content_type=doc.content_type,
+            knowledge_base_id=doc.knowledge_base_id,
+            created_at=doc.created_at,
+            updated_at=doc.updated_at,
+            status=task.status if task else None,
+            task_type=task.task_type if task else None,
+        ))
+
+    return DocumentPage(
+        items=items,
+        next_cursor=documents[-1].id if has_more else None
+    )
 
 @router.get("/{kb_id}/documents/tasks")
 async def get_processing_tasks(
@@ -471,12 +729,7 @@ async def get_processing_tasks(
     """
     task_id_list = [int(id.strip()) for id in task_ids.split(",")]
     
-    kb = db.query(KnowledgeBase).filter(
-        KnowledgeBase.id == kb_id,
-        KnowledgeBase.user_id == current_user.id
-    ).first()
-    
-    if not kb:
+    if not user_owns_kb(db, current_user.id, kb_id):
         raise HTTPException(status_code=404, detail="Knowledge base not found")
         
     tasks = (
@@ -494,14 +747,75 @@ async def get_processing_tasks(
     return {
         task.id: {
             "document_id": task.document_id,
+            "task_type": task.task_type,
             "status": task.status,
             "error_message": task.error_message,
             "upload_id": task.document_upload_id,
-            "file_name": task.document_upload.file_name if task.document_upload else None
+            "file_name": task.document_upload.file_name if task.document_upload else None,
+            "metrics": task.metrics
         }
         for task in tasks
     }
 
+def _task_snapshot(task: ProcessingTask) -> Dict[str, Any]:
+    """Same shape as the events published by TaskProgressReporter"""
+    return {
+        "task_id": task.id,
+        "kb_id": task.knowledge_base_id,
+        "task_type": task.task_type,
+        "upload_id": task.document_upload_id,
+        "document_id": task.document_id,
+        "file_name": task.document_upload.file_name if task.document_upload else None,
+        "status": task.status,
+        "stage": None,
+        "error_message": task.error_message,
+        "progress": {},
+    }
+
+@router.get("/{kb_id}/documents/tasks/stream")
+async def stream_processing_tasks(
+    kb_id: int,
+    task_ids: str = Query(..., description="Comma-separated list of task IDs to follow"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Stream status and progress of processing tasks as Server-Sent Events
+    until all of them have completed or failed.
+    """
+    task_id_list = [int(id.strip()) for id in task_ids.split(",")]
+
+    if not user_owns_kb(db, current_user.id, kb_id):
+        raise HTTPException(status_code=404, detail="Knowledge base not found")
+
+    # Recently active tasks are served from the event bus; only the rest need the database
+    snapshots = {
+        task_id: event
+        for task_id, event in TaskEventBusFactory.get().latest(task_id_list).items()
+        if event["kb_id"] == kb_id
+    }
+    missing = [task_id for task_id in task_id_list if task_id not in snapshots]
+    if missing:
+        tasks = (
+            db.query(ProcessingTask)
+            .options(selectinload(ProcessingTask.document_upload))
+            .filter(
+                ProcessingTask.id.in_(missing),
+                ProcessingTask.knowledge_base_id == kb_id
+            )
+            .all()
+        )
+        snapshots.update({task.id: _task_snapshot(task) for task in tasks})
+
+    return StreamingResponse(
+        stream_task_events(kb_id, list(snapshots), snapshots),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.get("/{kb_id}/documents/{doc_id}", response_model=DocumentResponse)
 async def get_document(
     *,
@@ -519,7 +833,8 @@ async def get_document(
         .filter(
             Document.id == doc_id,
             Document.knowledge_base_id == kb_id,
-            KnowledgeBase.user_id == current_user.id
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None)
         )
         .first()
     )
@@ -529,6 +844,99 @@ async def get_document(
     
     return document
 
+def _schedule_document_task(
+    db: Session,
+    kb_id: int,
+    doc_id: int,
+    task_type: str,
+    current_user: User
+) -> Tuple[ProcessingTask, bool]:
+    """Create a processing task for an existing document, reusing one that is already in flight"""
+    document = (
+        db.query(Document)
+        .join(KnowledgeBase)
+        .filter(
+            Document.id == doc_id,
+            Document.knowledge_base_id == kb_id,
+            KnowledgeBase.user_id == current_user.id,
+            KnowledgeBase.deleted_at.is_(None)
+        )
+        .first()
+    )
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    active_task = db.query(ProcessingTask).filter(
+        ProcessingTask.document_id == doc_id,
+        ProcessingTask.task_type.in_(["delete", "reprocess"]),
+        ProcessingTask.status.in_(["pending", "processing"])
+    ).first()
+    if active_task:
+        if active_task.task_type != task_type:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Document {doc_id} already has a pending {active_task.task_type} task"
+            )
+        return active_task, False
+
+    task = ProcessingTask(
+        document_id=doc_id,
+        knowledge_base_id=kb_id,
+        task_type=task_type,
+        status="pending"
+    )
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task, True
+
+@router.delete("/{kb_id}/documents/{doc_id}")
+async def delete_document(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: int,
+    doc_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Delete a single document. Vectors, chunk records and the stored file
+    are removed by a background task whose status can be polled.
+    """
+    task, created = _schedule_document_task(db, kb_id, doc_id, "delete", current_user)
+    if created:
+        background_tasks.add_task(delete_document_background, kb_id, doc_id, task.id)
+        ingestion_task_queued()
+    logger.info(f"Scheduled deletion of document {doc_id} in knowledge base {kb_id} as task {task.id}")
+    return {"task_id": task.id, "document_id": doc_id, "status": task.status}
+
+@router.post("/{kb_id}/documents/{doc_id}/reprocess")
+async def reprocess_document(
+    *,
+    db: Session = Depends(get_db),
+    kb_id: int,
+    doc_id: int,
+    background_tasks: BackgroundTasks,
+    reprocess_request: ReprocessRequest = ReprocessRequest(),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Re-chunk and re-embed a stored document in background.
+    """
+    task, created = _schedule_document_task(db, kb_id, doc_id, "reprocess", current_user)
+    if created:
+        background_tasks.add_task(
+            reprocess_document_background,
+            kb_id,
+            doc_id,
+            task.id,
+            reprocess_request.chunk_size,
+            reprocess_request.chunk_overlap
+        )
+        ingestion_task_queued()
+    logger.info(f"Scheduled re-processing of document {doc_id} in knowledge base {kb_id} as task {task.id}")
+    return {"task_id": task.id, "document_id": doc_id, "status": task.status}
+
 @router.post("/test-retrieval")
 async def test_retrieval(
     request: TestRetrievalRequest,
@@ -540,26 +948,41 @@ async def test_retrieval(
     Test retrieval quality for a given query against a knowledge base.
     """
     try:
-        kb = db.query(KnowledgeBase).filter(
-            KnowledgeBase.id == request.kb_id,
-            KnowledgeBase.user_id == current_user.id
-        ).first()
-        
-        if not kb:
+        search_filter = normalize_filter(request.filter)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        if not user_owns_kb(db, current_user.id, request.kb_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Knowledge base {request.kb_id} not found",
             )
         
+        layout = None
+        if request.generation is not None:
+            # Unknown generations would open (and on Chroma create) an empty collection
+            layout = get_kb_layout(request.kb_id)
+            if request.generation not in layout.live_generations():
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Knowledge base {request.kb_id} has no vector generation {request.generation}",
+                )
+
         embeddings = EmbeddingsFactory.create()
         
-        vector_store = VectorStoreFactory.create(
+        vector_store = VectorStoreFactory.create_for_kb(
             store_type=settings.VECTOR_STORE_TYPE,
-            collection_name=f"kb_{request.kb_id}",
+            kb_id=request.kb_id,
             embedding_function=embeddings,
+            generation=request.generation,
+            layout=layout,
         )
         
-        results = vector_store.similarity_search_with_score(request.query, k=request.top_k)
+        started = time.perf_counter()
+        results = await vector_store.asimilarity_search_with_score(
+            request.query, k=request.top_k, filter=search_filter
+        )
+        retrieval_latency.observe(time.perf_counter() - started)
         
         response = []
         for doc, score in results:
@@ -571,5 +994,7 @@ async def test_retrieval(
             
         return {"results": response}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,14 +1,22 @@
-from typing import Any, List
+import json
+import time
+from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from langchain_chroma import Chroma
 from app.services.vector_store import VectorStoreFactory
+from app.services.vector_store.filters import normalize_filter
 
 from app import models
 from app.db.session import get_db
 from app.core.security import get_api_key_user
 from app.core.config import settings
+from app.core.metrics import retrieval_latency
 from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.schemas.knowledge import BatchQueryRequest
+from app.services.batch_retrieval import plan_batch, prepare_batch, stream_batch
+from app.services.kb_ownership import get_owned_kb_ids, user_owns_kb
 
 router = APIRouter()
 
@@ -19,18 +27,21 @@ def query_knowledge_base(
     knowledge_base_id: int,
     query: str,
     top_k: int = 3,
+    filter: Optional[str] = None,
     current_user: models.User = Depends(get_api_key_user),
 ) -> Any:
     """
-    Query a specific knowledge base using API key authentication
+    Query a specific knowledge base using API key authentication. `filter`
+    is a JSON metadata filter, e.g. {"file_type": "pdf"} (see
+    app/services/vector_store/filters.py).
     """
     try:
-        kb = db.query(models.KnowledgeBase).filter(
-            models.KnowledgeBase.id == knowledge_base_id,
-            models.KnowledgeBase.user_id == current_user.id
-        ).first()
-        
-        if not kb:
+        search_filter = normalize_filter(json.loads(filter)) if filter else None
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError
+        raise HTTPException(status_code=400, detail=f"Invalid filter: {str(e)}")
+    try:
+        if not user_owns_kb(db, current_user.id, knowledge_base_id):
             raise HTTPException(
                 status_code=404,
                 detail=f"Knowledge base {knowledge_base_id} not found",
@@ -38,13 +49,15 @@ def query_knowledge_base(
         
         embeddings = EmbeddingsFactory.create()
         
-        vector_store = VectorStoreFactory.create(
+        vector_store = VectorStoreFactory.create_for_kb(
             store_type=settings.VECTOR_STORE_TYPE,
-            collection_name=f"kb_{knowledge_base_id}",
+            kb_id=knowledge_base_id,
             embedding_function=embeddings,
         )
         
-        results = vector_store.similarity_search_with_score(query, k=top_k)
+        started = time.perf_counter()
+        results = vector_store.similarity_search_with_score(query, k=top_k, filter=search_filter)
+        retrieval_latency.observe(time.perf_counter() - started)
         
         response = []
         for doc, score in results:
@@ -57,4 +70,34 @@ def query_knowledge_base(
         return {"results": response}
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/batch-query")
+async def batch_query_knowledge_bases(
+    *,
+    db: Session = Depends(get_db),
+    batch_request: BatchQueryRequest,
+    current_user: models.User = Depends(get_api_key_user),
+) -> StreamingResponse:
+    """
+    Run many queries, each over one or more knowledge bases, in one request.
+    The queries are embedded in batches and searched concurrently; results
+    stream back as NDJSON, one line per query and knowledge base.
+    """
+    try:
+        searches = plan_batch(batch_request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    missing = {kb_id for search in searches for kb_id in search.kb_ids} - get_owned_kb_ids(db, current_user.id)
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Knowledge bases {sorted(missing)} not found",
+        )
+
+    try:
+        batch = await prepare_batch(searches)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(stream_batch(batch), media_type="application/x-ndjson")
@@ -31,12 +31,38 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))
 
+    # Authentication cache and password hashing settings
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+    KB_OWNERSHIP_CACHE_TTL_SECONDS: int = int(os.getenv("KB_OWNERSHIP_CACHE_TTL_SECONDS", "60"))
+    KB_LAYOUT_CACHE_TTL_SECONDS: int = int(os.getenv("KB_LAYOUT_CACHE_TTL_SECONDS", "30"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+    # API key authentication settings
+    API_KEY_CACHE_TTL_SECONDS: int = int(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60"))
+    API_KEY_CACHE_MAX_SIZE: int = int(os.getenv("API_KEY_CACHE_MAX_SIZE", "10000"))
+    API_KEY_LAST_USED_FLUSH_SECONDS: int = int(os.getenv("API_KEY_LAST_USED_FLUSH_SECONDS", "30"))
+
+    # OpenAPI batch query limits: queries per request, results (top_k x knowledge bases) summed over
+    # the batch, and vector searches of one batch run at a time
+    OPENAPI_BATCH_MAX_QUERIES: int = int(os.getenv("OPENAPI_BATCH_MAX_QUERIES", "256"))
+    OPENAPI_BATCH_MAX_TOTAL_K: int = int(os.getenv("OPENAPI_BATCH_MAX_TOTAL_K", "5000"))
+    OPENAPI_BATCH_SEARCH_CONCURRENCY: int = int(os.getenv("OPENAPI_BATCH_SEARCH_CONCURRENCY", "16"))
+
     # Chat Provider settings
     CHAT_PROVIDER: str = os.getenv("CHAT_PROVIDER", "openai")
 
     # Embeddings settings
     EMBEDDINGS_PROVIDER: str = os.getenv("EMBEDDINGS_PROVIDER", "openai")
 
+    # Fake providers (EMBEDDINGS_PROVIDER=fake / CHAT_PROVIDER=fake) for benchmarks and load tests
+    FAKE_EMBEDDINGS_DIMENSION: int = int(os.getenv("FAKE_EMBEDDINGS_DIMENSION", "384"))
+    FAKE_EMBEDDINGS_LATENCY_MS: float = float(os.getenv("FAKE_EMBEDDINGS_LATENCY_MS", "0"))
+    FAKE_EMBEDDINGS_PER_TEXT_LATENCY_MS: float = float(os.getenv("FAKE_EMBEDDINGS_PER_TEXT_LATENCY_MS", "0"))
+    FAKE_LLM_TTFT_MS: float = float(os.getenv("FAKE_LLM_TTFT_MS", "200"))
+    FAKE_LLM_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    FAKE_LLM_RESPONSE_TOKENS: int = int(os.getenv("FAKE_LLM_RESPONSE_TOKENS", "64"))
+
     # MinIO settings
     MINIO_ENDPOINT: str = os.getenv("MINIO_ENDPOINT", "localhost:9000")
     MINIO_ACCESS_KEY: str = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
@@ -55,14 +81,74 @@ class Settings(BaseSettings):
 
     # Vector Store settings
     VECTOR_STORE_TYPE: str = os.getenv("VECTOR_STORE_TYPE", "chroma")
+    # collection: one collection per knowledge base; shared: knowledge bases partitioned by kb_id
+    VECTOR_TENANCY: str = os.getenv("VECTOR_TENANCY", "collection")
+    # Shared collections knowledge bases are spread over (kb_id modulo this); fixed once data is written
+    VECTOR_SHARED_PARTITIONS: int = int(os.getenv("VECTOR_SHARED_PARTITIONS", "4"))
+    # Shards of a sharded knowledge base searched or written at once
+    VECTOR_SHARD_PARALLELISM: int = int(os.getenv("VECTOR_SHARD_PARALLELISM", "8"))
+    # Pause between documents of a knowledge base rebuild, to leave embedding and vector store capacity to live traffic
+    VECTOR_REBUILD_PAUSE_SECONDS: float = float(os.getenv("VECTOR_REBUILD_PAUSE_SECONDS", "1.0"))
+    # Hours a swapped-out vector generation is kept before garbage collection drops it
+    VECTOR_GENERATION_RETENTION_HOURS: int = int(os.getenv("VECTOR_GENERATION_RETENTION_HOURS", "24"))
 
     # Chroma DB settings
     CHROMA_DB_HOST: str = os.getenv("CHROMA_DB_HOST", "chromadb")
     CHROMA_DB_PORT: int = int(os.getenv("CHROMA_DB_PORT", "8000"))
+    CHROMA_MODE: str = os.getenv("CHROMA_MODE", "http")  # http or persistent
+    CHROMA_PERSIST_PATH: str = os.getenv("CHROMA_PERSIST_PATH", "./data/chroma")
 
     # Qdrant DB settings
     QDRANT_URL: str = os.getenv("QDRANT_URL", "http://localhost:6333")
     QDRANT_PREFER_GRPC: bool = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+    QDRANT_GRPC_PORT: int = int(os.getenv("QDRANT_GRPC_PORT", "6334"))
+    QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
+    # Defaults for new collections; configure_collection() tunes one knowledge base
+    QDRANT_HNSW_M: int = int(os.getenv("QDRANT_HNSW_M", "16"))
+    QDRANT_HNSW_EF_CONSTRUCT: int = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "100"))
+    QDRANT_HNSW_EF: int = int(os.getenv("QDRANT_HNSW_EF", "0"))  # search-time ef, 0 for the server default
+    QDRANT_ON_DISK: bool = os.getenv("QDRANT_ON_DISK", "false").lower() == "true"
+    QDRANT_UPSERT_BATCH_SIZE: int = int(os.getenv("QDRANT_UPSERT_BATCH_SIZE", "32"))
+    QDRANT_UPSERT_PARALLELISM: int = int(os.getenv("QDRANT_UPSERT_PARALLELISM", "4"))
+
+    # Vector quantization (qdrant and local): none, int8 or binary
+    VECTOR_QUANTIZATION: str = os.getenv("VECTOR_QUANTIZATION", "none")
+    # Candidates rescored with the full vectors, as a multiple of k
+    VECTOR_QUANTIZATION_OVERSAMPLING: float = float(os.getenv("VECTOR_QUANTIZATION_OVERSAMPLING", "3.0"))
+
+    # Local vector store settings
+    LOCAL_VECTOR_STORE_PATH: str = os.getenv("LOCAL_VECTOR_STORE_PATH", "./data/vector_store")
+    LOCAL_VECTOR_STORE_DTYPE: str = os.getenv("LOCAL_VECTOR_STORE_DTYPE", "float32")  # float32 or float16
+    LOCAL_VECTOR_STORE_COMPACT_RATIO: float = float(os.getenv("LOCAL_VECTOR_STORE_COMPACT_RATIO", "0.3"))
+    LOCAL_VECTOR_INDEX: str = os.getenv("LOCAL_VECTOR_INDEX", "hnsw")  # hnsw or none
+    LOCAL_VECTOR_INDEX_MIN_ROWS: int = int(os.getenv("LOCAL_VECTOR_INDEX_MIN_ROWS", "20000"))
+    LOCAL_VECTOR_INDEX_M: int = int(os.getenv("LOCAL_VECTOR_INDEX_M", "16"))
+    LOCAL_VECTOR_INDEX_EF_CONSTRUCTION: int = int(os.getenv("LOCAL_VECTOR_INDEX_EF_CONSTRUCTION", "200"))
+    LOCAL_VECTOR_INDEX_EF_SEARCH: int = int(os.getenv("LOCAL_VECTOR_INDEX_EF_SEARCH", "64"))
+
+    # Garbage collection settings
+    GC_ENABLED: bool = os.getenv("GC_ENABLED", "true").lower() == "true"
+    GC_INTERVAL_SECONDS: int = int(os.getenv("GC_INTERVAL_SECONDS", "3600"))
+    GC_BATCH_SIZE: int = int(os.getenv("GC_BATCH_SIZE", "500"))
+    GC_BATCH_PAUSE_SECONDS: float = float(os.getenv("GC_BATCH_PAUSE_SECONDS", "0.5"))
+    GC_TEMP_TTL_HOURS: int = int(os.getenv("GC_TEMP_TTL_HOURS", "24"))
+
+    # Metrics settings
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Tracing settings
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")  # none, file or zipkin
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    TRACE_FILE_PATH: str = os.getenv("TRACE_FILE_PATH", "/tmp/ragwebui-traces.jsonl")
+    TRACE_COLLECTOR_URL: str = os.getenv("TRACE_COLLECTOR_URL", "http://localhost:9411/api/v2/spans")
+    LANGCHAIN_DEBUG: bool = os.getenv("LANGCHAIN_DEBUG", "false").lower() == "true"
+
+    # Task progress events settings
+    TASK_EVENTS_BACKEND: str = os.getenv("TASK_EVENTS_BACKEND", "memory")  # memory or redis
+    TASK_EVENTS_REDIS_URL: str = os.getenv("TASK_EVENTS_REDIS_URL", "redis://localhost:6379/0")
+    TASK_EVENTS_TTL_SECONDS: int = int(os.getenv("TASK_EVENTS_TTL_SECONDS", "3600"))
+    TASK_EVENTS_QUEUE_SIZE: int = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "1000"))
+    TASK_EVENTS_HEARTBEAT_SECONDS: int = int(os.getenv("TASK_EVENTS_HEARTBEAT_SECONDS", "15"))
 
     # Deepseek settings
     DEEPSEEK_API_KEY: str = ""
@@ -0,0 +1,212 @@
+"""
+Prometheus metrics for the API process, served at /metrics.
+
+Label sets are bound once, at import or on startup, and call sites
+observe into the bound children, so recording a sample is a clock read
+plus one observe() with no label lookups on the hot path. With several
+uvicorn workers each worker exposes its own registry.
+"""
+import time
+from typing import Dict, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+
+from app.core.config import settings
+
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+UNMATCHED_ROUTE = "unmatched"
+
+# Most requests finish within a second; chat streams run much longer
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60, 120)
+TASK_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, including streamed bodies",
+    ["method", "route"],
+    buckets=HTTP_BUCKETS,
+)
+HTTP_REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status class",
+    ["method", "route", "status"],
+)
+
+CHAT_TTFT_SECONDS = Histogram(
+    "chat_time_to_first_token_seconds",
+    "Time from request to the first answer token in generate_response",
+    ["provider"],
+    buckets=LLM_BUCKETS,
+)
+CHAT_GENERATION_SECONDS = Histogram(
+    "chat_generation_seconds",
+    "Total generate_response time",
+    ["provider"],
+    buckets=LLM_BUCKETS,
+)
+RETRIEVAL_SECONDS = Histogram(
+    "retrieval_duration_seconds",
+    "Vector similarity search latency, including the query embedding",
+    ["backend"],
+)
+EMBEDDING_BATCH_SECONDS = Histogram(
+    "embedding_batch_duration_seconds",
+    "Latency of one embedding call",
+    ["provider", "kind"],
+)
+EMBEDDING_TOKENS_TOTAL = Counter(
+    "embedding_tokens_total",
+    "Tokens sent to the embedding provider",
+    ["provider", "kind"],
+)
+INGESTION_TASKS = Gauge(
+    "ingestion_tasks",
+    "Ingestion tasks of this process that are queued or running",
+    ["state"],
+)
+INGESTION_TASK_SECONDS = Histogram(
+    "ingestion_task_duration_seconds",
+    "Processing task run time from start to completion or failure",
+    ["task_type", "status"],
+    buckets=TASK_BUCKETS,
+)
+MINIO_OPERATION_SECONDS = Histogram(
+    "minio_operation_duration_seconds",
+    "MinIO client call latency",
+    ["operation"],
+)
+
+TASK_TYPES = ("process", "reprocess", "delete")
+TASK_OUTCOMES = ("completed", "failed")
+MINIO_OPERATIONS = ("fget_object", "put_object", "copy_object", "remove_object", "stat_object")
+
+# Pre-bound children used by the instrumented call sites
+chat_ttft = CHAT_TTFT_SECONDS.labels(settings.CHAT_PROVIDER)
+chat_generation = CHAT_GENERATION_SECONDS.labels(settings.CHAT_PROVIDER)
+retrieval_latency = RETRIEVAL_SECONDS.labels(settings.VECTOR_STORE_TYPE)
+embedding_latency = {
+    kind: EMBEDDING_BATCH_SECONDS.labels(settings.EMBEDDINGS_PROVIDER, kind) for kind in ("documents", "query")
+}
+embedding_tokens = {
+    kind: EMBEDDING_TOKENS_TOTAL.labels(settings.EMBEDDINGS_PROVIDER, kind) for kind in ("documents", "query")
+}
+ingestion_queued = INGESTION_TASKS.labels("queued")
+ingestion_running = INGESTION_TASKS.labels("running")
+ingestion_duration = {
+    (task_type, outcome): INGESTION_TASK_SECONDS.labels(task_type, outcome)
+    for task_type in TASK_TYPES
+    for outcome in TASK_OUTCOMES
+}
+minio_latency = {operation: MINIO_OPERATION_SECONDS.labels(operation) for operation in MINIO_OPERATIONS}
+
+# (method, route) -> (latency histogram, request counters indexed by status // 100 - 1)
+_http_children: Dict[Tuple[str, str], Tuple[Histogram, Tuple[Counter, ...]]] = {}
+
+
+def _bind_route(method: str, route: str) -> Tuple[Histogram, Tuple[Counter, ...]]:
+    children = (
+        HTTP_REQUEST_SECONDS.labels(method, route),
+        tuple(HTTP_REQUESTS_TOTAL.labels(method, route, status) for status in STATUS_CLASSES),
+    )
+    _http_children[(method, route)] = children
+    return children
+
+
+def register_routes(app) -> None:
+    """Bind the label sets of every route up front; called on startup"""
+    for route in app.routes:
+        for method in getattr(route, "methods", None) or ():
+            _bind_route(method, route.path)
+
+
+class PrometheusMiddleware:
+    """Plain ASGI middleware recording latency and status per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else UNMATCHED_ROUTE)
+            children = _http_children.get(key) or _bind_route(*key)
+            children[0].observe(time.perf_counter() - started)
+            children[1][min(max(status // 100, 1), 5) - 1].inc()
+
+
+def ingestion_task_queued(count: int = 1) -> None:
+    ingestion_queued.inc(count)
+
+
+def ingestion_task_started() -> None:
+    ingestion_queued.dec()
+    ingestion_running.inc()
+
+
+def ingestion_task_finished(task_type: str, outcome: str, seconds: float) -> None:
+    ingestion_running.dec()
+    child = ingestion_duration.get((task_type, outcome))
+    if child is not None:
+        child.observe(seconds)
+
+
+class RetrievalTimer(BaseCallbackHandler):
+    """Callback for LangChain retrievers that records retrieval latency"""
+
+    def __init__(self):
+        self._started: Dict = {}
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            retrieval_latency.observe(time.perf_counter() - started)
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+
+class DatabasePoolCollector:
+    """Reads SQLAlchemy connection pool usage at scrape time"""
+
+    def describe(self):
+        # Keeps the registry from collecting (and creating the engine) at registration time
+        return []
+
+    def collect(self):
+        from app.db.session import engine
+
+        pool = engine.pool
+        gauges = {
+            "db_pool_size": ("Configured pool size", getattr(pool, "size", None)),
+            "db_pool_checked_out": ("Connections in use", getattr(pool, "checkedout", None)),
+            "db_pool_checked_in": ("Idle pooled connections", getattr(pool, "checkedin", None)),
+            "db_pool_overflow": ("Connections beyond the pool size", getattr(pool, "overflow", None)),
+        }
+        for name, (documentation, reader) in gauges.items():
+            if reader is not None:
+                yield GaugeMetricFamily(name, documentation, value=reader())
+
+
+REGISTRY.register(DatabasePoolCollector())
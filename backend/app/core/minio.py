@@ -1,15 +1,55 @@
 import logging
+import time
 from minio import Minio
 from app.core.config import settings
+from app.core.metrics import minio_latency
 
 logger = logging.getLogger(__name__)
 
+class InstrumentedMinio(Minio):
+    """MinIO client that records the latency of the object operations the app uses"""
+
+    def fget_object(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().fget_object(*args, **kwargs)
+        finally:
+            minio_latency["fget_object"].observe(time.perf_counter() - started)
+
+    def put_object(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().put_object(*args, **kwargs)
+        finally:
+            minio_latency["put_object"].observe(time.perf_counter() - started)
+
+    def copy_object(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().copy_object(*args, **kwargs)
+        finally:
+            minio_latency["copy_object"].observe(time.perf_counter() - started)
+
+    def remove_object(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().remove_object(*args, **kwargs)
+        finally:
+            minio_latency["remove_object"].observe(time.perf_counter() - started)
+
+    def stat_object(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().stat_object(*args, **kwargs)
+        finally:
+            minio_latency["stat_object"].observe(time.perf_counter() - started)
+
 def get_minio_client() -> Minio:
     """
     Get a MinIO client instance.
     """
     logger.info("Creating MinIO client instance.")
-    return Minio(
+    return InstrumentedMinio(
         settings.MINIO_ENDPOINT,
         access_key=settings.MINIO_ACCESS_KEY,
         secret_key=settings.MINIO_SECRET_KEY,
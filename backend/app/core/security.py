@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,12 +8,29 @@ from app.core.config import settings
 from fastapi import Depends, HTTPException, status, Security
 from fastapi.security import OAuth2PasswordBearer, APIKeyHeader
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
 from app.db.session import get_db
 from app.models.user import User
 from app.services.api_key import APIKeyService
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow; run it on a small dedicated pool so a burst of
+# logins cannot occupy the event loop or the request threadpool
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+# Active users resolved from JWT subjects, stored detached from any session.
+# Entries are never invalidated: a change to a user's is_active or password
+# applies once their entry expires, within USER_CACHE_TTL_SECONDS (0 disables
+# the cache)
+user_cache = TTLCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login/access-token")
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -21,6 +40,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+def get_user_by_username(db: Session, username: str) -> Optional[User]:
+    """Look up a user by username, serving repeat lookups from the user cache"""
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    user = db.query(User).filter(User.username == username).first()
+    if user is None:
+        return None
+    db.expunge(user)
+    user_cache.set(username, user)
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -48,7 +87,7 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
     if not user.is_active:
@@ -69,7 +108,7 @@ def get_api_key_user(
             detail="API key header missing",
         )
     
-    api_key_obj = APIKeyService.get_api_key_by_key(db=db, key=api_key)
+    api_key_obj = APIKeyService.authenticate(db=db, key=api_key)
     if not api_key_obj:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,5 +121,5 @@ def get_api_key_user(
             detail="Inactive API key",
         )
     
-    APIKeyService.update_last_used(db=db, api_key=api_key_obj)
-    return api_key_obj.user 
\ No newline at end of file
+    APIKeyService.update_last_used(api_key_obj.id)
+    return api_key_obj.user
\ No newline at end of file
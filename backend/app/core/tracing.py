@@ -0,0 +1,281 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed operation of a sampled trace"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "start", "_started", "duration", "attributes", "error", "_token"
+    )
+
+    def __init__(self, trace_id: str, name: str, parent_id: Optional[str] = None, **attributes: Any):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes: Dict[str, Any] = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def child(self, name: str, **attributes: Any) -> "Span":
+        return Span(self.trace_id, name, self.span_id, **attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        _exporter.export(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Async generators may be closed from another context
+            pass
+        self.end(exc)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in for spans of unsampled traces; every operation is free"""
+
+    trace_id = None
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def child(self, name: str, **attributes: Any) -> "_NoopSpan":
+        return self
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=NOOP_SPAN)
+
+
+def start_trace(name: str, **attributes: Any):
+    """Root span of a new trace, sampled with probability TRACE_SAMPLE_RATE"""
+    if _exporter.enabled and random.random() < settings.TRACE_SAMPLE_RATE:
+        return Span(os.urandom(16).hex(), name, **attributes)
+    return NOOP_SPAN
+
+
+def current_span():
+    return _current_span.get()
+
+
+def span(name: str, **attributes: Any):
+    """Child of the current span; a no-op outside a sampled trace"""
+    return _current_span.get().child(name, **attributes)
+
+
+class _Exporter:
+    """
+    Ships finished spans from a background thread. TRACE_EXPORTER=file
+    appends JSON lines to TRACE_FILE_PATH, zipkin posts batches to a Zipkin
+    v2 compatible collector (Zipkin, Jaeger, OpenTelemetry Collector). When
+    the buffer is full, spans are dropped instead of slowing requests down.
+    """
+
+    BATCH_SIZE = 100
+    FLUSH_SECONDS = 1.0
+
+    def __init__(self, kind: str):
+        self.kind = kind.lower()
+        self.enabled = self.kind in ("file", "zipkin")
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.FLUSH_SECONDS
+            while len(batch) < self.BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if not batch:
+                continue
+            try:
+                if self.kind == "file":
+                    self._write_file(batch)
+                else:
+                    self._post_zipkin(batch)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(batch)} spans: {str(e)}")
+
+    def _write_file(self, batch: List[Span]) -> None:
+        with open(settings.TRACE_FILE_PATH, "a", encoding="utf-8") as f:
+            for span in batch:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def _post_zipkin(self, batch: List[Span]) -> None:
+        payload = [
+            {
+                "traceId": span.trace_id,
+                "id": span.span_id,
+                "parentId": span.parent_id,
+                "name": span.name,
+                "timestamp": int(span.start * 1_000_000),
+                "duration": max(1, int(span.duration * 1_000_000)),
+                "localEndpoint": {"serviceName": settings.PROJECT_NAME},
+                "tags": {
+                    **{key: str(value) for key, value in span.attributes.items()},
+                    **({"error": span.error} if span.error else {}),
+                },
+            }
+            for span in batch
+        ]
+        request = urllib.request.Request(
+            settings.TRACE_COLLECTOR_URL,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        urllib.request.urlopen(request, timeout=5).close()
+
+
+_exporter = _Exporter(settings.TRACE_EXPORTER)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain runs (chains, prompts, retrievers, LLM calls) into
+    child spans of a trace. Only sizes and timings are recorded, never
+    prompt or document contents. Attach it only to sampled traces.
+    """
+
+    def __init__(self, root: Span):
+        self.root = root
+        self._spans: Dict[UUID, Span] = {}
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, **attributes: Any) -> None:
+        parent = self._spans.get(parent_run_id, self.root) if parent_run_id else self.root
+        self._spans[run_id] = parent.child(name, **attributes)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> None:
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            span.set(**attributes)
+            span.end(error)
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+        if kwargs.get("name"):
+            return kwargs["name"]
+        if serialized:
+            return serialized.get("name") or (serialized.get("id") or [default])[-1]
+        return default
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, self._name(serialized, kwargs, "chain"), kind="chain")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start(
+            run_id, parent_run_id, self._name(serialized, kwargs, "retriever"),
+            kind="retriever", query_chars=len(query), **(metadata or {})
+        )
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start(
+            run_id, parent_run_id, self._name(serialized, kwargs, "chat_model"),
+            kind="llm", prompt_chars=sum(len(str(m.content)) for batch in messages for m in batch)
+        )
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start(
+            run_id, parent_run_id, self._name(serialized, kwargs, "llm"),
+            kind="llm", prompt_chars=sum(len(prompt) for prompt in prompts)
+        )
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        span = self._spans.get(run_id)
+        if span is None:
+            return
+        tokens = span.attributes.get("tokens", 0)
+        if tokens == 0:
+            span.set(ttft_ms=round((time.perf_counter() - span._started) * 1000, 3))
+        span.attributes["tokens"] = tokens + 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
@@ -1,11 +1,16 @@
+import asyncio
 import logging
 
 from app.api.api_v1.api import api_router
 from app.api.openapi.api import router as openapi_router
 from app.core.config import settings
+from app.core.metrics import PrometheusMiddleware, register_routes
 from app.core.minio import init_minio
+from app.services.api_key import flush_last_used, flush_last_used_periodically
+from app.services.garbage_collector import run_garbage_collection_periodically
 from app.startup.migarate import DatabaseMigrator
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,14 +27,30 @@ app = FastAPI(
 app.include_router(api_router, prefix=settings.API_V1_STR)
 app.include_router(openapi_router, prefix="/openapi")
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(PrometheusMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
+    # Bind metric label sets for every route before serving traffic
+    if settings.METRICS_ENABLED:
+        register_routes(app)
     # Initialize MinIO
     init_minio()
     # Run database migrations
     migrator = DatabaseMigrator(settings.get_database_url)
     migrator.run_migrations()
+    # Start the periodic garbage collector
+    if settings.GC_ENABLED:
+        asyncio.create_task(run_garbage_collection_periodically())
+    # Periodically persist API key last_used_at timestamps
+    asyncio.create_task(flush_last_used_periodically())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await asyncio.to_thread(flush_last_used)
 
 
 @app.get("/")
@@ -37,6 +58,13 @@ def root():
     return {"message": "Welcome to RAG Web UI API"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/api/health")
 async def health_check():
     return {
@@ -1,14 +1,17 @@
 from .user import User
-from .knowledge import KnowledgeBase, Document, DocumentChunk
+from .knowledge import KnowledgeBase, KnowledgeBaseStats, Document, DocumentChunk
 from .chat import Chat, Message
 from .api_key import APIKey
+from .job import BackgroundJob
 
 __all__ = [
     "User",
     "KnowledgeBase",
+    "KnowledgeBaseStats",
     "Document",
     "DocumentChunk",
     "Chat",
     "Message",
     "APIKey",
+    "BackgroundJob",
 ]
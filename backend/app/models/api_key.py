@@ -8,11 +8,20 @@ class APIKey(Base, TimestampMixin):
     __tablename__ = "api_keys"
 
     id = Column(Integer, primary_key=True, index=True)
-    key = Column(VARCHAR(128), unique=True, index=True, nullable=False)
+    key_prefix = Column(VARCHAR(16), index=True, nullable=False)  # Leading characters of the key, used for lookup
+    key_hash = Column(VARCHAR(64), unique=True, nullable=False)  # SHA-256 of the full key; plaintext is never stored
     name = Column(String(255), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     last_used_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
-    user = relationship("User", back_populates="api_keys") 
\ No newline at end of file
+    user = relationship("User", back_populates="api_keys")
+
+    @property
+    def key(self) -> str:
+        """The full key right after creation, a masked key afterwards"""
+        plaintext = getattr(self, "_plaintext_key", None)
+        if plaintext:
+            return plaintext
+        return f"{self.key_prefix}{'*' * 8}"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, JSON
+
+from app.models.base import Base, TimestampMixin
+
+class BackgroundJob(Base, TimestampMixin):
+    """Long-running maintenance job whose target may be gone by the time it finishes"""
+    __tablename__ = "background_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False, index=True)  # kb_teardown, ...
+    target_id = Column(Integer, nullable=True)  # No FK: the target is deleted by the job itself
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(String(50), nullable=False, default="pending")  # pending, processing, completed, failed
+    progress = Column(JSON, nullable=True)
+    error_message = Column(Text, nullable=True)
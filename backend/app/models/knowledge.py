@@ -14,6 +14,15 @@ class KnowledgeBase(Base, TimestampMixin):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True, index=True)  # Tombstone set while teardown is running
+    vector_shards = Column(Integer, nullable=False, default=1, server_default="1")  # Collections its vectors are spread over
+    # Vector generations, see app/services/kb_rebuild.py: the one searched,
+    # the one being rebuilt next to it, and swapped-out ones kept until GC
+    vector_generation = Column(Integer, nullable=False, default=0, server_default="0")
+    vector_config = Column(JSON, nullable=True)  # Embedding model and chunking of vector_generation, None for the settings
+    rebuild_generation = Column(Integer, nullable=True)
+    rebuild_config = Column(JSON, nullable=True)
+    retired_generations = Column(JSON, nullable=True)  # [{"generation", "shards", "retired_at"}]
     
     # Relationships
     documents = relationship("Document", back_populates="knowledge_base", cascade="all, delete-orphan")
@@ -21,6 +30,19 @@ class KnowledgeBase(Base, TimestampMixin):
     processing_tasks = relationship("ProcessingTask", back_populates="knowledge_base")
     chunks = relationship("DocumentChunk", back_populates="knowledge_base", cascade="all, delete-orphan")
     document_uploads = relationship("DocumentUpload", back_populates="knowledge_base", cascade="all, delete-orphan")
+    stats = relationship("KnowledgeBaseStats", uselist=False, back_populates="knowledge_base")
+
+class KnowledgeBaseStats(Base):
+    """Per-KB counters maintained incrementally by ingestion and deletion"""
+    __tablename__ = "knowledge_base_stats"
+
+    knowledge_base_id = Column(Integer, ForeignKey("knowledge_bases.id"), primary_key=True)
+    document_count = Column(Integer, nullable=False, default=0)
+    chunk_count = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    last_updated_at = Column(DateTime, nullable=True)
+
+    knowledge_base = relationship("KnowledgeBase", back_populates="stats")
 
 class Document(Base, TimestampMixin):
     __tablename__ = "documents"
@@ -69,8 +91,10 @@ class ProcessingTask(Base):
     knowledge_base_id = Column(Integer, ForeignKey("knowledge_bases.id"))
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
     document_upload_id = Column(Integer, ForeignKey("document_uploads.id"), nullable=True)
+    task_type = Column(String(50), nullable=False, default="process", server_default="process")  # process, reprocess, delete
     status = Column(String(50), default="pending")  # pending, processing, completed, failed
     error_message = Column(Text, nullable=True)
+    metrics = Column(JSON, nullable=True)  # Per-stage timings and counters, see app/services/task_metrics.py
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -87,6 +111,7 @@ class DocumentChunk(Base, TimestampMixin):
     file_name = Column(String(255), nullable=False)
     chunk_metadata = Column(JSON, nullable=True)
     hash = Column(String(64), nullable=False, index=True)  # Content hash for change detection
+    generation = Column(Integer, nullable=False, default=0, server_default="0")  # Vector generation the chunk belongs to
     
     # Relationships
     knowledge_base = relationship("KnowledgeBase", back_populates="chunks")
@@ -94,4 +119,5 @@ class DocumentChunk(Base, TimestampMixin):
 
     __table_args__ = (
         sa.Index('idx_kb_file_name', 'kb_id', 'file_name'),
+        sa.Index('idx_kb_generation', 'kb_id', 'generation'),
     ) 
\ No newline at end of file
@@ -2,3 +2,4 @@ from .api_key import APIKey, APIKeyCreate, APIKeyUpdate, APIKeyInDB
 from .user import UserBase, UserCreate, UserUpdate, UserResponse
 from .token import Token, TokenPayload
 from .knowledge import KnowledgeBaseBase, KnowledgeBaseCreate, KnowledgeBaseUpdate, KnowledgeBaseResponse
+from .job import BackgroundJobResponse
@@ -0,0 +1,16 @@
+from typing import Optional, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel
+
+class BackgroundJobResponse(BaseModel):
+    id: int
+    job_type: str
+    target_id: Optional[int] = None
+    status: str
+    progress: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
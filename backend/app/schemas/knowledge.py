@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -43,7 +43,9 @@ class DocumentUploadResponse(DocumentUploadBase):
 
 class ProcessingTaskBase(BaseModel):
     status: str
+    task_type: str = "process"
     error_message: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
 
 class ProcessingTaskCreate(ProcessingTaskBase):
     document_id: int
@@ -79,6 +81,57 @@ class KnowledgeBaseResponse(KnowledgeBaseBase):
     class Config:
         from_attributes = True
 
+class KnowledgeBaseSummary(KnowledgeBaseBase):
+    id: int
+    user_id: int
+    created_at: datetime
+    updated_at: datetime
+    document_count: int = 0
+    chunk_count: int = 0
+    total_bytes: int = 0
+    last_updated_at: Optional[datetime] = None
+
+class DocumentListItem(DocumentBase):
+    id: int
+    knowledge_base_id: int
+    created_at: datetime
+    updated_at: datetime
+    status: Optional[str] = None  # Status of the document's latest processing task
+    task_type: Optional[str] = None
+
+class DocumentPage(BaseModel):
+    items: List[DocumentListItem]
+    next_cursor: Optional[int] = None
+
+class ReprocessRequest(BaseModel):
+    # Default to the knowledge base's recorded chunk parameters, then 1000 / 200
+    chunk_size: Optional[int] = None
+    chunk_overlap: Optional[int] = None
+
+class RebuildRequest(BaseModel):
+    embeddings_provider: Optional[str] = None  # Defaults to EMBEDDINGS_PROVIDER
+    embeddings_model: Optional[str] = None  # Defaults to the provider's configured model
+    chunk_size: int = 1000
+    chunk_overlap: int = 200
+
+class RebuildCompareRequest(BaseModel):
+    query: str
+    top_k: int = 4
+    filter: Optional[Dict[str, Any]] = None
+
+class BatchQuery(BaseModel):
+    query: str
+    # Default to the request's knowledge_base_ids, top_k and filter
+    knowledge_base_ids: Optional[List[int]] = None
+    top_k: Optional[int] = None
+    filter: Optional[Dict[str, Any]] = None
+
+class BatchQueryRequest(BaseModel):
+    queries: List[BatchQuery]
+    knowledge_base_ids: List[int] = []
+    top_k: int = 3
+    filter: Optional[Dict[str, Any]] = None
+
 class PreviewRequest(BaseModel):
     document_ids: List[int]
     chunk_size: int = 1000
@@ -1,12 +1,79 @@
-from typing import List, Optional
+from typing import List, Optional, Dict
+import asyncio
 from datetime import datetime
+from collections import namedtuple
+import hashlib
+import hmac
+import logging
 import secrets
+import threading
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.models.api_key import APIKey
 from app.schemas.api_key import APIKeyCreate, APIKeyUpdate
 
+logger = logging.getLogger(__name__)
+
+# What get_api_key_user needs to authenticate a request without touching the database.
+# `user` is a detached User whose column attributes are loaded.
+CachedAPIKey = namedtuple("CachedAPIKey", ["id", "user_id", "is_active", "user"])
+
+api_key_cache = TTLCache(
+    ttl_seconds=settings.API_KEY_CACHE_TTL_SECONDS,
+    max_size=settings.API_KEY_CACHE_MAX_SIZE,
+)
+
+
+class LastUsedTracker:
+    """Collects last_used_at timestamps in memory so they can be written in batches"""
+
+    def __init__(self):
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, api_key_id: int) -> None:
+        with self._lock:
+            self._pending[api_key_id] = datetime.utcnow()
+
+    def flush(self, db: Session) -> int:
+        """Write all pending timestamps with one executemany UPDATE. Returns the number of keys written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            api_keys = APIKey.__table__
+            db.execute(
+                update(api_keys)
+                .where(api_keys.c.id == bindparam("api_key_id"))
+                .values(last_used_at=bindparam("used_at")),
+                [{"api_key_id": api_key_id, "used_at": used_at} for api_key_id, used_at in pending.items()]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Put the timestamps back unless a newer one arrived meanwhile
+            with self._lock:
+                for api_key_id, used_at in pending.items():
+                    self._pending.setdefault(api_key_id, used_at)
+            raise
+        return len(pending)
+
+
+last_used_tracker = LastUsedTracker()
+
+
 class APIKeyService:
+    KEY_PREFIX_LENGTH = 11  # "sk-" + 8 hex digits
+
+    @staticmethod
+    def hash_key(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
     @staticmethod
     def get_api_keys(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[APIKey]:
         return (
@@ -19,8 +86,10 @@ class APIKeyService:
 
     @staticmethod
     def create_api_key(db: Session, user_id: int, name: str) -> APIKey:
+        key = f"sk-{secrets.token_hex(32)}"
         api_key = APIKey(
-            key=f"sk-{secrets.token_hex(32)}",
+            key_prefix=key[:APIKeyService.KEY_PREFIX_LENGTH],
+            key_hash=APIKeyService.hash_key(key),
             name=name,
             user_id=user_id,
             is_active=True
@@ -28,6 +97,8 @@ class APIKeyService:
         db.add(api_key)
         db.commit()
         db.refresh(api_key)
+        # Only the creation response ever sees the plaintext key
+        api_key._plaintext_key = key
         return api_key
 
     @staticmethod
@@ -36,7 +107,40 @@ class APIKeyService:
 
     @staticmethod
     def get_api_key_by_key(db: Session, key: str) -> Optional[APIKey]:
-        return db.query(APIKey).filter(APIKey.key == key).first()
+        key_hash = APIKeyService.hash_key(key)
+        candidates = db.query(APIKey).filter(
+            APIKey.key_prefix == key[:APIKeyService.KEY_PREFIX_LENGTH]
+        ).all()
+        for api_key in candidates:
+            if hmac.compare_digest(api_key.key_hash, key_hash):
+                return api_key
+        return None
+
+    @staticmethod
+    def authenticate(db: Session, key: str) -> Optional[CachedAPIKey]:
+        """Resolve a presented key, serving repeat lookups from the in-process cache"""
+        key_hash = APIKeyService.hash_key(key)
+        cached = api_key_cache.get(key_hash)
+        if cached is not None:
+            return cached
+
+        api_key = APIKeyService.get_api_key_by_key(db=db, key=key)
+        if not api_key:
+            return None
+        user = api_key.user
+        db.expunge(user)
+        cached = CachedAPIKey(
+            id=api_key.id,
+            user_id=api_key.user_id,
+            is_active=api_key.is_active,
+            user=user,
+        )
+        api_key_cache.set(key_hash, cached)
+        return cached
+
+    @staticmethod
+    def invalidate_cache(api_key: APIKey) -> None:
+        api_key_cache.invalidate(api_key.key_hash)
 
     @staticmethod
     def update_api_key(db: Session, api_key: APIKey, update_data: APIKeyUpdate) -> APIKey:
@@ -45,17 +149,38 @@ class APIKeyService:
         db.add(api_key)
         db.commit()
         db.refresh(api_key)
+        APIKeyService.invalidate_cache(api_key)
         return api_key
 
     @staticmethod
     def delete_api_key(db: Session, api_key: APIKey) -> None:
+        key_hash = api_key.key_hash
         db.delete(api_key)
         db.commit()
+        api_key_cache.invalidate(key_hash)
 
     @staticmethod
-    def update_last_used(db: Session, api_key: APIKey) -> APIKey:
-        api_key.last_used_at = datetime.utcnow()
-        db.add(api_key)
-        db.commit()
-        db.refresh(api_key)
-        return api_key 
\ No newline at end of file
+    def update_last_used(api_key_id: int) -> None:
+        """Record usage in memory; flush_last_used persists it in batches"""
+        last_used_tracker.touch(api_key_id)
+
+
+def flush_last_used() -> None:
+    """Persist buffered last_used_at timestamps"""
+    db = SessionLocal()
+    try:
+        written = last_used_tracker.flush(db)
+        if written:
+            logger.debug(f"Flushed last_used_at for {written} API keys")
+    finally:
+        db.close()
+
+
+async def flush_last_used_periodically() -> None:
+    """Write-behind loop started on application startup"""
+    while True:
+        await asyncio.sleep(settings.API_KEY_LAST_USED_FLUSH_SECONDS)
+        try:
+            await asyncio.to_thread(flush_last_used)
+        except Exception as e:
+            logger.error(f"Failed to flush API key usage: {str(e)}")
@@ -0,0 +1,157 @@
+"""
+Batched retrieval behind POST /openapi/knowledge/batch-query, for bulk
+consumers sending many queries at once.
+
+A batch is validated against the OPENAPI_BATCH_* limits up front. Then each
+knowledge base's store is opened once and the distinct query texts are
+embedded in one provider call per embedding model the knowledge bases are
+searched with. Every (query, knowledge base) search then runs concurrently,
+and its results are streamed as one NDJSON line as soon as it finishes.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import retrieval_latency
+from app.schemas.knowledge import BatchQueryRequest
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.services.vector_store import BaseVectorStore, VectorStoreFactory
+from app.services.vector_store.filters import MetadataFilter, normalize_filter
+from app.services.vector_store.generations import get_kb_layout
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSearch(NamedTuple):
+    """One query of a batch with its defaults resolved"""
+    index: int
+    query: str
+    kb_ids: List[int]
+    top_k: int
+    filter: Optional[MetadataFilter]
+
+
+class PreparedBatch(NamedTuple):
+    """A planned batch with its stores opened and its queries embedded"""
+    searches: List[BatchSearch]
+    stores: Dict[int, BaseVectorStore]
+    # Knowledge base -> embedding config it is searched with, as sorted JSON
+    configs: Dict[int, str]
+    # (embedding config, query text) -> query vector
+    vectors: Dict[Tuple[str, str], List[float]]
+
+    def vector(self, search: BatchSearch, kb_id: int) -> List[float]:
+        return self.vectors[(self.configs[kb_id], search.query)]
+
+
+def plan_batch(request: BatchQueryRequest) -> List[BatchSearch]:
+    """Resolve each query's defaults and check the batch limits; raises ValueError"""
+    if not request.queries:
+        raise ValueError("A batch needs at least one query")
+    if len(request.queries) > settings.OPENAPI_BATCH_MAX_QUERIES:
+        raise ValueError(f"A batch takes at most {settings.OPENAPI_BATCH_MAX_QUERIES} queries")
+    default_filter = normalize_filter(request.filter)
+    searches = []
+    for index, item in enumerate(request.queries):
+        kb_ids = list(dict.fromkeys(item.knowledge_base_ids or request.knowledge_base_ids))
+        if not kb_ids:
+            raise ValueError(f"Query {index} has no knowledge base to search")
+        top_k = request.top_k if item.top_k is None else item.top_k
+        if top_k < 1:
+            raise ValueError(f"top_k of query {index} must be positive")
+        try:
+            search_filter = default_filter if item.filter is None else normalize_filter(item.filter)
+        except ValueError as e:
+            raise ValueError(f"Filter of query {index}: {str(e)}")
+        searches.append(BatchSearch(index, item.query, kb_ids, top_k, search_filter))
+    total_k = sum(search.top_k * len(search.kb_ids) for search in searches)
+    if total_k > settings.OPENAPI_BATCH_MAX_TOTAL_K:
+        raise ValueError(
+            f"The batch asks for {total_k} results; at most {settings.OPENAPI_BATCH_MAX_TOTAL_K} are allowed"
+        )
+    return searches
+
+
+def _open_stores(kb_ids: List[int]) -> Tuple[Dict[int, BaseVectorStore], Dict[int, str]]:
+    """Each knowledge base's store, pinned to the generation whose embedding config is returned with it"""
+    embeddings = EmbeddingsFactory.create()
+    collection_tenancy = settings.VECTOR_TENANCY.lower() == "collection"
+    stores, configs = {}, {}
+    for kb_id in kb_ids:
+        layout, generation, config = None, None, None
+        if collection_tenancy:
+            layout = get_kb_layout(kb_id)
+            generation, config = layout.generation, layout.config
+        stores[kb_id] = VectorStoreFactory.create_for_kb(
+            store_type=settings.VECTOR_STORE_TYPE,
+            kb_id=kb_id,
+            embedding_function=embeddings,
+            generation=generation,
+            layout=layout,
+        )
+        configs[kb_id] = json.dumps(config or {}, sort_keys=True)
+    return stores, configs
+
+
+async def prepare_batch(searches: List[BatchSearch]) -> PreparedBatch:
+    """Open the batch's stores and embed its distinct queries, one call per embedding model"""
+    kb_ids = list(dict.fromkeys(kb_id for search in searches for kb_id in search.kb_ids))
+    stores, configs = await asyncio.to_thread(_open_stores, kb_ids)
+
+    texts: Dict[str, Dict[str, None]] = {}
+    for search in searches:
+        for kb_id in search.kb_ids:
+            texts.setdefault(configs[kb_id], {})[search.query] = None
+
+    async def embed(config: str, queries: List[str]) -> List[Tuple[Tuple[str, str], List[float]]]:
+        embedded = await EmbeddingsFactory.create(json.loads(config) or None).aembed_queries(queries)
+        return [((config, query), vector) for query, vector in zip(queries, embedded)]
+
+    vectors: Dict[Tuple[str, str], List[float]] = {}
+    for pairs in await asyncio.gather(*(embed(config, list(queries)) for config, queries in texts.items())):
+        vectors.update(pairs)
+    return PreparedBatch(searches, stores, configs, vectors)
+
+
+async def stream_batch(batch: PreparedBatch) -> AsyncIterator[str]:
+    """
+    NDJSON lines of {"index", "kb_id", "results"}, in the order the searches
+    finish; a failed search yields {"index", "kb_id", "error"} instead
+    """
+    semaphore = asyncio.Semaphore(settings.OPENAPI_BATCH_SEARCH_CONCURRENCY)
+
+    async def search_one(search: BatchSearch, kb_id: int) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                hits = await batch.stores[kb_id].asimilarity_search_with_score_by_vector(
+                    batch.vector(search, kb_id), k=search.top_k, filter=search.filter
+                )
+            except Exception as e:
+                logger.warning(f"Batch query {search.index} on knowledge base {kb_id} failed: {str(e)}")
+                return {"index": search.index, "kb_id": kb_id, "error": str(e)}
+            retrieval_latency.observe(time.perf_counter() - started)
+        return {
+            "index": search.index,
+            "kb_id": kb_id,
+            "results": [
+                {"content": doc.page_content, "metadata": doc.metadata, "score": float(score)}
+                for doc, score in hits
+            ]
+        }
+
+    tasks = [
+        asyncio.ensure_future(search_one(search, kb_id))
+        for search in batch.searches
+        for kb_id in search.kb_ids
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield json.dumps(await finished, default=str) + "\n"
+    finally:
+        # The client went away: stop the searches still queued
+        for task in tasks:
+            task.cancel()
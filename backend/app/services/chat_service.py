@@ -1,6 +1,8 @@
 import json
 import base64
-from typing import List, AsyncGenerator
+import logging
+import time
+from typing import List, AsyncGenerator, Optional
 from sqlalchemy.orm import Session
 from langchain_openai import ChatOpenAI
 from langchain.chains import create_history_aware_retriever, create_retrieval_chain
@@ -8,23 +10,35 @@ from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
 from langchain_core.messages import HumanMessage, AIMessage
 from app.core.config import settings
+from app.core.metrics import RetrievalTimer, chat_generation, chat_ttft
+from app.core.tracing import NOOP_SPAN, TracingCallbackHandler, start_trace
 from app.models.chat import Message
 from app.models.knowledge import KnowledgeBase, Document
-from langchain.globals import set_verbose, set_debug
+from langchain.globals import set_debug
 from app.services.vector_store import VectorStoreFactory
+from app.services.vector_store.filters import MetadataFilter
 from app.services.embedding.embedding_factory import EmbeddingsFactory
 from app.services.llm.llm_factory import LLMFactory
 
-set_verbose(True)
-set_debug(True)
+logger = logging.getLogger(__name__)
+
+# LangChain's debug output dumps every chain input and output; only for local debugging
+if settings.LANGCHAIN_DEBUG:
+    set_debug(True)
 
 async def generate_response(
     query: str,
     messages: dict,
     knowledge_base_ids: List[int],
     chat_id: int,
-    db: Session
+    db: Session,
+    filter: Optional[MetadataFilter] = None
 ) -> AsyncGenerator[str, None]:
+    started = time.perf_counter()
+    first_token_seen = False
+    trace = start_trace("chat.generate_response", chat_id=chat_id, knowledge_bases=len(knowledge_base_ids))
+    trace.__enter__()
+    error = None
     try:
         # Create user message
         user_message = Message(
@@ -45,11 +59,15 @@ async def generate_response(
         db.commit()
         
         # Get knowledge bases and their documents
-        knowledge_bases = (
-            db.query(KnowledgeBase)
-            .filter(KnowledgeBase.id.in_(knowledge_base_ids))
-            .all()
-        )
+        with trace.child("load_knowledge_bases"):
+            knowledge_bases = (
+                db.query(KnowledgeBase)
+                .filter(
+                    KnowledgeBase.id.in_(knowledge_base_ids),
+                    KnowledgeBase.deleted_at.is_(None)
+                )
+                .all()
+            )
         
         # Initialize embeddings
         embeddings = EmbeddingsFactory.create()
@@ -60,13 +78,13 @@ async def generate_response(
             documents = db.query(Document).filter(Document.knowledge_base_id == kb.id).all()
             if documents:
                 # Use the factory to create the appropriate vector store
-                vector_store = VectorStoreFactory.create(
-                    store_type=settings.VECTOR_STORE_TYPE,  # 'chroma' or other supported types
-                    collection_name=f"kb_{kb.id}",
-                    embedding_function=embeddings,
-                )
-                print(f"Collection {f'kb_{kb.id}'} count:", vector_store._store._collection.count())
-                vector_stores.append(vector_store)
+                with trace.child("vector_store.open", collection=f"kb_{kb.id}"):
+                    vector_store = VectorStoreFactory.create_for_kb(
+                        store_type=settings.VECTOR_STORE_TYPE,  # 'chroma' or other supported types
+                        kb_id=kb.id,
+                        embedding_function=embeddings,
+                    )
+                vector_stores.append((kb.id, vector_store))
         
         if not vector_stores:
             error_msg = "I don't have any knowledge base to help answer your question."
@@ -77,7 +95,12 @@ async def generate_response(
             return
         
         # Use first vector store for now
-        retriever = vector_stores[0].as_retriever()
+        kb_id, vector_store = vector_stores[0]
+        retriever = vector_store.as_retriever(
+            search_kwargs={"filter": filter} if filter else {},
+            callbacks=[RetrievalTimer()],
+            metadata={"collection": f"kb_{kb_id}", "backend": settings.VECTOR_STORE_TYPE}
+        )
         
         # Initialize the language model
         llm = LLMFactory.create()
@@ -153,10 +176,12 @@ async def generate_response(
                 chat_history.append(AIMessage(content=message["content"]))
 
         full_response = ""
+        # Chain stages (history rewrite, retrieval, prompt, LLM) become spans of sampled traces only
+        config = {"callbacks": [TracingCallbackHandler(trace)]} if trace is not NOOP_SPAN else None
         async for chunk in rag_chain.astream({
             "input": query,
             "chat_history": chat_history
-        }):
+        }, config=config):
             if "context" in chunk:
                 serializable_context = []
                 for context in chunk["context"]:
@@ -181,6 +206,11 @@ async def generate_response(
                 full_response += base64_context + separator
 
             if "answer" in chunk:
+                if not first_token_seen:
+                    first_token_seen = True
+                    ttft = time.perf_counter() - started
+                    chat_ttft.observe(ttft)
+                    trace.set(ttft_ms=round(ttft * 1000, 3))
                 answer_chunk = chunk["answer"]
                 full_response += answer_chunk
                 # Escape quotes and use json.dumps to properly handle special characters
@@ -190,12 +220,14 @@ async def generate_response(
                 yield f'0:"{escaped_chunk}"\n'
             
         # Update bot message content
+        trace.set(response_chars=len(full_response))
         bot_message.content = full_response
         db.commit()
             
     except Exception as e:
+        error = e
         error_message = f"Error generating response: {str(e)}"
-        print(error_message)
+        logger.error(error_message)
         yield '3:{text}\n'.format(text=error_message)
         
         # Update bot message with error
@@ -203,4 +235,6 @@ async def generate_response(
             bot_message.content = error_message
             db.commit()
     finally:
+        chat_generation.observe(time.perf_counter() - started)
+        trace.__exit__(type(error) if error else None, error, None)
         db.close()
\ No newline at end of file
@@ -0,0 +1,171 @@
+import logging
+import traceback
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from minio import Minio
+from minio.deleteobjects import DeleteObject
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.minio import get_minio_client
+from app.db.session import SessionLocal
+from app.models.chat import chat_knowledge_bases
+from app.models.job import BackgroundJob
+from app.models.knowledge import KnowledgeBase, KnowledgeBaseStats, Document, DocumentChunk, DocumentUpload, ProcessingTask
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.services.vector_store import VectorStoreFactory
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 1000
+
+
+def delete_in_batches(
+    db: Session,
+    model: Any,
+    *criteria: Any,
+    batch_size: int = DELETE_BATCH_SIZE,
+    on_batch: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Delete rows matching `criteria` with set-based DELETEs of at most
+    `batch_size` primary keys, committing after each batch so no single
+    transaction grows with the table. Returns the number of rows deleted.
+    """
+    pk = model.__mapper__.primary_key[0]
+    deleted = 0
+    while True:
+        ids = [row[0] for row in db.query(pk).filter(*criteria).limit(batch_size).all()]
+        if not ids:
+            break
+        db.query(model).filter(pk.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+        if on_batch:
+            on_batch(deleted)
+    return deleted
+
+
+def remove_objects(
+    minio_client: Minio,
+    object_names: Iterable[str],
+    batch_size: int = DELETE_BATCH_SIZE
+) -> int:
+    """Remove objects through MinIO's bulk delete API. Returns the number removed."""
+    removed = 0
+    batch = []
+
+    def flush() -> int:
+        # remove_objects is lazy: errors are only reported while iterating
+        failed = 0
+        for error in minio_client.remove_objects(settings.MINIO_BUCKET_NAME, batch):
+            failed += 1
+            logger.error(f"Failed to remove object {error.name}: {error.message}")
+        return len(batch) - failed
+
+    for name in object_names:
+        batch.append(DeleteObject(name))
+        if len(batch) >= batch_size:
+            removed += flush()
+            batch = []
+    if batch:
+        removed += flush()
+    return removed
+
+
+def remove_objects_with_prefix(minio_client: Minio, prefix: str) -> int:
+    """Bulk-remove every object stored under `prefix`"""
+    objects = minio_client.list_objects(settings.MINIO_BUCKET_NAME, prefix=prefix, recursive=True)
+    return remove_objects(minio_client, (obj.object_name for obj in objects))
+
+
+def update_job_progress(db: Session, job: BackgroundJob, **progress: Any) -> None:
+    """Merge `progress` into the job's progress document and commit"""
+    job.progress = {**(job.progress or {}), **progress}
+    db.commit()
+
+
+def vector_generations(db: Session, kb_id: int) -> List[Tuple[int, Optional[int]]]:
+    """
+    Every vector generation a knowledge base still has stored, with the
+    shard count it was written with (None for the current one)
+    """
+    kb = db.query(KnowledgeBase).get(kb_id)
+    if kb is None:
+        return []
+    generations = [(kb.vector_generation or 0, None)]
+    if kb.rebuild_generation is not None:
+        generations.append((kb.rebuild_generation, None))
+    generations.extend((entry["generation"], entry["shards"]) for entry in kb.retired_generations or [])
+    return generations
+
+
+def teardown_knowledge_base_background(kb_id: int, job_id: int) -> None:
+    """
+    Remove a tombstoned knowledge base and everything that belongs to it:
+    the vector collection, all MinIO objects under kb_{id}/, and its rows,
+    deleted set-based in foreign-key dependency order.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(BackgroundJob).get(job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found")
+            return
+
+        try:
+            job.status = "processing"
+            update_job_progress(db, job, stage="vectors")
+
+            # 1. Vector collections of every generation
+            embeddings = EmbeddingsFactory.create()
+            for generation, shards in vector_generations(db, kb_id):
+                vector_store = VectorStoreFactory.create_for_kb(
+                    store_type=settings.VECTOR_STORE_TYPE,
+                    kb_id=kb_id,
+                    embedding_function=embeddings,
+                    shards=shards,
+                    generation=generation,
+                )
+                try:
+                    vector_store.delete_collection()
+                except Exception as e:
+                    # A KB that never ingested anything has no collection
+                    logger.warning(f"Job {job_id}: Failed to delete generation {generation} of kb_{kb_id}: {str(e)}")
+            update_job_progress(db, job, stage="objects")
+
+            # 2. MinIO objects
+            objects_removed = remove_objects_with_prefix(get_minio_client(), f"kb_{kb_id}/")
+            logger.info(f"Job {job_id}: Removed {objects_removed} objects for knowledge base {kb_id}")
+            update_job_progress(db, job, stage="database", objects_removed=objects_removed)
+
+            # 3. Database rows, children before parents
+            db.execute(
+                chat_knowledge_bases.delete().where(chat_knowledge_bases.c.knowledge_base_id == kb_id)
+            )
+            db.commit()
+            delete_in_batches(db, ProcessingTask, ProcessingTask.knowledge_base_id == kb_id)
+            delete_in_batches(
+                db, DocumentChunk, DocumentChunk.kb_id == kb_id,
+                on_batch=lambda n: update_job_progress(db, job, chunks_deleted=n)
+            )
+            documents_deleted = delete_in_batches(db, Document, Document.knowledge_base_id == kb_id)
+            delete_in_batches(db, DocumentUpload, DocumentUpload.knowledge_base_id == kb_id)
+            db.query(KnowledgeBaseStats).filter(
+                KnowledgeBaseStats.knowledge_base_id == kb_id
+            ).delete(synchronize_session=False)
+            db.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).delete(synchronize_session=False)
+
+            job.status = "completed"
+            update_job_progress(db, job, stage="done", documents_deleted=documents_deleted)
+            logger.info(f"Job {job_id}: Knowledge base {kb_id} torn down")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Job {job_id}: Error tearing down knowledge base {kb_id}: {str(e)}")
+            logger.error(f"Job {job_id}: Stack trace: {traceback.format_exc()}")
+            job.status = "failed"
+            job.error_message = str(e)
+            db.commit()
+    finally:
+        db.close()
+
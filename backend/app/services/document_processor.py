@@ -2,8 +2,9 @@ import logging
 import os
 import hashlib
 import tempfile
+import time
 import traceback
-from datetime import datetime
+from datetime import datetime, timezone
 from app.db.session import SessionLocal
 from io import BytesIO
 from typing import Optional, List, Dict, Set
@@ -30,7 +31,15 @@ from minio.error import MinioException
 from minio import Minio
 from minio.commonconfig import CopySource
 from app.services.vector_store import VectorStoreFactory
+from app.services.vector_store.generations import KnowledgeBaseLayout, get_kb_layout
 from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.services.cleanup import delete_in_batches
+from app.services.kb_stats import apply_kb_stats_delta
+from app.services.task_events import TaskProgressReporter
+from app.services.task_metrics import TaskMetrics, count_tokens
+
+# 向量分批写入，每批写完上报一次进度
+VECTOR_UPSERT_BATCH_SIZE = 100
 
 class UploadResult(BaseModel):
     file_path: str
@@ -59,9 +68,9 @@ async def process_document(file_path: str, file_name: str, kb_id: int, document_
         embeddings = EmbeddingsFactory.create()
         
         logger.info(f"Initializing vector store with collection: kb_{kb_id}")
-        vector_store = VectorStoreFactory.create(
+        vector_store = VectorStoreFactory.create_for_kb(
             store_type=settings.VECTOR_STORE_TYPE,
-            collection_name=f"kb_{kb_id}",
+            kb_id=kb_id,
             embedding_function=embeddings,
         )
         
@@ -75,6 +84,7 @@ async def process_document(file_path: str, file_name: str, kb_id: int, document_
         new_chunks = []
         current_hashes = set()
         documents_to_update = []
+        ids_to_update = []
         
         for chunk in preview_result.chunks:
             # Calculate chunk hash
@@ -117,12 +127,13 @@ async def process_document(file_path: str, file_name: str, kb_id: int, document_
                 metadata=metadata
             )
             documents_to_update.append(doc)
+            ids_to_update.append(chunk_id)
         
         # Add new chunks to database and vector store
         if new_chunks:
             logger.info(f"Adding {len(new_chunks)} new/updated chunks")
             chunk_manager.add_chunks(new_chunks)
-            vector_store.add_documents(documents_to_update)
+            vector_store.upsert(ids_to_update, documents_to_update)
         
         # Delete removed chunks
         chunks_to_delete = chunk_manager.get_deleted_chunks(current_hashes, file_name)
@@ -231,16 +242,218 @@ async def preview_document(file_path: str, chunk_size: int = 1000, chunk_overlap
     finally:
         os.unlink(temp_path)
 
+def _load_and_split(
+    local_path: str,
+    file_name: str,
+    task_id: int,
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    progress: Optional[TaskProgressReporter] = None,
+    metrics: Optional[TaskMetrics] = None
+) -> List[LangchainDocument]:
+    """Load a downloaded file with the loader matching its extension and split it into chunks"""
+    logger = logging.getLogger(__name__)
+    metrics = metrics or TaskMetrics()
+    _, ext = os.path.splitext(file_name)
+    ext = ext.lower()
+    
+    logger.info(f"Task {task_id}: Loading document with extension {ext}")
+    # 选择合适的加载器
+    if ext == ".pdf":
+        loader = PyPDFLoader(local_path)
+    elif ext == ".docx":
+        loader = Docx2txtLoader(local_path)
+    elif ext == ".md":
+        loader = UnstructuredMarkdownLoader(local_path)
+    else:  # 默认使用文本加载器
+        loader = TextLoader(local_path)
+    
+    logger.info(f"Task {task_id}: Loading document content")
+    with metrics.stage("load"):
+        documents = loader.load()
+    metrics.record("load", pages=len(documents))
+    logger.info(f"Task {task_id}: Document loaded successfully")
+    if progress:
+        progress.report(stage="splitting", pages_parsed=len(documents))
+    
+    logger.info(f"Task {task_id}: Splitting document into chunks")
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    with metrics.stage("split"):
+        chunks = text_splitter.split_documents(documents)
+    metrics.record("split", chunks=len(chunks))
+    logger.info(f"Task {task_id}: Document split into {len(chunks)} chunks")
+    if progress:
+        progress.report(chunks_total=len(chunks))
+    return chunks
+
+def _store_chunks(
+    db: Session,
+    vector_store,
+    chunks: List[LangchainDocument],
+    kb_id: int,
+    file_name: str,
+    document_id: int,
+    task_id: int,
+    progress: Optional[TaskProgressReporter] = None,
+    metrics: Optional[TaskMetrics] = None,
+    generation: int = 0
+) -> int:
+    """Persist chunk records and upsert them into the vector store under the same IDs"""
+    logger = logging.getLogger(__name__)
+    metrics = metrics or TaskMetrics()
+    logger.info(f"Task {task_id}: Storing document chunks")
+    db_insert_started = time.perf_counter()
+    chunk_ids = []
+    unique_chunks = []
+    seen_chunk_ids = set()
+    # 检索时可按文件类型和文档创建时间（epoch 秒，UTC）过滤
+    file_type = os.path.splitext(file_name)[1].lstrip(".").lower()
+    created_at = db.query(Document.created_at).filter(Document.id == document_id).scalar() or datetime.utcnow()
+    created_at = int(created_at.replace(tzinfo=timezone.utc).timestamp())
+    for i, chunk in enumerate(chunks):
+        # 为每个 chunk 生成确定性的 ID，与向量库中的 ID 保持一致；重建出的新一代向量使用独立的 ID
+        key = f"{kb_id}:{file_name}" if generation == 0 else f"{kb_id}:{generation}:{file_name}"
+        chunk_id = hashlib.sha256(
+            f"{key}:{chunk.page_content}".encode()
+        ).hexdigest()
+        # 内容完全相同的 chunk 会得到相同的 ID，只保留一份
+        if chunk_id in seen_chunk_ids:
+            continue
+        seen_chunk_ids.add(chunk_id)
+        chunk_ids.append(chunk_id)
+        unique_chunks.append(chunk)
+
+        chunk.metadata["source"] = file_name
+        chunk.metadata["kb_id"] = kb_id
+        chunk.metadata["document_id"] = document_id
+        chunk.metadata["chunk_id"] = chunk_id
+        chunk.metadata["file_type"] = file_type
+        chunk.metadata["created_at"] = created_at
+        
+        doc_chunk = DocumentChunk(
+            id=chunk_id,
+            document_id=document_id,
+            kb_id=kb_id,
+            file_name=file_name,
+            chunk_metadata={
+                "page_content": chunk.page_content,
+                **chunk.metadata
+            },
+            hash=hashlib.sha256(
+                (chunk.page_content + str(chunk.metadata)).encode()
+            ).hexdigest(),
+            generation=generation
+        )
+        db.merge(doc_chunk)  # merge 保证重试时不会产生主键冲突
+        if i > 0 and i % 100 == 0:
+            logger.info(f"Task {task_id}: Stored {i} chunks")
+            db.commit()  # 每 100 条提交一次，避免事务太大
+            if progress:
+                progress.report(stage="storing", chunks_stored=len(chunk_ids))
+    db.commit()
+    metrics.record("db_insert", seconds=round(time.perf_counter() - db_insert_started, 4), chunks=len(chunk_ids))
+    if progress:
+        progress.report(stage="embedding", chunks_stored=len(chunk_ids), chunks_upserted=0)
+    
+    # 写入向量存储，使用与 document_chunks 相同的 ID（嵌入在 upsert 中完成）
+    logger.info(f"Task {task_id}: Upserting chunks to vector store")
+    with metrics.stage(
+        "vector_upsert",
+        chunks=len(chunk_ids),
+        embedding_tokens=count_tokens([chunk.page_content for chunk in unique_chunks])
+    ):
+        for start in range(0, len(chunk_ids), VECTOR_UPSERT_BATCH_SIZE):
+            end = start + VECTOR_UPSERT_BATCH_SIZE
+            vector_store.upsert(chunk_ids[start:end], unique_chunks[start:end])
+            if progress:
+                progress.report(chunks_upserted=min(end, len(chunk_ids)))
+    logger.info(f"Task {task_id}: Chunks added to vector store")
+    return len(chunk_ids)
+
+def store_document_generation(
+    db: Session,
+    kb_id: int,
+    document_id: int,
+    file_name: str,
+    local_path: str,
+    generation: int,
+    config: Optional[Dict] = None,
+    task_id: int = 0
+) -> int:
+    """
+    Replace a document's chunks in one vector generation of its knowledge
+    base, split with the generation's chunk parameters and embedded with
+    its model. Returns the number of chunks stored.
+    """
+    config = config or {}
+    chunks = _load_and_split(
+        local_path, file_name, task_id, config.get("chunk_size", 1000), config.get("chunk_overlap", 200)
+    )
+    vector_store = VectorStoreFactory.create_for_kb(
+        store_type=settings.VECTOR_STORE_TYPE,
+        kb_id=kb_id,
+        embedding_function=EmbeddingsFactory.create(),
+        generation=generation,
+        layout=get_kb_layout(kb_id, fresh=True),
+    )
+    # The generation's collections may not exist yet; stores treat that as nothing to delete
+    vector_store.delete_by_filter(kb_id=kb_id, document_id=document_id)
+    delete_in_batches(
+        db,
+        DocumentChunk,
+        DocumentChunk.document_id == document_id,
+        DocumentChunk.generation == generation
+    )
+    return _store_chunks(db, vector_store, chunks, kb_id, file_name, document_id, task_id, generation=generation)
+
+def _store_other_generations(
+    db: Session,
+    kb_id: int,
+    document_id: int,
+    file_name: str,
+    local_path: str,
+    task_id: int,
+    stored_generation: int,
+    chunk_count: int
+) -> int:
+    """
+    Write a document just stored in `stored_generation` into the knowledge
+    base's other live generation too: the one being rebuilt, or the new
+    searched one if a rebuild was swapped in meanwhile. Returns the
+    document's chunk count in the searched generation.
+    """
+    logger = logging.getLogger(__name__)
+    layout = get_kb_layout(kb_id, fresh=True)
+    for generation in layout.live_generations():
+        if generation == stored_generation:
+            continue
+        logger.info(f"Task {task_id}: Writing document {document_id} into vector generation {generation}")
+        try:
+            count = store_document_generation(
+                db, kb_id, document_id, file_name, local_path, generation, layout.config_of(generation), task_id
+            )
+        except Exception as e:
+            # The rebuild reports the document as missing when it is swapped in
+            db.rollback()
+            logger.warning(f"Task {task_id}: Failed to write document {document_id} into generation {generation}: {str(e)}")
+            continue
+        if generation == layout.generation:
+            chunk_count = count
+    return chunk_count
+
 async def process_document_background(
     temp_path: str,
     file_name: str,
     kb_id: int,
     task_id: int,
     db: Session = None,
-    chunk_size: int = 1000,
-    chunk_overlap: int = 200
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None
 ) -> None:
-    """Process document in background"""
+    """Process document in background, chunked as configured for the knowledge base unless given"""
     logger = logging.getLogger(__name__)
     logger.info(f"Starting background processing for task {task_id}, file: {file_name}")
 
@@ -255,22 +468,27 @@ async def process_document_background(
     if not task:
         logger.error(f"Task {task_id} not found")
         return
+    progress = TaskProgressReporter(task_id, kb_id, upload_id=task.document_upload_id, file_name=file_name)
+    metrics = TaskMetrics(file_name, task.document_upload.file_size if task.document_upload else None)
     
     try:
         logger.info(f"Task {task_id}: Setting status to processing")
         task.status = "processing"
         db.commit()
+        progress.report(status="processing", stage="downloading")
         
         # 1. 从临时目录下载文件
         minio_client = get_minio_client()
         try:
             local_temp_path = f"/tmp/temp_{task_id}_{file_name}"  # 使用系统临时目录
             logger.info(f"Task {task_id}: Downloading file from MinIO: {temp_path} to {local_temp_path}")
-            minio_client.fget_object(
-                bucket_name=settings.MINIO_BUCKET_NAME,
-                object_name=temp_path,
-                file_path=local_temp_path
-            )
+            with metrics.stage("download"):
+                minio_client.fget_object(
+                    bucket_name=settings.MINIO_BUCKET_NAME,
+                    object_name=temp_path,
+                    file_path=local_temp_path
+                )
+            metrics.record("download", bytes=os.path.getsize(local_temp_path))
             logger.info(f"Task {task_id}: File downloaded successfully")
         except MinioException as e:
             error_msg = f"Failed to download temp file: {str(e)}"
@@ -279,61 +497,44 @@ async def process_document_background(
         
         try:
             # 2. 加载和分块文档
-            _, ext = os.path.splitext(file_name)
-            ext = ext.lower()
-            
-            logger.info(f"Task {task_id}: Loading document with extension {ext}")
-            # 选择合适的加载器
-            if ext == ".pdf":
-                loader = PyPDFLoader(local_temp_path)
-            elif ext == ".docx":
-                loader = Docx2txtLoader(local_temp_path)
-            elif ext == ".md":
-                loader = UnstructuredMarkdownLoader(local_temp_path)
-            else:  # 默认使用文本加载器
-                loader = TextLoader(local_temp_path)
-            
-            logger.info(f"Task {task_id}: Loading document content")
-            documents = loader.load()
-            logger.info(f"Task {task_id}: Document loaded successfully")
-            
-            logger.info(f"Task {task_id}: Splitting document into chunks")
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap
-            )
-            chunks = text_splitter.split_documents(documents)
-            logger.info(f"Task {task_id}: Document split into {len(chunks)} chunks")
+            layout = get_kb_layout(kb_id, fresh=True)
+            config = layout.config or {}
+            chunk_size = chunk_size or config.get("chunk_size", 1000)
+            chunk_overlap = config.get("chunk_overlap", 200) if chunk_overlap is None else chunk_overlap
+            chunks = _load_and_split(local_temp_path, file_name, task_id, chunk_size, chunk_overlap, progress, metrics)
             
             # 3. 创建向量存储
             logger.info(f"Task {task_id}: Initializing vector store")
             embeddings = EmbeddingsFactory.create()
             
-            vector_store = VectorStoreFactory.create(
+            vector_store = VectorStoreFactory.create_for_kb(
                 store_type=settings.VECTOR_STORE_TYPE,
-                collection_name=f"kb_{kb_id}",
+                kb_id=kb_id,
                 embedding_function=embeddings,
+                generation=layout.generation,
+                layout=layout,
             )
             
             # 4. 将临时文件移动到永久目录
             permanent_path = f"kb_{kb_id}/{file_name}"
             try:
                 logger.info(f"Task {task_id}: Moving file to permanent storage")
-                # 复制到永久目录
-                source = CopySource(settings.MINIO_BUCKET_NAME, temp_path)
-                minio_client.copy_object(
-                    bucket_name=settings.MINIO_BUCKET_NAME,
-                    object_name=permanent_path,
-                    source=source
-                )
-                logger.info(f"Task {task_id}: File moved to permanent storage")
-                
-                # 删除临时文件
-                logger.info(f"Task {task_id}: Removing temporary file from MinIO")
-                minio_client.remove_object(
-                    bucket_name=settings.MINIO_BUCKET_NAME,
-                    object_name=temp_path
-                )
+                with metrics.stage("copy"):
+                    # 复制到永久目录
+                    source = CopySource(settings.MINIO_BUCKET_NAME, temp_path)
+                    minio_client.copy_object(
+                        bucket_name=settings.MINIO_BUCKET_NAME,
+                        object_name=permanent_path,
+                        source=source
+                    )
+                    logger.info(f"Task {task_id}: File moved to permanent storage")
+                    
+                    # 删除临时文件
+                    logger.info(f"Task {task_id}: Removing temporary file from MinIO")
+                    minio_client.remove_object(
+                        bucket_name=settings.MINIO_BUCKET_NAME,
+                        object_name=temp_path
+                    )
                 logger.info(f"Task {task_id}: Temporary file removed")
             except MinioException as e:
                 error_msg = f"Failed to move file to permanent storage: {str(e)}"
@@ -355,47 +556,21 @@ async def process_document_background(
             db.refresh(document)
             logger.info(f"Task {task_id}: Document record created with ID {document.id}")
             
-            # 6. 存储文档块
-            logger.info(f"Task {task_id}: Storing document chunks")
-            for i, chunk in enumerate(chunks):
-                # 为每个 chunk 生成唯一的 ID
-                chunk_id = hashlib.sha256(
-                    f"{kb_id}:{file_name}:{chunk.page_content}".encode()
-                ).hexdigest()
-
-                chunk.metadata["source"] = file_name
-                chunk.metadata["kb_id"] = kb_id
-                chunk.metadata["document_id"] = document.id
-                chunk.metadata["chunk_id"] = chunk_id
-                
-                doc_chunk = DocumentChunk(
-                    id=chunk_id,  # 添加 ID 字段
-                    document_id=document.id,
-                    kb_id=kb_id,
-                    file_name=file_name,
-                    chunk_metadata={
-                        "page_content": chunk.page_content,
-                        **chunk.metadata
-                    },
-                    hash=hashlib.sha256(
-                        (chunk.page_content + str(chunk.metadata)).encode()
-                    ).hexdigest()
-                )
-                db.add(doc_chunk)
-                if i > 0 and i % 100 == 0:
-                    logger.info(f"Task {task_id}: Stored {i} chunks")
-                    db.commit()  # 每 100 条提交一次，避免事务太大
-            
-            # 7. 添加到向量存储
-            logger.info(f"Task {task_id}: Adding chunks to vector store")
-            vector_store.add_documents(chunks)
-            # 移除 persist() 调用，因为新版本不需要
-            logger.info(f"Task {task_id}: Chunks added to vector store")
+            # 6. 存储文档块并写入向量存储
+            chunk_count = _store_chunks(
+                db, vector_store, chunks, kb_id, file_name, document.id, task_id, progress, metrics, layout.generation
+            )
+            # 7. 知识库重建期间同时写入新一代向量
+            chunk_count = _store_other_generations(
+                db, kb_id, document.id, file_name, local_temp_path, task_id, layout.generation, chunk_count
+            )
+            apply_kb_stats_delta(db, kb_id, documents=1, chunks=chunk_count, total_bytes=document.file_size)
             
             # 8. 更新任务状态
             logger.info(f"Task {task_id}: Updating task status to completed")
             task.status = "completed"
             task.document_id = document.id  # 更新为新创建的文档ID
+            task.metrics = metrics.finish()
             
             # 9. 更新上传记录状态
             upload = task.document_upload  # 直接通过关系获取
@@ -404,6 +579,7 @@ async def process_document_background(
                 upload.status = "completed"
             
             db.commit()
+            progress.report(status="completed", stage="done", document_id=document.id)
             logger.info(f"Task {task_id}: Processing completed successfully")
             
         finally:
@@ -421,7 +597,9 @@ async def process_document_background(
         logger.error(f"Task {task_id}: Stack trace: {traceback.format_exc()}")
         task.status = "failed"
         task.error_message = str(e)
+        task.metrics = metrics.finish()
         db.commit()
+        progress.report(status="failed", error_message=str(e))
         
         # 清理临时文件
         try:
@@ -437,3 +615,222 @@ async def process_document_background(
         # if we create the db session, we need to close it
         if should_close_db and db:
             db.close()
+
+
+def _delete_document_chunks(db: Session, document_id: int, task_id: int, generation: int) -> int:
+    """
+    Delete a document's chunk rows of every vector generation in bounded
+    set-based batches. Returns the number deleted from `generation`, the
+    searched one, which is what the knowledge base stats count.
+    """
+    logger = logging.getLogger(__name__)
+    delete_in_batches(
+        db,
+        DocumentChunk,
+        DocumentChunk.document_id == document_id,
+        DocumentChunk.generation != generation
+    )
+    return delete_in_batches(
+        db,
+        DocumentChunk,
+        DocumentChunk.document_id == document_id,
+        DocumentChunk.generation == generation,
+        on_batch=lambda n: logger.info(f"Task {task_id}: Deleted {n} chunk records")
+    )
+
+def _delete_document_vectors(kb_id: int, document_id: int, layout: KnowledgeBaseLayout) -> None:
+    """Delete a document's vectors from each live vector generation of the layout"""
+    embeddings = EmbeddingsFactory.create()
+    for generation in layout.live_generations():
+        vector_store = VectorStoreFactory.create_for_kb(
+            store_type=settings.VECTOR_STORE_TYPE,
+            kb_id=kb_id,
+            embedding_function=embeddings,
+            generation=generation,
+            layout=layout,
+        )
+        vector_store.delete_by_filter(kb_id=kb_id, document_id=document_id)
+
+def delete_document_background(kb_id: int, document_id: int, task_id: int) -> None:
+    """Remove a single document's vectors, chunk rows, stored object and record in background"""
+    logger = logging.getLogger(__name__)
+    logger.info(f"Starting background deletion for task {task_id}, document: {document_id}")
+
+    db = SessionLocal()
+    try:
+        task = db.query(ProcessingTask).get(task_id)
+        if not task:
+            logger.error(f"Task {task_id} not found")
+            return
+        progress = TaskProgressReporter(task_id, kb_id, task_type="delete", document_id=document_id)
+        metrics = TaskMetrics()
+        
+        try:
+            task.status = "processing"
+            db.commit()
+            progress.report(status="processing", stage="deleting_vectors")
+
+            document = db.query(Document).filter(
+                Document.id == document_id,
+                Document.knowledge_base_id == kb_id
+            ).first()
+            if not document:
+                raise Exception(f"Document {document_id} not found")
+            file_path = document.file_path
+            file_size = document.file_size
+            metrics.set_file(document.file_name, file_size)
+
+            # 1. 通过过滤条件一次性删除向量（包括正在重建的新一代）
+            logger.info(f"Task {task_id}: Deleting vectors of document {document_id}")
+            layout = get_kb_layout(kb_id, fresh=True)
+            with metrics.stage("vector_delete"):
+                _delete_document_vectors(kb_id, document_id, layout)
+
+            # 2. 批量删除 chunk 记录
+            progress.report(stage="deleting_chunks")
+            with metrics.stage("chunk_delete"):
+                chunks_deleted = _delete_document_chunks(db, document_id, task_id, layout.generation)
+            metrics.record("chunk_delete", chunks=chunks_deleted)
+            progress.report(stage="removing_file", chunks_deleted=chunks_deleted)
+
+            # 3. 删除 MinIO 中的文件
+            logger.info(f"Task {task_id}: Removing {file_path} from MinIO")
+            try:
+                with metrics.stage("file_remove"):
+                    get_minio_client().remove_object(
+                        bucket_name=settings.MINIO_BUCKET_NAME,
+                        object_name=file_path
+                    )
+            except MinioException as e:
+                raise Exception(f"Failed to remove file from MinIO: {str(e)}")
+
+            # 4. 解除任务与文档的关联，然后删除文档记录
+            db.query(ProcessingTask).filter(
+                ProcessingTask.document_id == document_id
+            ).update({ProcessingTask.document_id: None}, synchronize_session=False)
+            db.query(Document).filter(
+                Document.id == document_id
+            ).delete(synchronize_session=False)
+            apply_kb_stats_delta(db, kb_id, documents=-1, chunks=-chunks_deleted, total_bytes=-file_size)
+
+            task.status = "completed"
+            task.metrics = metrics.finish()
+            db.commit()
+            progress.report(status="completed", stage="done")
+            logger.info(f"Task {task_id}: Document {document_id} deleted")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Task {task_id}: Error deleting document: {str(e)}")
+            logger.error(f"Task {task_id}: Stack trace: {traceback.format_exc()}")
+            task.status = "failed"
+            task.error_message = str(e)
+            task.metrics = metrics.finish()
+            db.commit()
+            progress.report(status="failed", error_message=str(e))
+    finally:
+        db.close()
+
+async def reprocess_document_background(
+    kb_id: int,
+    document_id: int,
+    task_id: int,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None
+) -> None:
+    """
+    Re-chunk and re-embed an already stored document in place; chunk
+    parameters not given default to the knowledge base's, as for new documents
+    """
+    logger = logging.getLogger(__name__)
+    logger.info(f"Starting background re-processing for task {task_id}, document: {document_id}")
+
+    db = SessionLocal()
+    local_temp_path = None
+    try:
+        task = db.query(ProcessingTask).get(task_id)
+        if not task:
+            logger.error(f"Task {task_id} not found")
+            return
+        progress = TaskProgressReporter(task_id, kb_id, task_type="reprocess", document_id=document_id)
+        metrics = TaskMetrics()
+        
+        try:
+            task.status = "processing"
+            db.commit()
+            progress.report(status="processing", stage="downloading")
+
+            document = db.query(Document).filter(
+                Document.id == document_id,
+                Document.knowledge_base_id == kb_id
+            ).first()
+            if not document:
+                raise Exception(f"Document {document_id} not found")
+            file_name = document.file_name
+            progress.state["file_name"] = file_name
+            metrics.set_file(file_name, document.file_size)
+
+            # 1. 从永久目录下载文件
+            local_temp_path = f"/tmp/temp_{task_id}_{file_name}"
+            try:
+                with metrics.stage("download"):
+                    get_minio_client().fget_object(
+                        bucket_name=settings.MINIO_BUCKET_NAME,
+                        object_name=document.file_path,
+                        file_path=local_temp_path
+                    )
+            except MinioException as e:
+                raise Exception(f"Failed to download file: {str(e)}")
+            metrics.record("download", bytes=os.path.getsize(local_temp_path))
+
+            # 2. 重新分块，未指定的参数沿用知识库记录的分块配置
+            layout = get_kb_layout(kb_id, fresh=True)
+            config = layout.config or {}
+            chunk_size = chunk_size or config.get("chunk_size", 1000)
+            chunk_overlap = config.get("chunk_overlap", 200) if chunk_overlap is None else chunk_overlap
+            chunks = _load_and_split(local_temp_path, file_name, task_id, chunk_size, chunk_overlap, progress, metrics)
+
+            # 3. 清理旧的向量和 chunk 记录
+            vector_store = VectorStoreFactory.create_for_kb(
+                store_type=settings.VECTOR_STORE_TYPE,
+                kb_id=kb_id,
+                embedding_function=EmbeddingsFactory.create(),
+                generation=layout.generation,
+                layout=layout,
+            )
+            logger.info(f"Task {task_id}: Removing previous vectors and chunk records")
+            with metrics.stage("vector_delete"):
+                _delete_document_vectors(kb_id, document_id, layout)
+            with metrics.stage("chunk_delete"):
+                chunks_deleted = _delete_document_chunks(db, document_id, task_id, layout.generation)
+            metrics.record("chunk_delete", chunks=chunks_deleted)
+
+            # 4. 写入新的 chunk，重建期间同时写入新一代向量
+            chunk_count = _store_chunks(
+                db, vector_store, chunks, kb_id, file_name, document_id, task_id, progress, metrics, layout.generation
+            )
+            chunk_count = _store_other_generations(
+                db, kb_id, document_id, file_name, local_temp_path, task_id, layout.generation, chunk_count
+            )
+            apply_kb_stats_delta(db, kb_id, chunks=chunk_count - chunks_deleted)
+
+            task.status = "completed"
+            task.metrics = metrics.finish()
+            db.commit()
+            progress.report(status="completed", stage="done")
+            logger.info(f"Task {task_id}: Document {document_id} re-processed")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Task {task_id}: Error re-processing document: {str(e)}")
+            logger.error(f"Task {task_id}: Stack trace: {traceback.format_exc()}")
+            task.status = "failed"
+            task.error_message = str(e)
+            task.metrics = metrics.finish()
+            db.commit()
+            progress.report(status="failed", error_message=str(e))
+    finally:
+        if local_temp_path and os.path.exists(local_temp_path):
+            try:
+                os.remove(local_temp_path)
+            except Exception as e:
+                logger.warning(f"Task {task_id}: Failed to clean up local temp file: {str(e)}")
+        db.close()
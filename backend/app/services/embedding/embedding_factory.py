@@ -1,36 +1,144 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
 from app.core.config import settings
+from app.core.metrics import embedding_latency, embedding_tokens
+from app.core.tracing import span
+from app.services.task_metrics import count_tokens
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 from langchain_ollama import OllamaEmbeddings
 from langchain_community.embeddings import DashScopeEmbeddings
+from langchain_community.embeddings.dashscope import embed_with_retry as dashscope_embed_with_retry
+from app.services.embedding.fake_embeddings import HashingEmbeddings
 # If you plan on adding other embeddings, import them here
 # from some_other_module import AnotherEmbeddingClass
 
+# Providers whose embed_query is embed_documents of one text, so queries can be embedded in one batch
+SYMMETRIC_EMBEDDINGS = (OpenAIEmbeddings, OllamaEmbeddings, HashingEmbeddings)
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Delegates to a provider's embeddings and records call latency and token counts"""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        try:
+            return self.embeddings.embed_documents(texts)
+        finally:
+            embedding_latency["documents"].observe(time.perf_counter() - started)
+            embedding_tokens["documents"].inc(count_tokens(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        started = time.perf_counter()
+        try:
+            with span("embedding.embed_query", provider=settings.EMBEDDINGS_PROVIDER, chars=len(text)):
+                return self.embeddings.embed_query(text)
+        finally:
+            embedding_latency["query"].observe(time.perf_counter() - started)
+            embedding_tokens["query"].inc(count_tokens([text]))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        try:
+            return await self.embeddings.aembed_documents(texts)
+        finally:
+            embedding_latency["documents"].observe(time.perf_counter() - started)
+            embedding_tokens["documents"].inc(count_tokens(texts))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        started = time.perf_counter()
+        try:
+            with span("embedding.embed_query", provider=settings.EMBEDDINGS_PROVIDER, chars=len(text)):
+                return await self.embeddings.aembed_query(text)
+        finally:
+            embedding_latency["query"].observe(time.perf_counter() - started)
+            embedding_tokens["query"].inc(count_tokens([text]))
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed many queries as embed_query would, batched where the provider allows"""
+        started = time.perf_counter()
+        try:
+            with span("embedding.embed_queries", provider=settings.EMBEDDINGS_PROVIDER, queries=len(texts)):
+                return await self._aembed_queries(texts)
+        finally:
+            embedding_latency["query"].observe(time.perf_counter() - started)
+            embedding_tokens["query"].inc(count_tokens(texts))
+
+    async def _aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        if isinstance(self.embeddings, SYMMETRIC_EMBEDDINGS):
+            return await self.embeddings.aembed_documents(texts)
+        if isinstance(self.embeddings, DashScopeEmbeddings):
+            # DashScope embeds queries with text_type="query", which its batched call takes too
+            embedded = await asyncio.to_thread(
+                dashscope_embed_with_retry,
+                self.embeddings,
+                input=texts,
+                text_type="query",
+                model=self.embeddings.model,
+            )
+            return [item["embedding"] for item in embedded]
+        # Unknown providers may embed queries differently from documents
+        return list(await asyncio.gather(*(self.embeddings.aembed_query(text) for text in texts)))
+
 
 class EmbeddingsFactory:
     @staticmethod
-    def create():
+    def create(config: Optional[Dict[str, Any]] = None):
         """
         Factory method to create an embeddings instance based on .env config.
+        A knowledge base's vector config (see resolve_config) overrides the
+        provider and model.
         """
+        return InstrumentedEmbeddings(EmbeddingsFactory._create_provider(config or {}))
+
+    @staticmethod
+    def resolve_config(provider: Optional[str] = None, model: Optional[str] = None) -> Dict[str, str]:
+        """Pin a provider and model, defaulting to the configured ones, so later .env changes do not affect it"""
+        provider = (provider or settings.EMBEDDINGS_PROVIDER).lower()
+        default_models = {
+            "openai": settings.OPENAI_EMBEDDINGS_MODEL,
+            "dashscope": settings.DASH_SCOPE_EMBEDDINGS_MODEL,
+            "ollama": settings.OLLAMA_EMBEDDINGS_MODEL,
+            "fake": "",
+        }
+        if provider not in default_models:
+            raise ValueError(f"Unsupported embeddings provider: {provider}")
+        return {"embeddings_provider": provider, "embeddings_model": model or default_models[provider]}
+
+    @staticmethod
+    def _create_provider(config: Dict[str, Any]) -> Embeddings:
         # Suppose your .env has a value like EMBEDDINGS_PROVIDER=openai
-        embeddings_provider = settings.EMBEDDINGS_PROVIDER.lower()
+        embeddings_provider = (config.get("embeddings_provider") or settings.EMBEDDINGS_PROVIDER).lower()
+        model = config.get("embeddings_model")
 
         if embeddings_provider == "openai":
             return OpenAIEmbeddings(
                 openai_api_key=settings.OPENAI_API_KEY,
                 openai_api_base=settings.OPENAI_API_BASE,
-                model=settings.OPENAI_EMBEDDINGS_MODEL
+                model=model or settings.OPENAI_EMBEDDINGS_MODEL
             )
         elif embeddings_provider == "dashscope":
             return DashScopeEmbeddings(
-                model=settings.DASH_SCOPE_EMBEDDINGS_MODEL,
+                model=model or settings.DASH_SCOPE_EMBEDDINGS_MODEL,
                 dashscope_api_key=settings.DASH_SCOPE_API_KEY
             )
         elif embeddings_provider == "ollama":
             return OllamaEmbeddings(
-                model=settings.OLLAMA_EMBEDDINGS_MODEL,
+                model=model or settings.OLLAMA_EMBEDDINGS_MODEL,
                 base_url=settings.OLLAMA_API_BASE
             )
+        elif embeddings_provider == "fake":
+            # Offline, deterministic embeddings for benchmarks and load tests
+            return HashingEmbeddings(
+                dimension=settings.FAKE_EMBEDDINGS_DIMENSION,
+                latency_ms=settings.FAKE_EMBEDDINGS_LATENCY_MS,
+                per_text_latency_ms=settings.FAKE_EMBEDDINGS_PER_TEXT_LATENCY_MS
+            )
 
         # Extend with other providers:
         # elif embeddings_provider == "another_provider":
@@ -0,0 +1,59 @@
+import asyncio
+import hashlib
+import math
+import re
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings for benchmarks and load tests. Every
+    word is hashed to a signed bucket of a `dimension`-sized vector, so
+    texts sharing words land close together and retrieval still behaves
+    sensibly. `latency_ms` is added to every call, plus `per_text_latency_ms`
+    per embedded text, to stand in for a provider round trip.
+    """
+
+    def __init__(self, dimension: int = 384, latency_ms: float = 0, per_text_latency_ms: float = 0):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.per_text_latency_ms = per_text_latency_ms
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimension] += 1.0 if value & (1 << 63) else -1.0
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm == 0:
+            # Empty texts still get a valid unit vector
+            vector[0] = 1.0
+            return vector
+        return [x / norm for x in vector]
+
+    def _delay(self, count: int) -> float:
+        return (self.latency_ms + self.per_text_latency_ms * count) / 1000
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        delay = self._delay(len(texts))
+        if delay > 0:
+            time.sleep(delay)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        delay = self._delay(len(texts))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
@@ -0,0 +1,353 @@
+import asyncio
+import glob
+import logging
+import os
+import re
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.minio import get_minio_client
+from app.db.session import SessionLocal, engine
+from app.models.job import BackgroundJob
+from app.models.knowledge import KnowledgeBase, Document, DocumentChunk, DocumentUpload, ProcessingTask
+from app.services.cleanup import remove_objects, update_job_progress
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.services.kb_rebuild import drop_retired_generations
+from app.services.vector_store import VectorStoreFactory
+
+logger = logging.getLogger(__name__)
+
+# process_document_background downloads to /tmp/temp_{task_id}_{file_name}
+LOCAL_TEMP_PATTERN = "/tmp/temp_*"
+LOCAL_TEMP_TASK_ID = re.compile(r"temp_(\d+)_")
+
+ACTIVE_TASK_STATUSES = ["pending", "processing"]
+
+_gc_lock = threading.Lock()
+# MySQL named lock held while sweeping, so one worker of the deployment sweeps at a time
+GC_LOCK_NAME = "rag_web_ui_garbage_collection"
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class GarbageCollector:
+    """
+    Incremental sweeper for storage that no longer belongs to anything:
+    expired uploads and their temp objects, leftover local temp files,
+    MinIO objects without a Document/DocumentUpload row, vectors
+    without a DocumentChunk row (compacting collections afterwards), and
+    vector generations swapped out of knowledge bases. Every sweep walks its set in keyset
+    order, one bounded batch at a time, and pauses between batches.
+    """
+
+    def __init__(self, db: Session, job: Optional[BackgroundJob] = None):
+        self.db = db
+        self.job = job
+        self.minio_client = get_minio_client()
+        self.batch_size = settings.GC_BATCH_SIZE
+        self.pause_seconds = settings.GC_BATCH_PAUSE_SECONDS
+        self.ttl = timedelta(hours=settings.GC_TEMP_TTL_HOURS)
+        self.stats: Dict[str, int] = {
+            "uploads_deleted": 0,
+            "temp_objects_removed": 0,
+            "local_files_removed": 0,
+            "local_bytes_reclaimed": 0,
+            "orphan_objects_removed": 0,
+            "orphan_vectors_removed": 0,
+            "collections_compacted": 0,
+            "generations_dropped": 0,
+        }
+
+    def _pause(self) -> None:
+        if self.pause_seconds > 0:
+            time.sleep(self.pause_seconds)
+
+    def _report(self, stage: str) -> None:
+        if self.job is not None:
+            update_job_progress(self.db, self.job, stage=stage, **self.stats)
+
+    def run(self) -> Dict[str, int]:
+        """Run every sweep once and return the reclaimed counts"""
+        for stage, sweep in (
+            ("uploads", self.sweep_expired_uploads),
+            ("local_files", self.sweep_local_temp_files),
+            ("objects", self.sweep_orphan_objects),
+            ("vectors", self.sweep_orphan_vectors),
+            ("generations", self.sweep_retired_generations),
+        ):
+            self._report(stage)
+            sweep()
+        self._report("done")
+        return self.stats
+
+    def sweep_expired_uploads(self) -> None:
+        """Delete expired upload records and their temp objects, skipping uploads still being processed"""
+        cutoff = datetime.utcnow() - self.ttl
+        last_id = 0
+        while True:
+            uploads = (
+                self.db.query(DocumentUpload.id, DocumentUpload.temp_path)
+                .filter(DocumentUpload.id > last_id, DocumentUpload.created_at < cutoff)
+                .order_by(DocumentUpload.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not uploads:
+                return
+            last_id = uploads[-1].id
+
+            busy = {
+                row[0] for row in self.db.query(ProcessingTask.document_upload_id).filter(
+                    ProcessingTask.document_upload_id.in_([upload.id for upload in uploads]),
+                    ProcessingTask.status.in_(ACTIVE_TASK_STATUSES)
+                )
+            }
+            expired = [upload for upload in uploads if upload.id not in busy]
+            if expired:
+                expired_ids = [upload.id for upload in expired]
+                # Re-uploading a file reuses its temp path, so keep paths a newer upload still owns
+                in_use = {
+                    row[0] for row in self.db.query(DocumentUpload.temp_path).filter(
+                        DocumentUpload.temp_path.in_([upload.temp_path for upload in expired]),
+                        DocumentUpload.created_at >= cutoff
+                    )
+                }
+                # Removing an already moved temp object is a no-op in the bulk API
+                self.stats["temp_objects_removed"] += remove_objects(
+                    self.minio_client,
+                    [upload.temp_path for upload in expired if upload.temp_path not in in_use]
+                )
+                self.db.query(ProcessingTask).filter(
+                    ProcessingTask.document_upload_id.in_(expired_ids)
+                ).update({ProcessingTask.document_upload_id: None}, synchronize_session=False)
+                self.db.query(DocumentUpload).filter(
+                    DocumentUpload.id.in_(expired_ids)
+                ).delete(synchronize_session=False)
+                self.db.commit()
+                self.stats["uploads_deleted"] += len(expired_ids)
+            self._pause()
+
+    def sweep_local_temp_files(self) -> None:
+        """Remove local download files left behind by crashed processing tasks"""
+        cutoff = time.time() - self.ttl.total_seconds()
+        for paths in _batched(sorted(glob.glob(LOCAL_TEMP_PATTERN)), self.batch_size):
+            candidates = {}
+            for path in paths:
+                match = LOCAL_TEMP_TASK_ID.search(os.path.basename(path))
+                try:
+                    if match and os.path.getmtime(path) < cutoff:
+                        candidates[path] = int(match.group(1))
+                except OSError:
+                    continue
+            if not candidates:
+                continue
+
+            busy = {
+                row[0] for row in self.db.query(ProcessingTask.id).filter(
+                    ProcessingTask.id.in_(set(candidates.values())),
+                    ProcessingTask.status.in_(ACTIVE_TASK_STATUSES)
+                )
+            }
+            for path, task_id in candidates.items():
+                if task_id in busy:
+                    continue
+                try:
+                    size = os.path.getsize(path)
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning(f"Failed to remove local temp file {path}: {str(e)}")
+                    continue
+                self.stats["local_files_removed"] += 1
+                self.stats["local_bytes_reclaimed"] += size
+            self._pause()
+
+    def sweep_orphan_objects(self) -> None:
+        """Remove stored objects that no Document or DocumentUpload row points to"""
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        # MinIO lists in key order and pages transparently, which gives us keyset pagination
+        objects = self.minio_client.list_objects(settings.MINIO_BUCKET_NAME, recursive=True)
+        for page in _batched(objects, self.batch_size):
+            # Objects younger than the TTL may belong to an upload that is still being processed
+            names = [obj.object_name for obj in page if obj.last_modified and obj.last_modified < cutoff]
+            if not names:
+                continue
+            known = {
+                row[0] for row in self.db.query(Document.file_path).filter(Document.file_path.in_(names))
+            }
+            known.update(
+                row[0] for row in self.db.query(DocumentUpload.temp_path).filter(DocumentUpload.temp_path.in_(names))
+            )
+            orphans = [name for name in names if name not in known]
+            if orphans:
+                self.stats["orphan_objects_removed"] += remove_objects(self.minio_client, orphans)
+            self._pause()
+
+    def sweep_orphan_vectors(self) -> None:
+        """Remove vectors whose chunk ID has no DocumentChunk row, one knowledge base at a time"""
+        embeddings = EmbeddingsFactory.create()
+        last_kb_id = 0
+        while True:
+            kb_ids = [
+                row[0] for row in self.db.query(KnowledgeBase.id)
+                .filter(KnowledgeBase.id > last_kb_id, KnowledgeBase.deleted_at.is_(None))
+                .order_by(KnowledgeBase.id)
+                .limit(self.batch_size)
+                .all()
+            ]
+            if not kb_ids:
+                return
+            last_kb_id = kb_ids[-1]
+
+            for kb_id in kb_ids:
+                try:
+                    self._sweep_collection(kb_id, embeddings)
+                except Exception as e:
+                    logger.warning(f"Failed to sweep vectors of knowledge base {kb_id}: {str(e)}")
+
+    def sweep_retired_generations(self) -> None:
+        """Drop the vector generations knowledge bases swapped out more than VECTOR_GENERATION_RETENTION_HOURS ago"""
+        cutoff = datetime.utcnow() - timedelta(hours=settings.VECTOR_GENERATION_RETENTION_HOURS)
+        last_kb_id = 0
+        while True:
+            rows = (
+                self.db.query(KnowledgeBase.id, KnowledgeBase.retired_generations)
+                .filter(KnowledgeBase.id > last_kb_id, KnowledgeBase.deleted_at.is_(None))
+                .order_by(KnowledgeBase.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not rows:
+                return
+            last_kb_id = rows[-1].id
+
+            for kb_id, retired in rows:
+                if not retired:
+                    continue
+                try:
+                    self.stats["generations_dropped"] += len(drop_retired_generations(self.db, kb_id, cutoff))
+                except Exception as e:
+                    self.db.rollback()
+                    logger.warning(f"Failed to drop retired generations of knowledge base {kb_id}: {str(e)}")
+                self._pause()
+
+    def _sweep_collection(self, kb_id: int, embeddings) -> None:
+        vector_store = VectorStoreFactory.create_for_kb(
+            store_type=settings.VECTOR_STORE_TYPE,
+            kb_id=kb_id,
+            embedding_function=embeddings,
+        )
+        # Chunk rows are written before vectors and deleted after them, so a
+        # vector without a row is never part of an in-flight ingestion.
+        orphans = []
+        for ids in vector_store.iter_ids(self.batch_size):
+            known = {
+                row[0] for row in self.db.query(DocumentChunk.id).filter(DocumentChunk.id.in_(ids))
+            }
+            orphans.extend(id for id in ids if id not in known)
+            self._pause()
+        # Delete after the scan so offset-based paging is not disturbed
+        for batch in _batched(orphans, self.batch_size):
+            vector_store.delete(batch)
+            self.stats["orphan_vectors_removed"] += len(batch)
+        if vector_store.compact():
+            self.stats["collections_compacted"] += 1
+
+
+@contextmanager
+def _gc_lease() -> Iterator[bool]:
+    """
+    Whether this process may sweep: it holds the process lock and, on MySQL,
+    the GET_LOCK named lock of the deployment. The named lock lives on a
+    connection of its own, so it is released when the sweep ends or the
+    connection drops, even if the process dies.
+    """
+    if not _gc_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        if engine.dialect.name != "mysql":
+            yield True
+            return
+        with engine.connect() as connection:
+            acquired = connection.execute(
+                text("SELECT GET_LOCK(:name, 0)"), {"name": GC_LOCK_NAME}
+            ).scalar() == 1
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": GC_LOCK_NAME})
+    finally:
+        _gc_lock.release()
+
+
+def run_garbage_collection(job_id: Optional[int] = None) -> None:
+    """
+    Run one garbage collection pass, recording the result on a BackgroundJob.
+    A scheduled pass (no job_id) is skipped without a job record while
+    another worker is sweeping.
+    """
+    with _gc_lease() as acquired:
+        if not acquired and job_id is None:
+            logger.info("Garbage collection is already running in another worker; skipping this pass")
+            return
+        _run_garbage_collection(job_id, acquired)
+
+
+def _run_garbage_collection(job_id: Optional[int], acquired: bool) -> None:
+    db = SessionLocal()
+    try:
+        job = db.query(BackgroundJob).get(job_id) if job_id else None
+        if job is None:
+            job = BackgroundJob(job_type="gc", status="pending", progress={})
+            db.add(job)
+            db.commit()
+
+        if not acquired:
+            job.status = "failed"
+            job.error_message = "Garbage collection is already running"
+            db.commit()
+            return
+
+        try:
+            job.status = "processing"
+            db.commit()
+            stats = GarbageCollector(db, job).run()
+            job.status = "completed"
+            db.commit()
+            logger.info(f"Garbage collection job {job.id} reclaimed: {stats}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Garbage collection job {job.id} failed: {str(e)}")
+            logger.error(f"Stack trace: {traceback.format_exc()}")
+            job.status = "failed"
+            job.error_message = str(e)
+            db.commit()
+    finally:
+        db.close()
+
+
+async def run_garbage_collection_periodically() -> None:
+    """Scheduler loop started on application startup"""
+    while True:
+        await asyncio.sleep(settings.GC_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(run_garbage_collection)
+        except Exception as e:
+            logger.error(f"Scheduled garbage collection failed: {str(e)}")
@@ -0,0 +1,36 @@
+from typing import FrozenSet
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.knowledge import KnowledgeBase
+
+# user_id -> IDs of the user's live (non-tombstoned) knowledge bases
+kb_ownership_cache = TTLCache(
+    ttl_seconds=settings.KB_OWNERSHIP_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
+
+def get_owned_kb_ids(db: Session, user_id: int) -> FrozenSet[int]:
+    """Return the IDs of the knowledge bases a user owns"""
+    kb_ids = kb_ownership_cache.get(user_id)
+    if kb_ids is None:
+        kb_ids = frozenset(
+            row[0] for row in db.query(KnowledgeBase.id).filter(
+                KnowledgeBase.user_id == user_id,
+                KnowledgeBase.deleted_at.is_(None)
+            )
+        )
+        kb_ownership_cache.set(user_id, kb_ids)
+    return kb_ids
+
+
+def user_owns_kb(db: Session, user_id: int, kb_id: int) -> bool:
+    return kb_id in get_owned_kb_ids(db, user_id)
+
+
+def invalidate_kb_ownership(user_id: int) -> None:
+    """Call after a knowledge base is created for or removed from a user"""
+    kb_ownership_cache.invalidate(user_id)
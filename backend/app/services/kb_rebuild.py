@@ -0,0 +1,253 @@
+"""
+Zero-downtime rebuilds of a knowledge base's vectors, e.g. for a new
+embedding model or new chunk parameters.
+
+Every knowledge base's vectors belong to a generation: searches use
+KnowledgeBase.vector_generation, whose collections are kb_{id} for
+generation 0 and kb_{id}_g{n} after that. A rebuild re-chunks and
+re-embeds every document into the next generation in the background,
+one throttled document at a time, while ingestion writes to both
+generations. Chunk rows carry their generation, so the two are counted
+and garbage-collected separately. Swapping is a single update of the
+knowledge base row; the swapped-out generation is retired and dropped by
+garbage collection once it is VECTOR_GENERATION_RETENTION_HOURS old.
+"""
+import logging
+import os
+import tempfile
+import time
+import traceback
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.minio import get_minio_client
+from app.db.session import SessionLocal
+from app.models.job import BackgroundJob
+from app.models.knowledge import KnowledgeBase, Document, DocumentChunk
+from app.services.cleanup import delete_in_batches, update_job_progress
+from app.services.document_processor import store_document_generation
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+from app.services.kb_stats import apply_kb_stats_delta
+from app.services.vector_store import VectorStoreFactory
+from app.services.vector_store.generations import invalidate_kb_layout
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_JOB_STATUSES = ["pending", "processing"]
+REBUILD_BATCH_SIZE = 100
+
+
+def _retired(generation: int, shards: int) -> Dict[str, Any]:
+    return {"generation": generation, "shards": shards, "retired_at": datetime.utcnow().isoformat()}
+
+
+def active_rebuild_job(db: Session, kb_id: int) -> Optional[BackgroundJob]:
+    return db.query(BackgroundJob).filter(
+        BackgroundJob.job_type == "kb_rebuild",
+        BackgroundJob.target_id == kb_id,
+        BackgroundJob.status.in_(ACTIVE_JOB_STATUSES)
+    ).first()
+
+
+def start_rebuild(db: Session, kb: KnowledgeBase, config: Dict[str, Any], user_id: int) -> BackgroundJob:
+    """
+    Allocate the knowledge base's next generation for `config` and create the
+    job that fills it. A rebuild that was not swapped in yet is retired.
+    """
+    if settings.VECTOR_TENANCY.lower() != "collection":
+        raise ValueError("Knowledge bases are only rebuilt under VECTOR_TENANCY=collection")
+    retired = list(kb.retired_generations or [])
+    generation = 1 + max(
+        [kb.vector_generation or 0, kb.rebuild_generation or 0] + [entry["generation"] for entry in retired]
+    )
+    if kb.rebuild_generation is not None:
+        retired.append(_retired(kb.rebuild_generation, kb.vector_shards or 1))
+    kb.rebuild_generation = generation
+    kb.rebuild_config = config
+    kb.retired_generations = retired
+    job = BackgroundJob(
+        job_type="kb_rebuild",
+        target_id=kb.id,
+        user_id=user_id,
+        status="pending",
+        progress={"generation": generation, **config}
+    )
+    db.add(job)
+    db.commit()
+    invalidate_kb_layout(kb.id)
+    db.refresh(job)
+    return job
+
+
+def _rebuild_document(db: Session, kb_id: int, document: Document, generation: int, config: Dict, job_id: int) -> int:
+    _, ext = os.path.splitext(document.file_name)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext.lower()) as temp_file:
+        local_path = temp_file.name
+    try:
+        get_minio_client().fget_object(
+            bucket_name=settings.MINIO_BUCKET_NAME,
+            object_name=document.file_path,
+            file_path=local_path
+        )
+        return store_document_generation(
+            db, kb_id, document.id, document.file_name, local_path, generation, config, job_id
+        )
+    finally:
+        os.unlink(local_path)
+
+
+def rebuild_knowledge_base_background(kb_id: int, job_id: int) -> None:
+    """
+    Re-chunk and re-embed every document of a knowledge base into the
+    generation allocated for the job, pausing VECTOR_REBUILD_PAUSE_SECONDS
+    between documents. Documents that fail are counted and left out; they
+    keep the generation from being swapped in until a rebuild covers them.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(BackgroundJob).get(job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found")
+            return
+        generation = (job.progress or {}).get("generation")
+
+        try:
+            job.status = "processing"
+            documents_total = db.query(func.count(Document.id)).filter(Document.knowledge_base_id == kb_id).scalar()
+            update_job_progress(
+                db, job, stage="documents", documents_total=documents_total,
+                documents_done=0, documents_failed=0, chunks=0
+            )
+            done = failed = chunks = 0
+            last_id = 0
+            while True:
+                documents = (
+                    db.query(Document)
+                    .filter(Document.knowledge_base_id == kb_id, Document.id > last_id)
+                    .order_by(Document.id)
+                    .limit(REBUILD_BATCH_SIZE)
+                    .all()
+                )
+                if not documents:
+                    break
+                last_id = documents[-1].id
+                for document in documents:
+                    # Cancelled, superseded or the knowledge base deleted
+                    kb = db.query(KnowledgeBase.rebuild_generation, KnowledgeBase.rebuild_config).filter(
+                        KnowledgeBase.id == kb_id,
+                        KnowledgeBase.deleted_at.is_(None)
+                    ).first()
+                    if kb is None or kb.rebuild_generation != generation:
+                        raise Exception(f"Rebuild into generation {generation} was cancelled")
+                    try:
+                        chunks += _rebuild_document(db, kb_id, document, generation, kb.rebuild_config, job_id)
+                        done += 1
+                    except Exception as e:
+                        db.rollback()
+                        failed += 1
+                        logger.warning(f"Job {job_id}: Failed to rebuild document {document.id}: {str(e)}")
+                    update_job_progress(db, job, documents_done=done, documents_failed=failed, chunks=chunks)
+                    if settings.VECTOR_REBUILD_PAUSE_SECONDS > 0:
+                        time.sleep(settings.VECTOR_REBUILD_PAUSE_SECONDS)
+
+            job.status = "completed"
+            update_job_progress(db, job, stage="done")
+            logger.info(f"Job {job_id}: Knowledge base {kb_id} rebuilt into generation {generation}")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Job {job_id}: Error rebuilding knowledge base {kb_id}: {str(e)}")
+            logger.error(f"Job {job_id}: Stack trace: {traceback.format_exc()}")
+            job.status = "failed"
+            job.error_message = str(e)
+            db.commit()
+    finally:
+        db.close()
+
+
+def swap_generation(db: Session, kb_id: int) -> Dict[str, Any]:
+    """
+    Make the rebuilt generation the searched one, in one transaction, and
+    retire the previous one. Refused while the rebuild is running or a
+    document is in the searched generation but not in the rebuilt one.
+    """
+    kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).with_for_update().first()
+    if kb is None or kb.rebuild_generation is None:
+        raise ValueError(f"Knowledge base {kb_id} has no rebuild to swap in")
+    if active_rebuild_job(db, kb_id):
+        raise ValueError(f"Knowledge base {kb_id} is still being rebuilt")
+    previous, generation = kb.vector_generation or 0, kb.rebuild_generation
+
+    def in_generation(g):
+        return exists().where(DocumentChunk.document_id == Document.id, DocumentChunk.generation == g)
+
+    missing = db.query(func.count(Document.id)).filter(
+        Document.knowledge_base_id == kb_id,
+        in_generation(previous),
+        ~in_generation(generation)
+    ).scalar()
+    if missing:
+        raise ValueError(f"{missing} documents are not in generation {generation} yet; rebuild again to add them")
+
+    def chunk_count(g):
+        return db.query(func.count(DocumentChunk.id)).filter(
+            DocumentChunk.kb_id == kb_id, DocumentChunk.generation == g
+        ).scalar()
+
+    chunks = chunk_count(generation)
+    apply_kb_stats_delta(db, kb_id, chunks=chunks - chunk_count(previous))
+    kb.retired_generations = list(kb.retired_generations or []) + [_retired(previous, kb.vector_shards or 1)]
+    kb.vector_generation = generation
+    kb.vector_config = kb.rebuild_config
+    kb.rebuild_generation = None
+    kb.rebuild_config = None
+    db.commit()
+    invalidate_kb_layout(kb_id)
+    logger.info(f"Knowledge base {kb_id}: swapped generation {previous} for {generation}")
+    return {"kb_id": kb_id, "generation": generation, "previous_generation": previous, "chunks": chunks}
+
+
+def cancel_rebuild(db: Session, kb_id: int) -> Optional[int]:
+    """Retire the generation being rebuilt, which stops its job; returns the generation"""
+    kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).with_for_update().first()
+    generation = kb.rebuild_generation if kb is not None else None
+    if generation is not None:
+        kb.retired_generations = list(kb.retired_generations or []) + [_retired(generation, kb.vector_shards or 1)]
+        kb.rebuild_generation = None
+        kb.rebuild_config = None
+    db.commit()
+    invalidate_kb_layout(kb_id)
+    return generation
+
+
+def drop_retired_generations(db: Session, kb_id: int, retired_before: datetime) -> List[int]:
+    """Delete the collections and chunk rows of generations retired before the cutoff"""
+    kb = db.query(KnowledgeBase).get(kb_id)
+    expired = [
+        entry for entry in (kb.retired_generations or [])
+        if datetime.fromisoformat(entry["retired_at"]) < retired_before
+    ]
+    dropped = []
+    for entry in expired:
+        generation = entry["generation"]
+        vector_store = VectorStoreFactory.create_for_kb(
+            store_type=settings.VECTOR_STORE_TYPE,
+            kb_id=kb_id,
+            embedding_function=EmbeddingsFactory.create(),
+            shards=entry["shards"],
+            generation=generation,
+        )
+        vector_store.delete_collection()
+        delete_in_batches(
+            db, DocumentChunk, DocumentChunk.kb_id == kb_id, DocumentChunk.generation == generation
+        )
+        kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id).with_for_update().first()
+        kb.retired_generations = [
+            other for other in (kb.retired_generations or []) if other["generation"] != generation
+        ]
+        db.commit()
+        dropped.append(generation)
+    return dropped
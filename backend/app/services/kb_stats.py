@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models.knowledge import KnowledgeBaseStats
+
+
+def apply_kb_stats_delta(
+    db: Session,
+    kb_id: int,
+    documents: int = 0,
+    chunks: int = 0,
+    total_bytes: int = 0
+) -> None:
+    """
+    Adjust a knowledge base's materialized counters with a single atomic
+    UPDATE. The caller commits, so the counters change in the same
+    transaction as the rows they describe.
+    """
+    updated = db.query(KnowledgeBaseStats).filter(
+        KnowledgeBaseStats.knowledge_base_id == kb_id
+    ).update(
+        {
+            KnowledgeBaseStats.document_count: KnowledgeBaseStats.document_count + documents,
+            KnowledgeBaseStats.chunk_count: KnowledgeBaseStats.chunk_count + chunks,
+            KnowledgeBaseStats.total_bytes: KnowledgeBaseStats.total_bytes + total_bytes,
+            KnowledgeBaseStats.last_updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False
+    )
+    if not updated:
+        db.add(KnowledgeBaseStats(
+            knowledge_base_id=kb_id,
+            document_count=max(documents, 0),
+            chunk_count=max(chunks, 0),
+            total_bytes=max(total_bytes, 0),
+            last_updated_at=datetime.utcnow(),
+        ))
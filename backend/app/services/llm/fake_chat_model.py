@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORDS = (
+    "the", "document", "describes", "context", "answer", "system", "data", "process", "result",
+    "value", "model", "query", "source", "section", "information", "detail", "example", "summary",
+)
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    Offline chat model for benchmarks and load tests. It streams
+    `response_tokens` words after `ttft_ms`, at `tokens_per_second`. The
+    words are derived from the prompt, so the same conversation always
+    gets the same answer. Answers end with a citation so the UI's
+    citation rendering is exercised too.
+    """
+
+    ttft_ms: float = 200
+    tokens_per_second: float = 50
+    response_tokens: int = 64
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming-chat"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = int.from_bytes(hashlib.sha256(prompt.encode()).digest()[:8], "little")
+        rng = random.Random(seed)
+        words = [rng.choice(WORDS) for _ in range(max(self.response_tokens - 1, 0))]
+        return [f"{word} " for word in words] + ["[citation:1]"]
+
+    def _token_interval(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(self.ttft_ms / 1000 + self._token_interval() * max(len(tokens) - 1, 0))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(self._tokens(messages)):
+            if i > 0:
+                time.sleep(self._token_interval())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(self._tokens(messages)):
+            if i > 0:
+                await asyncio.sleep(self._token_interval())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
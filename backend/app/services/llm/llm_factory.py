@@ -3,6 +3,7 @@ from langchain_core.language_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_deepseek import ChatDeepSeek
 from langchain_ollama import OllamaLLM
+from app.services.llm.fake_chat_model import FakeStreamingChatModel
 from app.core.config import settings
 
 class LLMFactory:
@@ -42,6 +43,13 @@ class LLMFactory:
                 temperature=temperature,
                 streaming=streaming
             )
+        elif provider.lower() == "fake":
+            # Offline streaming model for benchmarks and load tests
+            return FakeStreamingChatModel(
+                ttft_ms=settings.FAKE_LLM_TTFT_MS,
+                tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+                response_tokens=settings.FAKE_LLM_RESPONSE_TOKENS
+            )
         # Add more providers here as needed
         # elif provider.lower() == "anthropic":
         #     return ChatAnthropic(...)
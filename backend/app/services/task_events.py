@@ -0,0 +1,314 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import ingestion_task_finished, ingestion_task_started
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+class TaskEventSubscription(ABC):
+    """Events published for one knowledge base, received in publish order"""
+
+    @abstractmethod
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait up to `timeout` seconds for the next event; None if nothing arrived"""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+
+class TaskEventBus(ABC):
+    """
+    Pub/sub for processing task progress. Publishers are the ingestion
+    background jobs (event loop or threadpool), subscribers are SSE
+    streams. Every event is a full snapshot of its task, so a subscriber
+    that misses an event only loses intermediate progress.
+    """
+
+    @abstractmethod
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Publish a task snapshot; callable from any thread and never blocks on subscribers"""
+        pass
+
+    @abstractmethod
+    def latest(self, task_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Most recent snapshot of each task that published one recently"""
+        pass
+
+    @abstractmethod
+    async def subscribe(self, kb_id: int) -> TaskEventSubscription:
+        pass
+
+
+class _QueueSubscription(TaskEventSubscription):
+    def __init__(self, bus: "InMemoryTaskEventBus", kb_id: int, queue: asyncio.Queue):
+        self._bus = bus
+        self._kb_id = kb_id
+        self._queue = queue
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self) -> None:
+        self._bus._unsubscribe(self._kb_id, self._queue)
+
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]) -> None:
+    # Runs on the subscriber's loop; a slow consumer loses its oldest events, not the newest
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+class InMemoryTaskEventBus(TaskEventBus):
+    """Fans events out to subscribers of the same process"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._latest = TTLCache(ttl_seconds=settings.TASK_EVENTS_TTL_SECONDS)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self._latest.set(event["task_id"], event)
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["kb_id"], ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has been closed
+                pass
+
+    def latest(self, task_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        snapshots = {}
+        for task_id in task_ids:
+            event = self._latest.get(task_id)
+            if event is not None:
+                snapshots[task_id] = event
+        return snapshots
+
+    async def subscribe(self, kb_id: int) -> TaskEventSubscription:
+        queue = asyncio.Queue(maxsize=settings.TASK_EVENTS_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[kb_id].add((asyncio.get_running_loop(), queue))
+        return _QueueSubscription(self, kb_id, queue)
+
+    def _unsubscribe(self, kb_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(kb_id)
+            if not subscribers:
+                return
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                del self._subscribers[kb_id]
+
+
+class _RedisSubscription(TaskEventSubscription):
+    def __init__(self, pubsub, channel: str):
+        self._pubsub = pubsub
+        self._channel = channel
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if not message or message["type"] != "message":
+            return None
+        return json.loads(message["data"])
+
+    async def close(self) -> None:
+        await self._pubsub.unsubscribe(self._channel)
+        await self._pubsub.close()
+
+
+class RedisTaskEventBus(TaskEventBus):
+    """
+    Cross-process backend: events go through Redis pub/sub and the latest
+    snapshot per task is kept under an expiring key, so a stream served by
+    one API worker sees tasks running in any other worker.
+    """
+
+    CHANNEL_PREFIX = "ragwebui:task_events:kb:"
+    SNAPSHOT_PREFIX = "ragwebui:task_events:task:"
+
+    def __init__(self):
+        try:
+            import redis
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise ImportError(
+                "The redis task event backend requires the redis package: pip install redis"
+            )
+        self._client = redis.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+        self._async_client = aioredis.Redis.from_url(settings.TASK_EVENTS_REDIS_URL)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        payload = json.dumps(event, default=str)
+        pipeline = self._client.pipeline(transaction=False)
+        pipeline.set(
+            f"{self.SNAPSHOT_PREFIX}{event['task_id']}",
+            payload,
+            ex=settings.TASK_EVENTS_TTL_SECONDS
+        )
+        pipeline.publish(f"{self.CHANNEL_PREFIX}{event['kb_id']}", payload)
+        pipeline.execute()
+
+    def latest(self, task_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        task_ids = list(task_ids)
+        if not task_ids:
+            return {}
+        values = self._client.mget([f"{self.SNAPSHOT_PREFIX}{task_id}" for task_id in task_ids])
+        return {
+            task_id: json.loads(value)
+            for task_id, value in zip(task_ids, values)
+            if value is not None
+        }
+
+    async def subscribe(self, kb_id: int) -> TaskEventSubscription:
+        channel = f"{self.CHANNEL_PREFIX}{kb_id}"
+        pubsub = self._async_client.pubsub()
+        await pubsub.subscribe(channel)
+        return _RedisSubscription(pubsub, channel)
+
+
+class TaskEventBusFactory:
+    _backends: Dict[str, Type[TaskEventBus]] = {
+        "memory": InMemoryTaskEventBus,
+        "redis": RedisTaskEventBus,
+    }
+    _instance: Optional[TaskEventBus] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> TaskEventBus:
+        """Process-wide bus for the configured TASK_EVENTS_BACKEND"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    backend = cls._backends.get(settings.TASK_EVENTS_BACKEND.lower())
+                    if not backend:
+                        raise ValueError(
+                            f"Unsupported task event backend: {settings.TASK_EVENTS_BACKEND}. "
+                            f"Supported backends are: {', '.join(cls._backends.keys())}"
+                        )
+                    cls._instance = backend()
+        return cls._instance
+
+    @classmethod
+    def register_backend(cls, name: str, backend_class: Type[TaskEventBus]) -> None:
+        """Register a new task event backend implementation"""
+        cls._backends[name.lower()] = backend_class
+
+
+class TaskProgressReporter:
+    """
+    Publishes the state of one processing task as it moves through the
+    pipeline. Progress counters accumulate, so every event carries the
+    task's complete state. Publishing failures are logged and never
+    interrupt the task itself. Status transitions also feed the
+    ingestion queue/run-time metrics.
+    """
+
+    def __init__(
+        self,
+        task_id: int,
+        kb_id: int,
+        task_type: str = "process",
+        upload_id: Optional[int] = None,
+        document_id: Optional[int] = None,
+        file_name: Optional[str] = None
+    ):
+        self.state: Dict[str, Any] = {
+            "task_id": task_id,
+            "kb_id": kb_id,
+            "task_type": task_type,
+            "upload_id": upload_id,
+            "document_id": document_id,
+            "file_name": file_name,
+            "status": "pending",
+            "stage": None,
+            "error_message": None,
+            "progress": {},
+        }
+        self._started: Optional[float] = None
+
+    def report(
+        self,
+        status: Optional[str] = None,
+        stage: Optional[str] = None,
+        document_id: Optional[int] = None,
+        error_message: Optional[str] = None,
+        **progress: int
+    ) -> None:
+        if status is not None and status != self.state["status"]:
+            self._track_transition(status)
+            self.state["status"] = status
+        if stage is not None:
+            self.state["stage"] = stage
+        if document_id is not None:
+            self.state["document_id"] = document_id
+        if error_message is not None:
+            self.state["error_message"] = error_message
+        self.state["progress"] = {**self.state["progress"], **progress}
+        try:
+            TaskEventBusFactory.get().publish(dict(self.state))
+        except Exception as e:
+            logger.warning(f"Task {self.state['task_id']}: Failed to publish progress: {str(e)}")
+
+
+    def _track_transition(self, status: str) -> None:
+        if status == "processing":
+            self._started = time.perf_counter()
+            ingestion_task_started()
+        elif status in TERMINAL_STATUSES and self._started is not None:
+            ingestion_task_finished(self.state["task_type"], status, time.perf_counter() - self._started)
+            self._started = None
+
+
+def format_sse(event: Dict[str, Any], event_type: str = "task") -> str:
+    return f"event: {event_type}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def stream_task_events(kb_id: int, task_ids: List[int], snapshots: Dict[int, Dict[str, Any]]):
+    """
+    Server-Sent Events for the given tasks: the current snapshot of each,
+    then every update, until all of them have completed or failed.
+    """
+    bus = TaskEventBusFactory.get()
+    subscription = await bus.subscribe(kb_id)
+    try:
+        wanted = set(task_ids)
+        # Snapshots published between the caller's lookup and subscribing are only in the bus
+        states = {**snapshots, **bus.latest(task_ids)}
+        for event in states.values():
+            yield format_sse(event)
+
+        def done() -> bool:
+            return all(states.get(task_id, {}).get("status") in TERMINAL_STATUSES for task_id in wanted)
+
+        while not done():
+            event = await subscription.get(timeout=settings.TASK_EVENTS_HEARTBEAT_SECONDS)
+            if event is None:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+            if event["task_id"] not in wanted:
+                continue
+            states[event["task_id"]] = event
+            yield format_sse(event)
+        yield format_sse({"task_ids": task_ids}, event_type="done")
+    finally:
+        await subscription.close()
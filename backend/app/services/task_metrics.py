@@ -0,0 +1,133 @@
+import math
+import os
+import resource
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+# (upper bound in bytes, label); the last bucket is open-ended
+SIZE_BUCKETS = [
+    (100 * 1024, "<100KB"),
+    (1024 * 1024, "100KB-1MB"),
+    (10 * 1024 * 1024, "1MB-10MB"),
+    (None, ">=10MB"),
+]
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    # Loaded lazily: tiktoken (installed with langchain-openai) may fetch its BPE file on first use
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+
+def count_tokens(texts: List[str]) -> int:
+    """Token count of the embedded texts; about four characters per token without tiktoken"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return sum(len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=()))
+    return sum(len(text) for text in texts) // 4
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def size_bucket(size: Optional[int]) -> str:
+    if size is None:
+        return "unknown"
+    for upper, label in SIZE_BUCKETS:
+        if upper is None or size < upper:
+            return label
+
+
+class TaskMetrics:
+    """
+    Structured timings and counters for one processing task, stored in
+    ProcessingTask.metrics:
+
+        {"file_type": "pdf", "file_size": 123, "size_bucket": "100KB-1MB",
+         "stages": {"download": {"seconds": 0.2, "bytes": 123}, ...},
+         "total_seconds": 4.1, "peak_rss_bytes": ...}
+
+    Peak RSS is the worker process's high-water mark at the end of the
+    task, so it is an upper bound when tasks run concurrently.
+    """
+
+    def __init__(self, file_name: Optional[str] = None, file_size: Optional[int] = None):
+        self._started = time.perf_counter()
+        self.data: Dict[str, Any] = {
+            "file_type": os.path.splitext(file_name)[1].lower().lstrip(".") if file_name else None,
+            "file_size": file_size,
+            "size_bucket": size_bucket(file_size),
+            "stages": {},
+        }
+
+    @contextmanager
+    def stage(self, name: str, **values: Any):
+        """Time the block as stage `name`; values and later record() calls are stored with it"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, seconds=round(time.perf_counter() - started, 4), **values)
+
+    def record(self, stage: str, **values: Any) -> None:
+        self.data["stages"].setdefault(stage, {}).update(values)
+
+    def set_file(self, file_name: str, file_size: Optional[int]) -> None:
+        self.data["file_type"] = os.path.splitext(file_name)[1].lower().lstrip(".")
+        self.data["file_size"] = file_size
+        self.data["size_bucket"] = size_bucket(file_size)
+
+    def finish(self) -> Dict[str, Any]:
+        self.data["total_seconds"] = round(time.perf_counter() - self._started, 4)
+        self.data["peak_rss_bytes"] = peak_rss_bytes()
+        return self.data
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(percentile / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def aggregate_stage_timings(metrics_list: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """p50/p95 seconds per stage, grouped by file type and size bucket"""
+    groups: Dict[tuple, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+    for metrics in metrics_list:
+        if not metrics:
+            continue
+        key = (metrics.get("file_type") or "unknown", metrics.get("size_bucket") or "unknown")
+        for stage, values in metrics.get("stages", {}).items():
+            if "seconds" in values:
+                groups[key][stage].append(values["seconds"])
+        if "total_seconds" in metrics:
+            groups[key]["total"].append(metrics["total_seconds"])
+
+    result = []
+    for (file_type, bucket), stages in sorted(groups.items()):
+        summary = {}
+        for stage, seconds in stages.items():
+            seconds.sort()
+            summary[stage] = {
+                "count": len(seconds),
+                "p50": _percentile(seconds, 50),
+                "p95": _percentile(seconds, 95),
+            }
+        result.append({"file_type": file_type, "size_bucket": bucket, "stages": summary})
+    return result
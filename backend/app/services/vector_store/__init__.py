@@ -1,11 +1,17 @@
 from .base import BaseVectorStore
 from .chroma import ChromaVectorStore
+from .local import LocalVectorStore
+from .partitioned import PartitionedVectorStore
 from .qdrant import QdrantStore
+from .sharded import ShardedVectorStore
 from .factory import VectorStoreFactory
 
 __all__ = [
     'BaseVectorStore',
     'ChromaVectorStore',
+    'LocalVectorStore',
+    'PartitionedVectorStore',
     'QdrantStore',
+    'ShardedVectorStore',
     'VectorStoreFactory'
 ] 
\ No newline at end of file
@@ -1,10 +1,14 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
 class BaseVectorStore(ABC):
     """Abstract base class for vector store implementations"""
+
+    # Whether search scores are distances (lower is closer) rather than similarities
+    distance_scores: bool = False
     
     @abstractmethod
     def __init__(self, collection_name: str, embedding_function: Embeddings, **kwargs):
@@ -16,11 +20,21 @@ class BaseVectorStore(ABC):
         """Add documents to the vector store"""
         pass
     
+    @abstractmethod
+    def upsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Insert or replace documents under the given IDs (idempotent)"""
+        pass
+    
     @abstractmethod
     def delete(self, ids: List[str]) -> None:
         """Delete documents from the vector store"""
         pass
     
+    @abstractmethod
+    def delete_by_filter(self, kb_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """Delete every document whose metadata matches the given filter; a no-op before the first write"""
+        pass
+    
     @abstractmethod
     def as_retriever(self, **kwargs: Any):
         """Return a retriever interface for the vector store"""
@@ -28,7 +42,7 @@ class BaseVectorStore(ABC):
     
     @abstractmethod
     def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
-        """Search for similar documents"""
+        """Search for similar documents; a `filter` kwarg (see filters.py) restricts them by metadata"""
         pass
     
     @abstractmethod
@@ -36,7 +50,68 @@ class BaseVectorStore(ABC):
         """Search for similar documents with score"""
         pass
 
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search with an already embedded query, with score"""
+        raise NotImplementedError(f"{type(self).__name__} cannot search by vector")
+
+    async def aupsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert without blocking the event loop; backends with an async client override this"""
+        await asyncio.to_thread(self.upsert, ids, documents)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search without blocking the event loop; backends with an async client override this"""
+        return await asyncio.to_thread(self.similarity_search, query, k, **kwargs)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search with score without blocking the event loop; backends with an async client override this"""
+        return await asyncio.to_thread(self.similarity_search_with_score, query, k, **kwargs)
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search by vector without blocking the event loop; backends with an async client override this"""
+        return await asyncio.to_thread(self.similarity_search_with_score_by_vector, embedding, k, **kwargs)
+
     @abstractmethod
     def delete_collection(self) -> None:
         """Delete the entire collection"""
-        pass 
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def iter_ids(self, batch_size: int = 1000, kb_id: Optional[int] = None) -> Iterator[List[str]]:
+        """Yield the chunk IDs stored in the collection (of one knowledge base if kb_id is given), one batch at a time"""
+        pass
+
+    def iter_records(
+        self, batch_size: int = 1000, kb_id: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[Document]]]:
+        """Yield (ids, embeddings, documents) batches, so chunks can be copied between collections without re-embedding"""
+        raise NotImplementedError(f"{type(self).__name__} cannot export its embeddings")
+
+    def upsert_records(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Upsert chunks with precomputed embeddings, as yielded by iter_records"""
+        raise NotImplementedError(f"{type(self).__name__} cannot import embeddings")
+
+    def partition_filter(self, kb_id: int, filter: Optional[Any] = None) -> Any:
+        """A search filter in this backend's format matching `filter` and the given knowledge base"""
+        if not filter:
+            return {"kb_id": kb_id}
+        return {"$and": [filter, {"kb_id": kb_id}]}
+
+    def compact(self) -> bool:
+        """Reclaim space held by deleted vectors; a no-op for backends that manage this themselves"""
+        return False
+
+    @staticmethod
+    def _filter_conditions(kb_id: Optional[int] = None, document_id: Optional[int] = None) -> Dict[str, Any]:
+        """Collect the metadata equality conditions for a filtered delete"""
+        conditions = {}
+        if kb_id is not None:
+            conditions["kb_id"] = kb_id
+        if document_id is not None:
+            conditions["document_id"] = document_id
+        if not conditions:
+            raise ValueError("delete_by_filter requires at least one of kb_id or document_id")
+        return conditions
@@ -1,4 +1,5 @@
-from typing import List, Any
+import threading
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_chroma import Chroma
@@ -6,19 +7,105 @@ import chromadb
 from app.core.config import settings
 
 from .base import BaseVectorStore
+from .filters import LOGICAL_OPERATORS, MetadataFilter, normalize_filter
+
+CHROMA_MODES = ("http", "persistent")
+
+_clients: Dict[str, Any] = {}
+_collections: Dict[Tuple[str, str], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def get_chroma_client(mode: Optional[str] = None):
+    """
+    Process-wide Chroma client: an HttpClient to CHROMA_DB_HOST, or an
+    embedded PersistentClient storing collections under CHROMA_PERSIST_PATH
+    """
+    mode = (mode or settings.CHROMA_MODE).lower()
+    with _clients_lock:
+        client = _clients.get(mode)
+        if client is None:
+            if mode == "http":
+                client = chromadb.HttpClient(host=settings.CHROMA_DB_HOST, port=settings.CHROMA_DB_PORT)
+            elif mode == "persistent":
+                client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_PATH)
+            else:
+                raise ValueError(
+                    f"Unsupported Chroma mode: {mode}. Supported modes are: {', '.join(CHROMA_MODES)}"
+                )
+            _clients[mode] = client
+        return client
+
+
+def _where(filter: Optional[MetadataFilter]) -> Optional[Dict[str, Any]]:
+    """
+    A metadata filter (see filters.py) as a Chroma `where` clause, which
+    takes one field or operator per dict; a `where` clause is returned as is
+    """
+    filter = normalize_filter(filter)
+    if not filter:
+        return None
+    clauses = []
+    for key, value in filter.items():
+        if key in LOGICAL_OPERATORS:
+            parts = [_where(item) for item in value]
+            if key == "$or" and None in parts:
+                # A branch matching everything makes the whole $or match everything
+                continue
+            parts = [part for part in parts if part]
+            if parts:
+                clauses.append(parts[0] if len(parts) == 1 else {key: parts})
+        elif isinstance(value, dict):
+            clauses.extend({key: {operator: operand}} for operator, operand in value.items())
+        else:
+            clauses.append({key: value})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class _SharedCollections:
+    """
+    Client wrapper handed to langchain_chroma that serves collection handles
+    from a process-wide cache, so opening a store costs no round trip
+    """
+
+    def __init__(self, client, mode: str):
+        self._client = client
+        self._mode = mode
+
+    def get_or_create_collection(self, name: str, **kwargs: Any):
+        key = (self._mode, name)
+        collection = _collections.get(key)
+        if collection is None:
+            collection = self._client.get_or_create_collection(name=name, **kwargs)
+            with _clients_lock:
+                _collections[key] = collection
+        return collection
+
+    def delete_collection(self, name: str) -> None:
+        with _clients_lock:
+            _collections.pop((self._mode, name), None)
+        self._client.delete_collection(name)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
 
 class ChromaVectorStore(BaseVectorStore):
-    """Chroma vector store implementation"""
+    """
+    Chroma vector store implementation, against a Chroma server
+    (CHROMA_MODE=http) or embedded in the process (CHROMA_MODE=persistent)
+    """
+
+    # langchain_chroma scores are distances
+    distance_scores = True
     
     def __init__(self, collection_name: str, embedding_function: Embeddings, **kwargs):
         """Initialize Chroma vector store"""
-        chroma_client = chromadb.HttpClient(
-            host=settings.CHROMA_DB_HOST,
-            port=settings.CHROMA_DB_PORT,
-        )
-        
+        mode = (kwargs.get("mode") or settings.CHROMA_MODE).lower()
         self._store = Chroma(
-            client=chroma_client,
+            client=_SharedCollections(get_chroma_client(mode), mode),
             collection_name=collection_name,
             embedding_function=embedding_function,
         )
@@ -26,22 +113,109 @@ class ChromaVectorStore(BaseVectorStore):
         """Add documents to Chroma"""
         self._store.add_documents(documents)
     
+    def upsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert documents into Chroma under deterministic IDs"""
+        if not documents:
+            return
+        # langchain_chroma writes through collection.upsert when ids are given
+        self._store.add_documents(documents, ids=ids)
+    
     def delete(self, ids: List[str]) -> None:
-        """Delete documents from Chroma"""
+        """Delete documents from Chroma by chunk ID, including ones stored under a random ID"""
+        if not ids:
+            return
         self._store.delete(ids)
+        self._store._collection.delete(where={"chunk_id": {"$in": ids}})
+    
+    def delete_by_filter(self, kb_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """Delete matching documents with a server-side `where` filter"""
+        conditions = self._filter_conditions(kb_id=kb_id, document_id=document_id)
+        self._store._collection.delete(where=_where(conditions))
     
+    @staticmethod
+    def _scoped(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Search kwargs with the metadata filter translated into a `where` clause"""
+        if kwargs.get("filter") is None:
+            return kwargs
+        return {**kwargs, "filter": _where(kwargs["filter"])}
+
     def as_retriever(self, **kwargs: Any):
         """Return a retriever interface"""
+        if kwargs.get("search_kwargs"):
+            kwargs["search_kwargs"] = self._scoped(kwargs["search_kwargs"])
         return self._store.as_retriever(**kwargs)
     
     def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
         """Search for similar documents in Chroma"""
-        return self._store.similarity_search(query, k=k, **kwargs)
+        return self._store.similarity_search(query, k=k, **self._scoped(kwargs))
     
     def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
         """Search for similar documents in Chroma with score"""
-        return self._store.similarity_search_with_score(query, k=k, **kwargs)
+        return self._store.similarity_search_with_score(query, k=k, **self._scoped(kwargs))
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search Chroma with an already embedded query, with distance"""
+        return self._store.similarity_search_by_vector_with_relevance_scores(embedding, k=k, **self._scoped(kwargs))
 
     def delete_collection(self) -> None:
         """Delete the entire collection"""
-        self._store._client.delete_collection(self._store._collection.name) 
\ No newline at end of file
+        self._store._client.delete_collection(self._store._collection.name)
+
+    @staticmethod
+    def _chunk_ids(result: Dict[str, Any]) -> List[str]:
+        """
+        Chunk IDs of a page: chunks ingested before IDs were deterministic are
+        stored under random IDs, with their chunk ID kept in the metadata
+        """
+        return [
+            (metadata or {}).get("chunk_id") or id
+            for id, metadata in zip(result["ids"], result["metadatas"])
+        ]
+
+    def iter_ids(self, batch_size: int = 1000, kb_id: Optional[int] = None) -> Iterator[List[str]]:
+        """Page through the collection's chunk IDs without fetching embeddings or documents"""
+        for result in self._pages(["metadatas"], batch_size, kb_id):
+            yield self._chunk_ids(result)
+
+    def iter_records(
+        self, batch_size: int = 1000, kb_id: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[Document]]]:
+        """Page through the stored chunks with their embeddings"""
+        for result in self._pages(["embeddings", "documents", "metadatas"], batch_size, kb_id):
+            ids = self._chunk_ids(result)
+            documents = [
+                Document(page_content=text or "", metadata=metadata or {}, id=id)
+                for id, text, metadata in zip(ids, result["documents"], result["metadatas"])
+            ]
+            # Embeddings come back as numpy rows
+            embeddings = [[float(value) for value in embedding] for embedding in result["embeddings"]]
+            yield ids, embeddings, documents
+
+    def upsert_records(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Upsert chunks with precomputed embeddings"""
+        if not documents:
+            return
+        self._store._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+        )
+
+    def partition_filter(self, kb_id: int, filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """`filter` and the knowledge base as one `where` clause"""
+        if not filter:
+            return {"kb_id": kb_id}
+        return {"$and": [filter, {"kb_id": kb_id}]}
+
+    def _pages(self, include: List[str], batch_size: int, kb_id: Optional[int]) -> Iterator[Dict[str, Any]]:
+        where = {"kb_id": kb_id} if kb_id is not None else None
+        offset = 0
+        while True:
+            result = self._store._collection.get(where=where, include=include, limit=batch_size, offset=offset)
+            if not result["ids"]:
+                return
+            yield result
+            offset += len(result["ids"])
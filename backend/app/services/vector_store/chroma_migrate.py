@@ -0,0 +1,93 @@
+"""
+Copy Chroma collections between the HTTP server and the embedded
+PersistentClient, with their stored embeddings, so nothing is re-embedded:
+
+    python -m app.services.vector_store.chroma_migrate --to persistent
+    python -m app.services.vector_store.chroma_migrate --to http --collections kb_1,kb_2 --delete-source
+
+The source is the other mode. Copies are upserts, so an interrupted run can
+simply be repeated; a collection's source is only deleted once the target
+holds the same number of records. Switch CHROMA_MODE after the copy.
+"""
+import argparse
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from .chroma import CHROMA_MODES, _SharedCollections, get_chroma_client
+
+logger = logging.getLogger(__name__)
+
+
+def _collection_names(client) -> List[str]:
+    # chromadb returns names in some releases and collection objects in others
+    return sorted(getattr(collection, "name", collection) for collection in client.list_collections())
+
+
+def copy_collection(source_client, target_client, name: str, batch_size: int = 500) -> Dict[str, Any]:
+    """Upsert every record of one collection into the target client; returns the record counts"""
+    source = source_client.get_collection(name=name, embedding_function=None)
+    target = target_client.get_or_create_collection(
+        name=name, metadata=source.metadata or None, embedding_function=None
+    )
+    offset = 0
+    while True:
+        batch = source.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        ids = batch["ids"]
+        if not ids:
+            break
+        target.upsert(
+            ids=ids,
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+        )
+        offset += len(ids)
+    return {"collection": name, "source_count": source.count(), "target_count": target.count()}
+
+
+def migrate(
+    target_mode: str,
+    collections: Optional[List[str]] = None,
+    batch_size: int = 500,
+    delete_source: bool = False,
+) -> List[Dict[str, Any]]:
+    source_mode = next(mode for mode in CHROMA_MODES if mode != target_mode)
+    # Through the shared handle cache, so deleting a source also drops its cached handle
+    source_client = _SharedCollections(get_chroma_client(source_mode), source_mode)
+    target_client = _SharedCollections(get_chroma_client(target_mode), target_mode)
+    results = []
+    for name in collections or _collection_names(source_client):
+        result = copy_collection(source_client, target_client, name, batch_size)
+        result["source_deleted"] = False
+        if result["source_count"] != result["target_count"]:
+            logger.warning(
+                f"{name}: {result['source_count']} records in {source_mode}, "
+                f"{result['target_count']} in {target_mode}; keeping the source"
+            )
+        elif delete_source:
+            source_client.delete_collection(name)
+            result["source_deleted"] = True
+        logger.info(f"{name}: copied {result['target_count']} records from {source_mode} to {target_mode}")
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy Chroma collections between the HTTP and embedded modes")
+    parser.add_argument("--to", dest="target", required=True, choices=CHROMA_MODES, help="Mode to copy into")
+    parser.add_argument("--collections", help="Comma-separated collection names (default: all)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--delete-source", action="store_true", help="Delete each source collection once copied")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    collections = [name.strip() for name in args.collections.split(",")] if args.collections else None
+    results = migrate(args.target, collections, args.batch_size, args.delete_source)
+    mismatched = [result["collection"] for result in results if result["source_count"] != result["target_count"]]
+    if mismatched:
+        sys.exit(f"Counts differ for: {', '.join(mismatched)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
-from typing import Dict, Type, Any
+from typing import Dict, Type, Any, Optional
 from langchain_core.embeddings import Embeddings
 
+from app.core.config import settings
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+
 from .base import BaseVectorStore
 from .chroma import ChromaVectorStore
+from .local import LocalVectorStore
+from .partitioned import TENANCIES, PartitionedVectorStore, shared_collection_name
 from .qdrant import QdrantStore
+from .generations import KnowledgeBaseLayout, get_kb_layout
+from .sharded import ShardedVectorStore, shard_collection_name
 
 class VectorStoreFactory:
     """Factory for creating vector store instances"""
@@ -48,6 +55,73 @@ class VectorStoreFactory:
             **kwargs
         )
     
+    @classmethod
+    def create_for_kb(
+        cls,
+        store_type: str,
+        kb_id: int,
+        embedding_function: Embeddings,
+        tenancy: Optional[str] = None,
+        shards: Optional[int] = None,
+        generation: Optional[int] = None,
+        layout: Optional[KnowledgeBaseLayout] = None,
+        **kwargs: Any
+    ) -> BaseVectorStore:
+        """Create the vector store of one knowledge base
+        
+        With VECTOR_TENANCY=collection every knowledge base has its own
+        kb_{id} collection. With shared, knowledge bases are spread over
+        VECTOR_SHARED_PARTITIONS collections and partitioned by their
+        indexed kb_id metadata, so there is no per-knowledge-base index.
+        A very large knowledge base of its own can instead be sharded over
+        several collections (KnowledgeBase.vector_shards), searched together.
+        A rebuilt knowledge base's collections carry its vector generation,
+        and are searched with the embedding model recorded for it.
+        
+        Args:
+            store_type: Type of vector store ('chroma', 'qdrant', etc.)
+            kb_id: ID of the knowledge base
+            embedding_function: Embedding function to use
+            tenancy: 'collection' or 'shared'; defaults to VECTOR_TENANCY
+            shards: Collections of a 'collection' tenant; defaults to the knowledge base's vector_shards
+            generation: Vector generation of a 'collection' tenant; defaults to the searched one.
+                Replaces embedding_function if the generation records its own embedding model
+            layout: The knowledge base's layout if the caller already loaded it; defaults to the cached one
+            **kwargs: Additional arguments for specific vector store implementations
+            
+        Returns:
+            A vector store that only sees the knowledge base's documents
+            
+        Raises:
+            ValueError: If store_type or tenancy is not supported
+        """
+        tenancy = (tenancy or settings.VECTOR_TENANCY).lower()
+        if tenancy == "collection":
+            layout = layout or get_kb_layout(kb_id)
+            generation = layout.generation if generation is None else generation
+            config = layout.config_of(generation)
+            if config:
+                embedding_function = EmbeddingsFactory.create(config)
+            shards = shards or layout.shards
+            if shards == 1:
+                return cls.create(store_type, shard_collection_name(kb_id, 0, generation), embedding_function, **kwargs)
+            return ShardedVectorStore(
+                [
+                    cls.create(store_type, shard_collection_name(kb_id, shard, generation), embedding_function, **kwargs)
+                    for shard in range(shards)
+                ],
+                embedding_function,
+            )
+        if generation:
+            raise ValueError("Vector generations are only kept under VECTOR_TENANCY=collection")
+        if tenancy == "shared":
+            store = cls.create(store_type, shared_collection_name(kb_id), embedding_function, shared=True, **kwargs)
+            return PartitionedVectorStore(store, kb_id)
+        raise ValueError(
+            f"Unsupported vector tenancy: {tenancy}. "
+            f"Supported tenancies are: {', '.join(TENANCIES)}"
+        )
+    
     @classmethod
     def register_store(cls, name: str, store_class: Type[BaseVectorStore]) -> None:
         """Register a new vector store implementation
@@ -56,4 +130,8 @@ class VectorStoreFactory:
             name: Name of the vector store type
             store_class: Vector store class implementation
         """
-        cls._stores[name.lower()] = store_class 
\ No newline at end of file
+        cls._stores[name.lower()] = store_class 
+
+
+# In-process backend on memory-mapped files, no vector database server needed
+VectorStoreFactory.register_store('local', LocalVectorStore)
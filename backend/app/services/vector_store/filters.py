@@ -0,0 +1,121 @@
+"""
+Metadata filter DSL accepted by every vector store's similarity_search*
+and as_retriever(search_kwargs={"filter": ...}), and by the retrieval
+endpoints. It is JSON, in the style of Chroma's `where`:
+
+    {"document_id": 12}                                   equality
+    {"document_id": {"$in": [12, 13]}, "file_type": "pdf"}  fields are ANDed
+    {"created_at": {"$gte": "2024-01-01", "$lt": "2024-07-01T12:00:00"}}
+    {"$or": [{"file_type": "pdf"}, {"file_type": "md"}]}
+
+Operators are $eq, $ne, $in, $nin, $gt, $gte, $lt and $lte; "$and" and
+"$or" take lists of filters. Range bounds given as ISO-8601 strings are
+converted to epoch seconds, the format of the created_at metadata.
+Backends translate the filter into their native query filter, so it is
+applied inside the index rather than to over-fetched results.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+MetadataFilter = Dict[str, Any]
+
+COMPARISON_OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte")
+LIST_OPERATORS = ("$in", "$nin")
+LOGICAL_OPERATORS = ("$and", "$or")
+RANGE_OPERATORS = ("$gt", "$gte", "$lt", "$lte")
+
+_SCALARS = (str, int, float, bool)
+
+
+def _epoch_seconds(value: str) -> int:
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Range bound {value!r} is neither a number nor an ISO-8601 date")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def _normalize_condition(field: str, condition: Any) -> Any:
+    if not isinstance(condition, dict):
+        if not isinstance(condition, _SCALARS):
+            raise ValueError(f"Filter value of {field!r} must be a string, number or boolean")
+        return condition
+    if not condition:
+        raise ValueError(f"Filter on {field!r} has no operator")
+    normalized = {}
+    for operator, value in condition.items():
+        if operator in LIST_OPERATORS:
+            if not isinstance(value, list) or not value or not all(isinstance(item, _SCALARS) for item in value):
+                raise ValueError(f"{operator} on {field!r} takes a non-empty list of values")
+        elif operator in COMPARISON_OPERATORS:
+            if operator in RANGE_OPERATORS and isinstance(value, str):
+                value = _epoch_seconds(value)
+            elif not isinstance(value, _SCALARS):
+                raise ValueError(f"{operator} on {field!r} takes a string, number or boolean")
+            if operator in RANGE_OPERATORS and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"{operator} on {field!r} takes a number or an ISO-8601 date")
+        else:
+            raise ValueError(f"Unsupported filter operator {operator!r} on {field!r}")
+        normalized[operator] = value
+    return normalized
+
+
+def normalize_filter(filter: Optional[MetadataFilter]) -> Optional[MetadataFilter]:
+    """
+    Validate a filter and convert its date bounds; raises ValueError on a
+    malformed filter. Normalizing a normalized filter returns it unchanged.
+    """
+    if not filter:
+        return None
+    if not isinstance(filter, dict):
+        raise ValueError("A metadata filter must be a JSON object")
+    normalized = {}
+    for key, value in filter.items():
+        if key in LOGICAL_OPERATORS:
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"{key} takes a non-empty list of filters")
+            normalized[key] = [normalize_filter(item) or {} for item in value]
+        elif key.startswith("$"):
+            raise ValueError(f"Unsupported filter operator {key!r}")
+        else:
+            normalized[key] = _normalize_condition(key, value)
+    return normalized
+
+
+def _compare(operator: str, actual: Any, expected: Any) -> bool:
+    if operator == "$eq":
+        return actual == expected
+    if operator == "$ne":
+        return actual != expected
+    if operator == "$in":
+        return actual in expected
+    if operator == "$nin":
+        return actual not in expected
+    if actual is None or isinstance(actual, bool) or not isinstance(actual, (int, float)):
+        return False
+    if operator == "$gt":
+        return actual > expected
+    if operator == "$gte":
+        return actual >= expected
+    if operator == "$lt":
+        return actual < expected
+    return actual <= expected
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[MetadataFilter]) -> bool:
+    """Whether one chunk's metadata matches a normalized filter"""
+    for key, value in (filter or {}).items():
+        if key == "$and":
+            if not all(matches_filter(metadata, item) for item in value):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, item) for item in value):
+                return False
+        elif isinstance(value, dict):
+            if not all(_compare(operator, metadata.get(key), expected) for operator, expected in value.items()):
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.knowledge import KnowledgeBase
+
+
+class KnowledgeBaseLayout(NamedTuple):
+    """Where a knowledge base's vectors live, as recorded on its row"""
+    shards: int = 1
+    generation: int = 0
+    config: Optional[Dict[str, Any]] = None
+    rebuild_generation: Optional[int] = None
+    rebuild_config: Optional[Dict[str, Any]] = None
+
+    def config_of(self, generation: int) -> Optional[Dict[str, Any]]:
+        """Embedding model and chunking a generation is written with; None for the settings"""
+        if generation == self.rebuild_generation:
+            return self.rebuild_config
+        if generation == self.generation:
+            return self.config
+        return None
+
+    def live_generations(self) -> List[int]:
+        """The searched generation, then the one being rebuilt if any; both receive every write"""
+        if self.rebuild_generation is None:
+            return [self.generation]
+        return [self.generation, self.rebuild_generation]
+
+
+# kb_id -> KnowledgeBaseLayout, so opening a store for retrieval needs no database round trip
+kb_layout_cache = TTLCache(
+    ttl_seconds=settings.KB_LAYOUT_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
+
+def get_kb_layout(kb_id: int, fresh: bool = False) -> KnowledgeBaseLayout:
+    """
+    The knowledge base's layout, cached for KB_LAYOUT_CACHE_TTL_SECONDS;
+    writers pass fresh=True to read the row, so they never miss a generation
+    another process just started
+    """
+    if not fresh:
+        layout = kb_layout_cache.get(kb_id)
+        if layout is not None:
+            return layout
+    layout = _load_kb_layout(kb_id)
+    kb_layout_cache.set(kb_id, layout)
+    return layout
+
+
+def invalidate_kb_layout(kb_id: int) -> None:
+    """Call after a knowledge base's shards or generations change"""
+    kb_layout_cache.invalidate(kb_id)
+
+
+def _load_kb_layout(kb_id: int) -> KnowledgeBaseLayout:
+    db = SessionLocal()
+    try:
+        row = db.query(
+            KnowledgeBase.vector_shards,
+            KnowledgeBase.vector_generation,
+            KnowledgeBase.vector_config,
+            KnowledgeBase.rebuild_generation,
+            KnowledgeBase.rebuild_config,
+        ).filter(KnowledgeBase.id == kb_id).first()
+    finally:
+        db.close()
+    if row is None:
+        return KnowledgeBaseLayout()
+    return KnowledgeBaseLayout(
+        shards=row.vector_shards or 1,
+        generation=row.vector_generation or 0,
+        config=row.vector_config,
+        rebuild_generation=row.rebuild_generation,
+        rebuild_config=row.rebuild_config,
+    )
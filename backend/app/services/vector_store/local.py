@@ -0,0 +1,1029 @@
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from app.core.config import settings
+
+from .base import BaseVectorStore
+from .filters import RANGE_OPERATORS, MetadataFilter, normalize_filter
+from .local_index import INDEX_PARAMS, HnswIndex
+from .local_quantization import Quantizer, get_quantizer
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+# Rows scored per matrix product, bounded by bytes so float16 and wide vectors stay cache friendly
+SEARCH_BLOCK_BYTES = 64 * 1024 * 1024
+# Compaction only pays off once a meaningful number of rows is dead
+COMPACT_MIN_DEAD_ROWS = 1000
+# A filter matching fewer than this share of rows scores only the matching rows
+FILTER_GATHER_RATIO = 0.1
+
+
+class _FileLock:
+    """Exclusive lock on a collection directory, held across processes while writing"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+class _Snapshot:
+    """
+    Immutable view of a collection. A search ranks and reads rows from one
+    snapshot, so concurrent writes and compactions cannot shift its row
+    numbers; the open texts file keeps a compacted generation readable.
+    """
+
+    __slots__ = (
+        "generation", "vectors", "codes", "quantizer", "alive", "ids", "metadatas", "offsets", "lengths",
+        "_texts", "_columns", "_numbers",
+    )
+
+    def __init__(self, generation, vectors, codes, quantizer, alive, ids, metadatas, offsets, lengths, texts_path):
+        self.generation = generation
+        self.vectors = vectors
+        self.codes = codes
+        self.quantizer = quantizer
+        self.alive = alive
+        self.ids = ids
+        self.metadatas = metadatas
+        self.offsets = offsets
+        self.lengths = lengths
+        self._texts = open(texts_path, "rb") if vectors is not None else None
+        self._columns: Dict[str, np.ndarray] = {}
+        self._numbers: Dict[str, np.ndarray] = {}
+
+    def __del__(self):
+        if self._texts is not None:
+            self._texts.close()
+
+    def column(self, key: str) -> np.ndarray:
+        """Metadata values of one key for every row, built once per snapshot"""
+        values = self._columns.get(key)
+        if values is None:
+            values = np.empty(len(self.alive), dtype=object)
+            values[:] = [metadata.get(key) for metadata in self.metadatas[:len(self.alive)]]
+            self._columns[key] = values
+        return values
+
+    def numbers(self, key: str) -> np.ndarray:
+        """Numeric metadata values of one key as floats, NaN where missing or not a number"""
+        values = self._numbers.get(key)
+        if values is None:
+            values = np.array([
+                float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+                for value in self.column(key)
+            ], dtype=np.float64)
+            self._numbers[key] = values
+        return values
+
+    def mask(self, filter: Optional[MetadataFilter]) -> np.ndarray:
+        """Live rows matching a normalized metadata filter (see filters.py)"""
+        mask = self.alive.copy()
+        for key, value in (filter or {}).items():
+            if key == "$and":
+                for item in value:
+                    mask &= self.mask(item)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self.mask(item) for item in value])
+            elif not isinstance(value, dict):
+                mask &= self.column(key) == value
+            else:
+                for operator, expected in value.items():
+                    mask &= self._compare(key, operator, expected)
+        return mask
+
+    def _compare(self, key: str, operator: str, expected: Any) -> np.ndarray:
+        if operator in RANGE_OPERATORS:
+            with np.errstate(invalid="ignore"):
+                numbers = self.numbers(key)
+                if operator == "$gt":
+                    return numbers > expected
+                if operator == "$gte":
+                    return numbers >= expected
+                if operator == "$lt":
+                    return numbers < expected
+                return numbers <= expected
+        column = self.column(key)
+        if operator == "$eq":
+            return column == expected
+        if operator == "$ne":
+            return column != expected
+        members = set(expected)
+        found = np.fromiter((value in members for value in column), dtype=bool, count=len(column))
+        return found if operator == "$in" else ~found
+
+    def documents(self, rows: List[int]) -> List[Document]:
+        if not rows:
+            # An empty collection has no texts file open
+            return []
+        fd = self._texts.fileno()
+        return [
+            Document(
+                page_content=os.pread(fd, int(self.lengths[row]), int(self.offsets[row])).decode("utf-8"),
+                metadata=dict(self.metadatas[row]),
+                id=self.ids[row],
+            )
+            for row in rows
+        ]
+
+    def vectors_of(self, rows: List[int]) -> np.ndarray:
+        return np.asarray(self.vectors[rows], dtype=np.float32)
+
+
+class LocalCollection:
+    """
+    One collection on local disk, shared by every store instance of the
+    process:
+
+        {LOCAL_VECTOR_STORE_PATH}/{collection}/meta.json    dimension, dtype, generation
+        {collection}/g{generation}/vectors                  row-major matrix, one row per chunk
+        {collection}/g{generation}/codes                    quantized copy of the vectors, if enabled
+        {collection}/g{generation}/records.jsonl            id, metadata and text location per row
+        {collection}/g{generation}/texts.bin                chunk texts
+        {collection}/g{generation}/tombstones               int64 numbers of deleted rows
+        {collection}/g{generation}/index.json, index-*.hnsw  HNSW graph over the rows, see HnswIndex
+
+    Every file is append-only. An upsert appends a row that supersedes any
+    earlier row with the same id, a delete appends tombstones; compaction rewrites the live rows into the next
+    generation directory and switches meta.json atomically, so readers in
+    other processes never see a half-written state. Vectors are L2
+    normalized on write and searched by cosine similarity.
+
+    Once a collection reaches LOCAL_VECTOR_INDEX_MIN_ROWS rows, a background
+    thread builds (or loads) an HNSW graph and keeps it up to date with new
+    rows; searches scan the rows it does not cover yet and fall back to the
+    exact scan while there is no graph or a metadata filter is given. Graph
+    parameters are per collection, in the "index" section of meta.json.
+
+    With VECTOR_QUANTIZATION set, every row also gets a compact code (see
+    Quantizer). Scans rank the codes, which stay small enough to remain in
+    memory, and rescore the best VECTOR_QUANTIZATION_OVERSAMPLING * k rows
+    with the full vectors read from disk. Existing collections switch to a
+    changed setting when they are next compacted.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._file_lock = _FileLock(os.path.join(path, ".lock"))
+        self.dimension: Optional[int] = None
+        self.dtype = DTYPES.get(settings.LOCAL_VECTOR_STORE_DTYPE.lower(), np.float32)
+        self.quantization = settings.VECTOR_QUANTIZATION.lower()
+        self._quantizer: Optional[Quantizer] = None
+        self.generation = 0
+        self._sizes: Tuple[int, int, int] = (0, 0, 0)
+        self._rows = 0
+        self._ids: List[str] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._metadatas: List[Dict[str, Any]] = []
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._snapshot: Optional[_Snapshot] = None
+        self._index: Optional[HnswIndex] = None
+        # Bumped whenever the loaded rows are discarded, so a graph built for them is never installed
+        self._index_epoch = 0
+        self._index_overrides: Dict[str, int] = {}
+        self._index_worker_lock = threading.Lock()
+        self._index_worker_running = False
+        self._index_pending = False
+        self._index_rebuild = False
+        self._index_failed_generation: Optional[int] = None
+
+    # Files
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        return os.path.join(self.path, f"g{self.generation if generation is None else generation}", name)
+
+    def _read_meta(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, generation: int, index_params: Optional[Dict[str, int]] = None) -> None:
+        meta = {
+            "dimension": self.dimension,
+            "dtype": np.dtype(self.dtype).name,
+            "quantization": self.quantization,
+            "generation": generation,
+        }
+        index_params = self._index_overrides if index_params is None else index_params
+        if index_params:
+            meta["index"] = index_params
+        temp_path = self._meta_path() + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._meta_path())
+
+    def _file_sizes(self) -> Tuple[int, int, int]:
+        sizes = []
+        for name in ("vectors", "records.jsonl", "tombstones"):
+            try:
+                sizes.append(os.path.getsize(self._file(name)))
+            except FileNotFoundError:
+                sizes.append(0)
+        return tuple(sizes)
+
+    # Loading
+
+    def _reset(self) -> None:
+        self._sizes = (0, 0, 0)
+        self._rows = 0
+        self._ids = []
+        self._id_to_row = {}
+        self._metadatas = []
+        self._offsets = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors = None
+        self._codes = None
+        self._snapshot = None
+        self._index = None
+        self._index_epoch += 1
+
+    def refresh(self) -> None:
+        """Pick up rows, deletes and compactions written since the last call, by any process"""
+        with self._lock:
+            meta = self._read_meta()
+            if meta is None:
+                if self._rows:
+                    self._reset()
+                return
+            if meta["generation"] != self.generation or self.dimension is None:
+                self.dimension = meta["dimension"]
+                self.dtype = DTYPES[meta["dtype"]]
+                self.quantization = meta.get("quantization", "none")
+                self._quantizer = get_quantizer(self.quantization, self.dimension) if self.dimension else None
+                self.generation = meta["generation"]
+                self._reset()
+            self._apply_index_overrides(meta.get("index") or {})
+            sizes = self._file_sizes()
+            dead: List[int] = []
+            if sizes != self._sizes:
+                try:
+                    dead = self._load_increment(sizes)
+                except FileNotFoundError:
+                    # Another process compacted between reading meta.json and the files
+                    self.generation = -1
+                    self.refresh()
+                    return
+            self._sync_index(dead)
+
+    def _load_increment(self, sizes: Tuple[int, int, int]) -> List[int]:
+        """Load what the files gained; returns the rows that died, for the index"""
+        vector_bytes, record_bytes, tombstone_bytes = sizes
+        row_bytes = self.dimension * np.dtype(self.dtype).itemsize
+        dead: List[int] = []
+
+        # Records are written after vectors, so complete record lines decide how many rows exist
+        if record_bytes > self._sizes[1]:
+            with open(self._file("records.jsonl"), "rb") as f:
+                f.seek(self._sizes[1])
+                data = f.read(record_bytes - self._sizes[1])
+            lines = data[:data.rfind(b"\n") + 1].splitlines()
+            rows = min(len(lines), vector_bytes // row_bytes - self._rows)
+            record_bytes = self._sizes[1] + sum(len(line) + 1 for line in lines[:rows])
+            self._alive = np.concatenate([self._alive, np.ones(rows, dtype=bool)])
+            offsets, lengths = [], []
+            for line in lines[:rows]:
+                record = json.loads(line)
+                row = len(self._ids)
+                # A later row with the same id replaces the earlier one
+                previous = self._id_to_row.get(record["id"])
+                if previous is not None:
+                    self._alive[previous] = False
+                    dead.append(previous)
+                self._id_to_row[record["id"]] = row
+                self._ids.append(record["id"])
+                self._metadatas.append(record["metadata"])
+                offsets.append(record["offset"])
+                lengths.append(record["length"])
+            self._offsets = np.concatenate([self._offsets, np.asarray(offsets, dtype=np.int64)])
+            self._lengths = np.concatenate([self._lengths, np.asarray(lengths, dtype=np.int64)])
+            self._rows += rows
+        else:
+            record_bytes = self._sizes[1]
+
+        if tombstone_bytes > self._sizes[2]:
+            with open(self._file("tombstones"), "rb") as f:
+                f.seek(self._sizes[2])
+                data = f.read((tombstone_bytes - self._sizes[2]) // 8 * 8)
+            rows = np.frombuffer(data, dtype=np.int64)
+            if len(rows) and rows.max() >= self._rows:
+                # Deletes of rows whose records were not visible yet; pick them up next time
+                tombstone_bytes = self._sizes[2]
+            else:
+                tombstone_bytes = self._sizes[2] + len(data)
+                self._alive[rows] = False
+                dead.extend(rows.tolist())
+                for row in rows:
+                    if self._id_to_row.get(self._ids[row]) == row:
+                        del self._id_to_row[self._ids[row]]
+        else:
+            tombstone_bytes = self._sizes[2]
+
+        self._vectors = (
+            np.memmap(self._file("vectors"), dtype=self.dtype, mode="r", shape=(self._rows, self.dimension))
+            if self._rows else None
+        )
+        self._codes = (
+            np.memmap(self._file("codes"), dtype=self._quantizer.dtype, mode="r", shape=(self._rows,))
+            if self._rows and self._quantizer is not None else None
+        )
+        self._sizes = (self._rows * row_bytes, record_bytes, tombstone_bytes)
+        self._snapshot = None
+        return dead
+
+    def snapshot(self) -> _Snapshot:
+        with self._lock:
+            self.refresh()
+            if self._snapshot is None:
+                # Lists only ever grow, so sharing them is safe; alive is copied because deletes flip it
+                self._snapshot = _Snapshot(
+                    self.generation,
+                    self._vectors,
+                    self._codes,
+                    self._quantizer,
+                    self._alive.copy(),
+                    self._ids,
+                    self._metadatas,
+                    self._offsets,
+                    self._lengths,
+                    self._file("texts.bin"),
+                )
+            return self._snapshot
+
+    # Writing
+
+    def _repair(self) -> None:
+        """Drop a partially written tail left by a crashed writer"""
+        row_bytes = self.dimension * np.dtype(self.dtype).itemsize
+        vector_bytes, record_bytes, _ = self._file_sizes()
+        if vector_bytes > self._rows * row_bytes:
+            os.truncate(self._file("vectors"), self._rows * row_bytes)
+        if self._quantizer is not None and os.path.exists(self._file("codes")):
+            code_bytes = self._rows * self._quantizer.dtype.itemsize
+            if os.path.getsize(self._file("codes")) > code_bytes:
+                os.truncate(self._file("codes"), code_bytes)
+        if record_bytes > self._sizes[1]:
+            os.truncate(self._file("records.jsonl"), self._sizes[1])
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, texts: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, self._file_lock:
+            self.refresh()
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self.quantization = settings.VECTOR_QUANTIZATION.lower()
+                self._quantizer = get_quantizer(self.quantization, self.dimension)
+                os.makedirs(os.path.join(self.path, f"g{self.generation}"), exist_ok=True)
+                self._write_meta(self.generation)
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self.dimension}"
+                )
+            self._repair()
+
+            # Later occurrences of an id in the same batch win; rows they replace die on load
+            latest = {id: index for index, id in enumerate(ids)}
+            order = sorted(latest.values())
+
+            with open(self._file("texts.bin"), "ab") as f:
+                offset = f.tell()
+                records = []
+                for index in order:
+                    data = texts[index].encode("utf-8")
+                    f.write(data)
+                    records.append({
+                        "id": ids[index],
+                        "metadata": metadatas[index] or {},
+                        "offset": offset,
+                        "length": len(data),
+                    })
+                    offset += len(data)
+            # Codes are written before vectors, so every row that exists has one
+            if self._quantizer is not None:
+                with open(self._file("codes"), "ab") as f:
+                    f.write(self._quantizer.encode(vectors[order]).tobytes())
+            with open(self._file("vectors"), "ab") as f:
+                f.write(np.ascontiguousarray(vectors[order], dtype=self.dtype).tobytes())
+            with open(self._file("records.jsonl"), "ab") as f:
+                f.write(b"".join(json.dumps(record, default=str).encode() + b"\n" for record in records))
+            self.refresh()
+        self.maybe_compact()
+
+    def _append_tombstones(self, rows: List[int]) -> None:
+        with open(self._file("tombstones"), "ab") as f:
+            f.write(np.asarray(rows, dtype=np.int64).tobytes())
+
+    def delete_rows(self, rows: List[int]) -> int:
+        if not rows:
+            return 0
+        with self._lock, self._file_lock:
+            self.refresh()
+            rows = [row for row in rows if row < self._rows and self._alive[row]]
+            if rows:
+                self._append_tombstones(rows)
+                self.refresh()
+        self.maybe_compact()
+        return len(rows)
+
+    def delete_ids(self, ids: List[str]) -> int:
+        with self._lock:
+            self.refresh()
+            rows = [self._id_to_row[id] for id in ids if id in self._id_to_row]
+        return self.delete_rows(rows)
+
+    def delete_where(self, conditions: Dict[str, Any]) -> int:
+        snapshot = self.snapshot()
+        return self.delete_rows(np.flatnonzero(snapshot.mask(conditions)).tolist())
+
+    def maybe_compact(self) -> bool:
+        with self._lock:
+            dead = self._rows - int(self._alive.sum())
+            if dead < COMPACT_MIN_DEAD_ROWS or dead < self._rows * settings.LOCAL_VECTOR_STORE_COMPACT_RATIO:
+                return False
+        return self.compact()
+
+    def compact(self) -> bool:
+        """
+        Rewrite the live rows into a new generation, quantized per the current
+        VECTOR_QUANTIZATION; returns False when there was nothing to change
+        """
+        with self._lock, self._file_lock:
+            self.refresh()
+            live = np.flatnonzero(self._alive)
+            quantization = settings.VECTOR_QUANTIZATION.lower()
+            if self.dimension is None or (len(live) == self._rows and quantization == self.quantization):
+                return False
+            quantizer = get_quantizer(quantization, self.dimension)
+            old_generation = self.generation
+            new_generation = old_generation + 1
+            directory = os.path.join(self.path, f"g{new_generation}")
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+
+            block_rows = max(1, SEARCH_BLOCK_BYTES // (self.dimension * np.dtype(self.dtype).itemsize))
+            with open(self._file("vectors", new_generation), "wb") as vectors_file, \
+                    open(self._file("texts.bin", new_generation), "wb") as texts_file, \
+                    open(self._file("records.jsonl", new_generation), "wb") as records_file, \
+                    open(self._file("texts.bin"), "rb") as old_texts:
+                for start in range(0, len(live), block_rows):
+                    rows = live[start:start + block_rows]
+                    vectors_file.write(np.ascontiguousarray(self._vectors[rows]).tobytes())
+                    for row in rows:
+                        old_texts.seek(int(self._offsets[row]))
+                        data = old_texts.read(int(self._lengths[row]))
+                        record = {
+                            "id": self._ids[row],
+                            "metadata": self._metadatas[row],
+                            "offset": texts_file.tell(),
+                            "length": len(data),
+                        }
+                        texts_file.write(data)
+                        records_file.write(json.dumps(record, default=str).encode() + b"\n")
+            if quantizer is not None:
+                with open(self._file("codes", new_generation), "wb") as codes_file:
+                    for start in range(0, len(live), block_rows):
+                        rows = live[start:start + block_rows]
+                        codes_file.write(quantizer.encode(np.asarray(self._vectors[rows], dtype=np.float32)).tobytes())
+            open(self._file("tombstones", new_generation), "wb").close()
+
+            self.quantization = quantization
+            self._write_meta(new_generation)
+            self.refresh()
+            # Open memory maps keep the old files readable until their snapshots are gone
+            shutil.rmtree(os.path.join(self.path, f"g{old_generation}"), ignore_errors=True)
+            logger.info(f"Compacted {self.path}: {len(live)} live rows kept in generation {new_generation}")
+            return True
+
+    # Index
+
+    def _index_params(self) -> Dict[str, int]:
+        params = {
+            "m": settings.LOCAL_VECTOR_INDEX_M,
+            "ef_construction": settings.LOCAL_VECTOR_INDEX_EF_CONSTRUCTION,
+            "ef_search": settings.LOCAL_VECTOR_INDEX_EF_SEARCH,
+        }
+        params.update(self._index_overrides)
+        return params
+
+    def _apply_index_overrides(self, overrides: Dict[str, int]) -> None:
+        if overrides == self._index_overrides:
+            return
+        before = self._index_params()
+        self._index_overrides = overrides
+        after = self._index_params()
+        if self._index is None:
+            return
+        if (before["m"], before["ef_construction"]) != (after["m"], after["ef_construction"]):
+            # The current graph keeps serving until its replacement is built
+            self.rebuild_index()
+        elif before["ef_search"] != after["ef_search"]:
+            self._index.set_ef(after["ef_search"])
+
+    def configure_index(self, **params: int) -> None:
+        """
+        Persist HNSW parameters for this collection (m, ef_construction,
+        ef_search), overriding the LOCAL_VECTOR_INDEX_* settings. ef_search
+        applies to the next query; the others rebuild the graph in the background.
+        """
+        unknown = set(params) - set(INDEX_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown index parameters: {', '.join(sorted(unknown))}")
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, self._file_lock:
+            self.refresh()
+            overrides = dict(self._index_overrides)
+            overrides.update({key: int(value) for key, value in params.items() if value is not None})
+            self._write_meta(self.generation, overrides)
+            self.refresh()
+
+    def rebuild_index(self) -> None:
+        """Build a fresh graph in the background; searches use the current one until it is swapped in"""
+        self._index_rebuild = True
+        self._wake_index_worker()
+
+    def _sync_index(self, dead: List[int]) -> None:
+        """Called under the lock after every load: mark deletes now, leave inserts to the worker"""
+        if settings.LOCAL_VECTOR_INDEX != "hnsw" or self._rows < settings.LOCAL_VECTOR_INDEX_MIN_ROWS:
+            return
+        if self._index is None:
+            if self._index_failed_generation != self.generation:
+                self._wake_index_worker()
+            return
+        self._index.mark_deleted(dead)
+        if self._index.rows < self._rows:
+            self._wake_index_worker()
+
+    def _wake_index_worker(self) -> None:
+        with self._index_worker_lock:
+            self._index_pending = True
+            if self._index_worker_running:
+                return
+            self._index_worker_running = True
+        threading.Thread(
+            target=self._index_worker, name=f"local-index-{os.path.basename(self.path)}", daemon=True
+        ).start()
+
+    def _index_worker(self) -> None:
+        while True:
+            with self._index_worker_lock:
+                if not self._index_pending:
+                    self._index_worker_running = False
+                    return
+                self._index_pending = False
+            try:
+                self._maintain_index()
+            except Exception:
+                # Searches keep using the exact scan for this generation
+                self._index_failed_generation = self.generation
+                logger.exception(f"Failed to maintain the vector index of {self.path}")
+
+    def _maintain_index(self) -> None:
+        """Load, build or extend the graph of the current generation outside the collection lock"""
+        with self._lock:
+            snapshot = self.snapshot()
+            generation, epoch, index, params = self.generation, self._index_epoch, self._index, self._index_params()
+            rebuild, self._index_rebuild = self._index_rebuild, False
+            dimension = self.dimension
+        if snapshot.vectors is None or len(snapshot.alive) < settings.LOCAL_VECTOR_INDEX_MIN_ROWS:
+            return
+        directory = os.path.join(self.path, f"g{generation}")
+
+        if index is None or rebuild:
+            index = None if rebuild else HnswIndex.load(directory, dimension, params)
+            if index is None:
+                started = time.perf_counter()
+                index = HnswIndex.build(dimension, params, snapshot.vectors, snapshot.alive)
+                logger.info(
+                    f"Built the vector index of {self.path}: {index.rows} rows in "
+                    f"{time.perf_counter() - started:.1f}s"
+                )
+            else:
+                index.mark_deleted(np.flatnonzero(~snapshot.alive[:index.rows]).tolist())
+        start = index.rows
+        if start < len(snapshot.alive):
+            index.add(snapshot.vectors, start, len(snapshot.alive))
+
+        with self._lock:
+            current = self._index_params()
+            if self._index_epoch != epoch or (
+                (current["m"], current["ef_construction"]) != (params["m"], params["ef_construction"])
+            ):
+                return
+            # Deletes that happened while rows were added outside the lock
+            stop = index.rows
+            missed = np.flatnonzero(snapshot.alive[:start] & ~self._alive[:start]).tolist()
+            missed.extend((np.flatnonzero(~self._alive[start:stop]) + start).tolist())
+            index.mark_deleted(missed)
+            index.set_ef(current["ef_search"])
+            self._index = index
+            behind = index.rows < self._rows
+        if behind:
+            self._wake_index_worker()
+        if index.needs_save():
+            try:
+                index.save(directory)
+            except (FileNotFoundError, RuntimeError):
+                # The generation was compacted away meanwhile
+                pass
+
+    # Reading
+
+    def search(
+        self,
+        snapshot: _Snapshot,
+        vector: List[float],
+        k: int,
+        filter: Optional[MetadataFilter] = None,
+    ) -> List[Tuple[int, float]]:
+        """(row, cosine similarity) of the k best live rows of the snapshot matching the metadata filter"""
+        filter = normalize_filter(filter)
+        if snapshot.vectors is None or k <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if not filter:
+            # Read the index before the generation, so an index of a newer generation is never paired with this snapshot
+            index = self._index
+            if index is not None and snapshot.generation == self.generation:
+                hits = self._search_index(index, snapshot, query, k)
+                if hits is not None:
+                    return hits
+            return self._scan(snapshot, query, snapshot.alive, 0, len(snapshot.alive), k)
+
+        mask = snapshot.mask(filter)
+        rows = np.flatnonzero(mask)
+        if len(rows) > len(mask) * FILTER_GATHER_RATIO:
+            return self._scan(snapshot, query, mask, 0, len(mask), k)
+        # Selective filter: score only the matching rows
+        block_rows = max(1, SEARCH_BLOCK_BYTES // (snapshot.vectors.shape[1] * snapshot.vectors.dtype.itemsize))
+        scores = np.concatenate([
+            np.asarray(snapshot.vectors[rows[start:start + block_rows]], dtype=np.float32) @ query
+            for start in range(0, len(rows), block_rows)
+        ]) if len(rows) else np.zeros(0, dtype=np.float32)
+        return self._top_k(rows, scores, k)
+
+    def _search_index(
+        self, index: HnswIndex, snapshot: _Snapshot, query: np.ndarray, k: int
+    ) -> Optional[List[Tuple[int, float]]]:
+        """Graph search over the rows the index covers plus an exact scan of the rest; None to scan everything"""
+        covered = min(index.rows, len(snapshot.alive))
+        fetch = k
+        while True:
+            found = index.search(query, fetch)
+            if found is None:
+                return None
+            # Rows newer than the snapshot, or deleted in it but not yet in the graph
+            hits = [(row, score) for row, score in found if row < covered and snapshot.alive[row]]
+            if len(hits) >= k:
+                break
+            fetch *= 2
+            if fetch > k * 16:
+                return None
+        hits = hits[:k]
+        if covered < len(snapshot.alive):
+            hits.extend(self._scan(snapshot, query, snapshot.alive, covered, len(snapshot.alive), k))
+            hits.sort(key=lambda hit: -hit[1])
+            hits = hits[:k]
+        return hits
+
+    @staticmethod
+    def _scan(
+        snapshot: _Snapshot, query: np.ndarray, mask: np.ndarray, first: int, last: int, k: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Top k of rows [first, last) where mask is set: exact over the full
+        vectors, or shortlisted by the quantized codes and then rescored
+        """
+        if snapshot.codes is None:
+            block_rows = max(1, SEARCH_BLOCK_BYTES // (snapshot.vectors.shape[1] * snapshot.vectors.dtype.itemsize))
+            return LocalCollection._scan_blocks(
+                lambda start, stop: np.asarray(snapshot.vectors[start:stop], dtype=np.float32) @ query,
+                block_rows, mask, first, last, k,
+            )
+        quantizer = snapshot.quantizer
+        prepared = quantizer.prepare(query)
+        shortlist = LocalCollection._scan_blocks(
+            lambda start, stop: quantizer.score(snapshot.codes[start:stop], prepared),
+            max(1, SEARCH_BLOCK_BYTES // quantizer.work_bytes_per_row),
+            mask, first, last, max(k, math.ceil(k * settings.VECTOR_QUANTIZATION_OVERSAMPLING)),
+        )
+        if not shortlist:
+            return []
+        rows = np.sort(np.asarray([row for row, _ in shortlist], dtype=np.int64))
+        return LocalCollection._top_k(rows, snapshot.vectors_of(rows) @ query, k)
+
+    @staticmethod
+    def _scan_blocks(
+        score_rows: Callable[[int, int], np.ndarray], block_rows: int, mask: np.ndarray, first: int, last: int, k: int
+    ) -> List[Tuple[int, float]]:
+        candidate_rows, candidate_scores = [], []
+        for start in range(first, last, block_rows):
+            stop = min(start + block_rows, last)
+            block_mask = mask[start:stop]
+            if not block_mask.any():
+                continue
+            scores = score_rows(start, stop)
+            scores[~block_mask] = -np.inf
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            candidate_rows.append(top + start)
+            candidate_scores.append(scores[top])
+        if not candidate_rows:
+            return []
+        return LocalCollection._top_k(np.concatenate(candidate_rows), np.concatenate(candidate_scores), k)
+
+    @staticmethod
+    def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        keep = np.isfinite(scores)
+        rows, scores = rows[keep], scores[keep]
+        if len(scores) > k:
+            top = np.argpartition(scores, -k)[-k:]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(rows[i]), float(scores[i])) for i in order]
+
+    def live_rows(
+        self, batch_size: int, conditions: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Tuple[_Snapshot, np.ndarray]]:
+        """Batches of the live rows matching the metadata conditions, with the snapshot they belong to"""
+        snapshot = self.snapshot()
+        live = np.flatnonzero(snapshot.mask(conditions))
+        for start in range(0, len(live), batch_size):
+            yield snapshot, live[start:start + batch_size]
+
+    def live_ids(self, batch_size: int, conditions: Optional[Dict[str, Any]] = None) -> Iterator[List[str]]:
+        for snapshot, rows in self.live_rows(batch_size, conditions):
+            yield [snapshot.ids[row] for row in rows]
+
+    def count(self) -> int:
+        return int(self.snapshot().alive.sum())
+
+    def drop(self) -> None:
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with self._file_lock:
+                for name in os.listdir(self.path):
+                    if name != ".lock":
+                        target = os.path.join(self.path, name)
+                        if os.path.isdir(target):
+                            shutil.rmtree(target, ignore_errors=True)
+                        else:
+                            os.remove(target)
+            self.dimension = None
+            self.generation = 0
+            self._index_overrides = {}
+            self._reset()
+
+
+_collections: Dict[str, LocalCollection] = {}
+_collections_lock = threading.Lock()
+
+
+def get_local_collection(collection_name: str) -> LocalCollection:
+    """Process-wide handle of a collection, so every store instance shares one loaded copy"""
+    path = os.path.join(settings.LOCAL_VECTOR_STORE_PATH, collection_name)
+    with _collections_lock:
+        collection = _collections.get(path)
+        if collection is None:
+            collection = _collections[path] = LocalCollection(path)
+    return collection
+
+
+class _LocalLangchainStore(VectorStore):
+    """LangChain view of a LocalCollection, so retrievers, MMR and relevance scores work unchanged"""
+
+    def __init__(self, collection: LocalCollection, embedding: Embeddings):
+        self.collection = collection
+        self.embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        if not ids:
+            ids = [metadata.get("chunk_id") or str(uuid.uuid4()) for metadata in metadatas]
+        self.collection.upsert(ids, np.asarray(self.embedding.embed_documents(texts)), texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if ids:
+            self.collection.delete_ids(ids)
+        return True
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        snapshot = self.collection.snapshot()
+        hits = self.collection.search(snapshot, embedding, k, filter)
+        documents = snapshot.documents([row for row, _ in hits])
+        return list(zip(documents, (score for _, score in hits)))
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        snapshot = self.collection.snapshot()
+        hits = self.collection.search(snapshot, embedding, fetch_k, filter)
+        if not hits:
+            return []
+        rows = [row for row, _ in hits]
+        selected = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32), snapshot.vectors_of(rows), k=k, lambda_mult=lambda_mult
+        )
+        return snapshot.documents([rows[index] for index in selected])
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding.embed_query(query), k, fetch_k, lambda_mult, filter
+        )
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Cosine similarity in [-1, 1] mapped onto [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Create local collections through VectorStoreFactory")
+
+
+class LocalVectorStore(BaseVectorStore):
+    """
+    In-process vector store on memory-mapped files under
+    LOCAL_VECTOR_STORE_PATH, searched exactly or, for large collections,
+    through an HNSW index. No server and no network hop; opening a
+    collection maps its files.
+    """
+
+    def __init__(self, collection_name: str, embedding_function: Embeddings, **kwargs):
+        """Initialize local vector store"""
+        self._collection = get_local_collection(collection_name)
+        self._store = _LocalLangchainStore(self._collection, embedding_function)
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """Add documents to the local store"""
+        self._store.add_documents(documents)
+
+    def upsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert documents under deterministic IDs; replaced rows are tombstoned"""
+        if not documents:
+            return
+        self._store.add_texts(
+            [doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids,
+        )
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete documents from the local store"""
+        self._collection.delete_ids(ids)
+
+    def delete_by_filter(self, kb_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """Tombstone every row whose metadata matches"""
+        self._collection.delete_where(self._filter_conditions(kb_id=kb_id, document_id=document_id))
+
+    def as_retriever(self, **kwargs: Any):
+        """Return a retriever interface"""
+        return self._store.as_retriever(**kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search for similar documents"""
+        return self._store.similarity_search(query, k=k, **kwargs)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search for similar documents with cosine similarity scores"""
+        return self._store.similarity_search_with_score(query, k=k, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search with an already embedded query, with cosine similarity scores"""
+        return self._store.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)
+
+    def delete_collection(self) -> None:
+        """Delete the collection's files"""
+        self._collection.drop()
+        with _collections_lock:
+            _collections.pop(self._collection.path, None)
+        shutil.rmtree(self._collection.path, ignore_errors=True)
+
+    def iter_ids(self, batch_size: int = 1000, kb_id: Optional[int] = None) -> Iterator[List[str]]:
+        """Yield the live chunk IDs in insertion order"""
+        yield from self._collection.live_ids(batch_size, {"kb_id": kb_id} if kb_id is not None else None)
+
+    def iter_records(
+        self, batch_size: int = 1000, kb_id: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[Document]]]:
+        """Yield the live chunks with their stored vectors, in insertion order"""
+        conditions = {"kb_id": kb_id} if kb_id is not None else None
+        for snapshot, rows in self._collection.live_rows(batch_size, conditions):
+            rows = rows.tolist()
+            yield [snapshot.ids[row] for row in rows], snapshot.vectors_of(rows).tolist(), snapshot.documents(rows)
+
+    def upsert_records(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Upsert chunks with precomputed vectors"""
+        if not documents:
+            return
+        self._collection.upsert(
+            ids,
+            np.asarray(embeddings, dtype=np.float32),
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents],
+        )
+
+    def compact(self) -> bool:
+        """Rewrite the collection without its deleted rows"""
+        return self._collection.compact()
+
+    def configure_index(self, **params: int) -> None:
+        """Tune this collection's HNSW index: m, ef_construction (rebuilds in the background) and ef_search"""
+        self._collection.configure_index(**params)
+
+    def rebuild_index(self) -> None:
+        """Rebuild this collection's HNSW index in the background"""
+        self._collection.rebuild_index()
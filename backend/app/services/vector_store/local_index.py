@@ -0,0 +1,201 @@
+import json
+import os
+import threading
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_PARAMS = ("m", "ef_construction", "ef_search")
+# Capacity is grown in steps so inserts rarely pay for a resize
+GROWTH_FACTOR = 1.5
+# Rows inserted per add_items call, so a long build never holds the graph for long
+ADD_BLOCK_ROWS = 4096
+# Persist again once this share of the indexed rows was added since the last save
+SAVE_GROWTH_RATIO = 0.1
+
+
+def _hnswlib():
+    try:
+        import hnswlib
+    except ImportError:
+        raise ImportError(
+            "The local HNSW index requires hnswlib: pip install chroma-hnswlib"
+        )
+    return hnswlib
+
+
+class _SharedLock:
+    """
+    hnswlib allows queries, inserts, deletes and saves to run concurrently,
+    but not while the graph is resized; that takes the lock exclusively.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+
+    def shared(self):
+        return _Held(self, exclusive=False)
+
+    def exclusive(self):
+        return _Held(self, exclusive=True)
+
+    def _acquire(self, exclusive: bool) -> None:
+        with self._condition:
+            if exclusive:
+                while self._exclusive or self._shared:
+                    self._condition.wait()
+                self._exclusive = True
+            else:
+                while self._exclusive:
+                    self._condition.wait()
+                self._shared += 1
+
+    def _release(self, exclusive: bool) -> None:
+        with self._condition:
+            if exclusive:
+                self._exclusive = False
+            else:
+                self._shared -= 1
+            self._condition.notify_all()
+
+
+class _Held:
+    def __init__(self, lock: _SharedLock, exclusive: bool):
+        self._lock = lock
+        self._exclusive = exclusive
+
+    def __enter__(self):
+        self._lock._acquire(self._exclusive)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._lock._release(self._exclusive)
+
+
+class HnswIndex:
+    """
+    HNSW graph over the rows of one local collection generation; labels are
+    row numbers. Vectors are L2 normalized, so inner product ranks by cosine
+    similarity. Rows are inserted in order and deleted rows are marked, never
+    removed; compaction starts a new generation and with it a fresh graph.
+
+    Saved next to the generation's vectors:
+
+        index-{token}.hnsw    the graph, written by hnswlib
+        index.json            which graph file is current, how many rows it covers and its build parameters
+    """
+
+    def __init__(self, dimension: int, params: Dict[str, int]):
+        self.dimension = dimension
+        self.params = dict(params)
+        # Rows [0, rows) are in the graph
+        self.rows = 0
+        self._saved_rows = 0
+        self._lock = _SharedLock()
+        self._index = _hnswlib().Index(space="ip", dim=dimension)
+
+    @classmethod
+    def build(cls, dimension: int, params: Dict[str, int], vectors: np.ndarray, alive: np.ndarray) -> "HnswIndex":
+        """Index every row of `vectors` and mark the dead ones"""
+        index = cls(dimension, params)
+        index._index.init_index(
+            max_elements=max(ADD_BLOCK_ROWS, int(len(vectors) * GROWTH_FACTOR)),
+            M=params["m"],
+            ef_construction=params["ef_construction"],
+        )
+        index._index.set_ef(params["ef_search"])
+        index.add(vectors, 0, len(vectors))
+        index.mark_deleted(np.flatnonzero(~alive[:len(vectors)]).tolist())
+        return index
+
+    @classmethod
+    def load(cls, directory: str, dimension: int, params: Dict[str, int]) -> Optional["HnswIndex"]:
+        """The saved graph of a generation, or None if there is none or it was built with other parameters"""
+        try:
+            with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        if saved["m"] != params["m"] or saved["ef_construction"] != params["ef_construction"]:
+            return None
+        index = cls(dimension, params)
+        try:
+            index._index.load_index(
+                os.path.join(directory, saved["file"]),
+                max_elements=max(ADD_BLOCK_ROWS, int(saved["rows"] * GROWTH_FACTOR)),
+            )
+        except RuntimeError:
+            # Replaced by a newer save from another process in the meantime
+            return None
+        index._index.set_ef(params["ef_search"])
+        index.rows = index._saved_rows = saved["rows"]
+        return index
+
+    def save(self, directory: str) -> None:
+        """Write the graph under a new name, then point index.json at it, so readers never see a partial file"""
+        name = f"index-{uuid.uuid4().hex}.hnsw"
+        with self._lock.shared():
+            rows = self.rows
+            self._index.save_index(os.path.join(directory, name))
+        temp_path = os.path.join(directory, "index.json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "file": name,
+                "rows": rows,
+                "m": self.params["m"],
+                "ef_construction": self.params["ef_construction"],
+            }, f)
+        os.replace(temp_path, os.path.join(directory, "index.json"))
+        self._saved_rows = rows
+        for other in os.listdir(directory):
+            if other.startswith("index-") and other != name:
+                try:
+                    os.remove(os.path.join(directory, other))
+                except FileNotFoundError:
+                    pass
+
+    def needs_save(self) -> bool:
+        return self.rows - self._saved_rows > max(1, self._saved_rows) * SAVE_GROWTH_RATIO
+
+    def add(self, vectors: np.ndarray, start: int, stop: int) -> None:
+        """Insert rows [start, stop) of `vectors`; only one thread may add or save at a time"""
+        for block_start in range(start, stop, ADD_BLOCK_ROWS):
+            block_stop = min(block_start + ADD_BLOCK_ROWS, stop)
+            if block_stop > self._index.get_max_elements():
+                with self._lock.exclusive():
+                    self._index.resize_index(int(block_stop * GROWTH_FACTOR))
+            data = np.asarray(vectors[block_start:block_stop], dtype=np.float32)
+            with self._lock.shared():
+                self._index.add_items(data, np.arange(block_start, block_stop))
+            self.rows = block_stop
+
+    def mark_deleted(self, rows: List[int]) -> None:
+        with self._lock.shared():
+            for row in rows:
+                if row < self.rows:
+                    try:
+                        self._index.mark_deleted(int(row))
+                    except RuntimeError:
+                        # Already marked
+                        pass
+
+    def set_ef(self, ef_search: int) -> None:
+        self.params["ef_search"] = ef_search
+        self._index.set_ef(ef_search)
+
+    def search(self, query: np.ndarray, k: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        (row, cosine similarity) of about k nearest live rows, or None when
+        the graph cannot return k of them and the caller should scan instead
+        """
+        with self._lock.shared():
+            if k > self._index.get_current_count():
+                return None
+            try:
+                labels, distances = self._index.knn_query(query.reshape(1, -1), k=k)
+            except RuntimeError:
+                # Fewer than k live rows reachable, e.g. after many deletes
+                return None
+        return [(int(label), 1.0 - float(distance)) for label, distance in zip(labels[0], distances[0])]
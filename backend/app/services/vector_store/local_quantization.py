@@ -0,0 +1,67 @@
+from typing import Any, Optional
+
+import numpy as np
+
+QUANTIZATIONS = ("none", "int8", "binary")
+
+if hasattr(np, "bitwise_count"):
+    _popcount = np.bitwise_count
+else:  # numpy < 2.0
+    _POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return _POPCOUNT_TABLE[values]
+
+
+class Quantizer:
+    """
+    Compact codes of L2 normalized vectors, one fixed-size record per row,
+    used to shortlist candidates that are then rescored with the full
+    vectors. Scores only need to rank like cosine similarity.
+
+        int8      per-row scale plus one signed byte per dimension (~4x smaller than float32)
+        binary    one sign bit per dimension, ranked by Hamming distance (32x smaller)
+    """
+
+    def __init__(self, kind: str, dimension: int):
+        self.kind = kind
+        self.dimension = dimension
+        if kind == "int8":
+            self.dtype = np.dtype([("scale", "<f4"), ("code", "i1", (dimension,))])
+            # Codes are widened to float32 for the matrix product
+            self.work_bytes_per_row = dimension * 4
+        elif kind == "binary":
+            self.dtype = np.dtype([("code", "u1", ((dimension + 7) // 8,))])
+            self.work_bytes_per_row = (dimension + 7) // 8 * 2
+        else:
+            raise ValueError(f"Unsupported quantization: {kind}. Supported are: {', '.join(QUANTIZATIONS)}")
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.zeros(len(vectors), dtype=self.dtype)
+        if self.kind == "int8":
+            peaks = np.abs(vectors).max(axis=1)
+            scales = np.where(peaks == 0, 1.0, peaks / 127.0).astype(np.float32)
+            codes["scale"] = scales
+            codes["code"] = np.rint(vectors / scales[:, None]).astype(np.int8)
+        else:
+            codes["code"] = np.packbits(vectors > 0, axis=1)
+        return codes
+
+    def prepare(self, query: np.ndarray) -> Any:
+        if self.kind == "int8":
+            return query
+        return np.packbits(query > 0)
+
+    def score(self, codes: np.ndarray, prepared: Any) -> np.ndarray:
+        if self.kind == "int8":
+            return (codes["code"].astype(np.float32) @ prepared) * codes["scale"]
+        distances = _popcount(np.bitwise_xor(codes["code"], prepared)).sum(axis=1, dtype=np.int32)
+        return -distances.astype(np.float32)
+
+
+def get_quantizer(kind: Optional[str], dimension: int) -> Optional[Quantizer]:
+    """The quantizer for a collection, or None when vectors are kept at full precision only"""
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    return Quantizer(kind, dimension)
@@ -0,0 +1,116 @@
+from typing import Any, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+
+from .base import BaseVectorStore
+
+TENANCIES = ("collection", "shared")
+
+
+def shared_collection_name(kb_id: int, partitions: Optional[int] = None) -> str:
+    """The shared collection a knowledge base lives in under VECTOR_TENANCY=shared"""
+    return f"kb_shared_{kb_id % (partitions or settings.VECTOR_SHARED_PARTITIONS)}"
+
+
+class PartitionedVectorStore(BaseVectorStore):
+    """
+    One knowledge base's partition of a collection shared with others: every
+    write is tagged with its kb_id and every search, listing and delete is
+    filtered on it, through the indexed kb_id metadata of the backend.
+    Deleting the "collection" deletes the partition only.
+    """
+
+    def __init__(self, store: BaseVectorStore, kb_id: int):
+        self._store = store
+        self.kb_id = kb_id
+        self.distance_scores = store.distance_scores
+
+    def _tag(self, documents: List[Document]) -> List[Document]:
+        for doc in documents:
+            doc.metadata["kb_id"] = self.kb_id
+        return documents
+
+    def _scoped(self, kwargs: dict) -> dict:
+        return {**kwargs, "filter": self._store.partition_filter(self.kb_id, kwargs.get("filter"))}
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """Add documents to the partition"""
+        self._store.add_documents(self._tag(documents))
+
+    def upsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert documents into the partition"""
+        self._store.upsert(ids, self._tag(documents))
+
+    async def aupsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert documents into the partition without blocking the event loop"""
+        await self._store.aupsert(ids, self._tag(documents))
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete documents by chunk ID; chunk IDs embed the kb_id, so they never collide across partitions"""
+        self._store.delete(ids)
+
+    def delete_by_filter(self, kb_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """Delete matching documents of this partition"""
+        if kb_id is not None and kb_id != self.kb_id:
+            raise ValueError(f"Store of knowledge base {self.kb_id} cannot delete from knowledge base {kb_id}")
+        self._store.delete_by_filter(kb_id=self.kb_id, document_id=document_id)
+
+    def as_retriever(self, **kwargs: Any):
+        """Return a retriever interface restricted to the partition"""
+        kwargs["search_kwargs"] = self._scoped(kwargs.get("search_kwargs") or {})
+        return self._store.as_retriever(**kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search for similar documents in the partition"""
+        return self._store.similarity_search(query, k=k, **self._scoped(kwargs))
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search for similar documents in the partition with score"""
+        return self._store.similarity_search_with_score(query, k=k, **self._scoped(kwargs))
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search the partition without blocking the event loop"""
+        return await self._store.asimilarity_search(query, k=k, **self._scoped(kwargs))
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search the partition with score without blocking the event loop"""
+        return await self._store.asimilarity_search_with_score(query, k=k, **self._scoped(kwargs))
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search the partition with an already embedded query, with score"""
+        return self._store.similarity_search_with_score_by_vector(embedding, k=k, **self._scoped(kwargs))
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search the partition by vector without blocking the event loop"""
+        return await self._store.asimilarity_search_with_score_by_vector(embedding, k=k, **self._scoped(kwargs))
+
+    def delete_collection(self) -> None:
+        """Delete every document of the partition; the shared collection stays"""
+        self._store.delete_by_filter(kb_id=self.kb_id)
+
+    def iter_ids(self, batch_size: int = 1000, kb_id: Optional[int] = None) -> Iterator[List[str]]:
+        """Yield the chunk IDs of the partition"""
+        yield from self._store.iter_ids(batch_size, kb_id=self.kb_id)
+
+    def iter_records(
+        self, batch_size: int = 1000, kb_id: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[Document]]]:
+        """Yield the partition's chunks with their embeddings"""
+        yield from self._store.iter_records(batch_size, kb_id=self.kb_id)
+
+    def upsert_records(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Upsert chunks with precomputed embeddings into the partition"""
+        self._store.upsert_records(ids, embeddings, self._tag(documents))
+
+    def compact(self) -> bool:
+        """Compact the shared collection"""
+        return self._store.compact()
+
+    def partition_filter(self, kb_id: int, filter: Optional[Any] = None) -> Any:
+        return self._store.partition_filter(kb_id, filter)
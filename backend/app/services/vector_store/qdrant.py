@@ -1,43 +1,736 @@
-from typing import List, Any
+import asyncio
+import logging
+import threading
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Callable, Dict, Iterable, Optional, Iterator, Set, Tuple, Union
+
+import grpc
+import numpy as np
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
-from langchain_community.vectorstores import Qdrant
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models as rest
+from qdrant_client.http.exceptions import UnexpectedResponse
 from app.core.config import settings
 
 from .base import BaseVectorStore
+from .filters import RANGE_OPERATORS, MetadataFilter, normalize_filter
+
+# Payload layout shared with LangChain's Qdrant integration, so existing collections stay readable
+CONTENT_KEY = "page_content"
+METADATA_KEY = "metadata"
+
+# Metadata fields that deletes and searches filter on, indexed when a collection is created;
+# other filtered fields are indexed on their first filtered search
+PAYLOAD_INDEXES: Dict[str, rest.PayloadSchemaType] = {
+    "kb_id": rest.PayloadSchemaType.INTEGER,
+    "document_id": rest.PayloadSchemaType.INTEGER,
+    "chunk_id": rest.PayloadSchemaType.KEYWORD,
+    "file_type": rest.PayloadSchemaType.KEYWORD,
+    "created_at": rest.PayloadSchemaType.INTEGER,
+}
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[QdrantClient] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncQdrantClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+_upsert_executor: Optional[ThreadPoolExecutor] = None
+# (collection, payload key) pairs whose index this process has created or requested
+_indexed: Set[Tuple[str, str]] = set()
+_indexed_lock = threading.Lock()
+
+
+def _client_options() -> Dict[str, Any]:
+    return {
+        "url": settings.QDRANT_URL,
+        "api_key": settings.QDRANT_API_KEY or None,
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+    }
+
+
+def get_qdrant_client() -> QdrantClient:
+    """Process-wide synchronous client; it pools its HTTP connections or gRPC channel"""
+    global _client
+    with _clients_lock:
+        if _client is None:
+            _client = QdrantClient(**_client_options())
+        return _client
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    """Async client of the running event loop, whose connections are bound to that loop"""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = AsyncQdrantClient(**_client_options())
+        return client
+
+
+def _get_upsert_executor() -> ThreadPoolExecutor:
+    global _upsert_executor
+    with _clients_lock:
+        if _upsert_executor is None:
+            _upsert_executor = ThreadPoolExecutor(
+                max_workers=settings.QDRANT_UPSERT_PARALLELISM, thread_name_prefix="qdrant-upsert"
+            )
+        return _upsert_executor
+
+
+def _quantization_config(
+    quantization: Optional[str] = None,
+) -> Optional[Union[rest.ScalarQuantization, rest.BinaryQuantization]]:
+    """Qdrant quantization for VECTOR_QUANTIZATION; the quantized vectors stay in RAM, the originals on disk"""
+    quantization = (quantization or settings.VECTOR_QUANTIZATION).lower()
+    if quantization == "int8":
+        return rest.ScalarQuantization(
+            scalar=rest.ScalarQuantizationConfig(type=rest.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if quantization == "binary":
+        return rest.BinaryQuantization(binary=rest.BinaryQuantizationConfig(always_ram=True))
+    if quantization != "none":
+        raise ValueError(f"Unsupported vector quantization: {quantization}")
+    return None
+
+
+def _point_id(chunk_id: str) -> str:
+    """Map a chunk ID onto a stable Qdrant point ID (UUIDs or integers only)"""
+    try:
+        return str(uuid.UUID(chunk_id))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, chunk_id))
+
+
+def _field_conditions(field: str, condition: Any) -> Tuple[List[Any], List[Any]]:
+    """The must and must_not conditions of one field's filter"""
+    key = f"{METADATA_KEY}.{field}"
+    if not isinstance(condition, dict):
+        return [rest.FieldCondition(key=key, match=rest.MatchValue(value=condition))], []
+    must, must_not = [], []
+    bounds = {operator[1:]: value for operator, value in condition.items() if operator in RANGE_OPERATORS}
+    if bounds:
+        must.append(rest.FieldCondition(key=key, range=rest.Range(**bounds)))
+    if "$eq" in condition:
+        must.append(rest.FieldCondition(key=key, match=rest.MatchValue(value=condition["$eq"])))
+    if "$in" in condition:
+        must.append(rest.FieldCondition(key=key, match=rest.MatchAny(any=condition["$in"])))
+    # Negations as must_not, so chunks without the field match, as they do in Chroma
+    if "$ne" in condition:
+        must_not.append(rest.FieldCondition(key=key, match=rest.MatchValue(value=condition["$ne"])))
+    if "$nin" in condition:
+        must_not.append(rest.FieldCondition(key=key, match=rest.MatchAny(any=condition["$nin"])))
+    return must, must_not
+
+
+def _payload_filter(filter: Optional[Union[MetadataFilter, rest.Filter]]) -> Optional[rest.Filter]:
+    """A metadata filter (see filters.py) as a Qdrant payload filter; Filter objects pass through"""
+    if not filter or isinstance(filter, rest.Filter):
+        return filter or None
+    must, must_not = [], []
+    for key, value in normalize_filter(filter).items():
+        if key == "$and":
+            must.extend(nested for nested in map(_payload_filter, value) if nested)
+        elif key == "$or":
+            should = [nested for nested in map(_payload_filter, value) if nested]
+            if len(should) == len(value):
+                must.append(rest.Filter(should=should))
+        else:
+            field_must, field_must_not = _field_conditions(key, value)
+            must.extend(field_must)
+            must_not.extend(field_must_not)
+    if not must and not must_not:
+        return None
+    return rest.Filter(must=must or None, must_not=must_not or None)
+
+
+def _filtered_fields(filter: Any) -> Dict[str, rest.PayloadSchemaType]:
+    """Payload keys a filter conditions on, with the index type their values call for"""
+    fields: Dict[str, rest.PayloadSchemaType] = {}
+    if isinstance(filter, rest.Filter):
+        for clause in (filter.must, filter.should, filter.must_not):
+            for condition in clause if isinstance(clause, list) else [clause] if clause else []:
+                fields.update(_filtered_fields(condition))
+    elif isinstance(filter, rest.FieldCondition):
+        field = filter.key[len(METADATA_KEY) + 1:] if filter.key.startswith(f"{METADATA_KEY}.") else None
+        if field in PAYLOAD_INDEXES:
+            fields[filter.key] = PAYLOAD_INDEXES[field]
+        elif filter.range is not None:
+            # Range bounds are floats; a float index serves integer values too
+            fields[filter.key] = rest.PayloadSchemaType.FLOAT
+        elif isinstance(filter.match, (rest.MatchValue, rest.MatchAny)):
+            value = filter.match.value if isinstance(filter.match, rest.MatchValue) else filter.match.any[0]
+            if isinstance(value, bool):
+                fields[filter.key] = rest.PayloadSchemaType.BOOL
+            elif isinstance(value, int):
+                fields[filter.key] = rest.PayloadSchemaType.INTEGER
+            elif isinstance(value, str):
+                fields[filter.key] = rest.PayloadSchemaType.KEYWORD
+    return fields
+
+
+def _missing_indexes(collection_name: str, filter: Optional[rest.Filter]) -> Dict[str, rest.PayloadSchemaType]:
+    """Filtered payload keys not indexed yet, claimed so only one search creates each index"""
+    if filter is None:
+        return {}
+    with _indexed_lock:
+        missing = {
+            key: schema for key, schema in _filtered_fields(filter).items()
+            if (collection_name, key) not in _indexed
+        }
+        _indexed.update((collection_name, key) for key in missing)
+    return missing
+
+
+def _index_failed(collection_name: str, key: str, error: Exception) -> None:
+    with _indexed_lock:
+        _indexed.discard((collection_name, key))
+    logger.warning(f"Could not index payload field {key} of {collection_name}: {str(error)}")
+
+
+def _ensure_payload_indexes(collection_name: str, filter: Optional[rest.Filter]) -> None:
+    """
+    Index every filtered field of the collection that is not indexed yet, so
+    filters stay inside the HNSW search instead of scanning payloads. Indexes
+    are built in the background; existing ones are left as they are.
+    """
+    for key, schema in _missing_indexes(collection_name, filter).items():
+        try:
+            get_qdrant_client().create_payload_index(
+                collection_name=collection_name, field_name=key, field_schema=schema, wait=False
+            )
+        except Exception as e:
+            _index_failed(collection_name, key, e)
+
+
+async def _aensure_payload_indexes(collection_name: str, filter: Optional[rest.Filter]) -> None:
+    """_ensure_payload_indexes on the async client"""
+    for key, schema in _missing_indexes(collection_name, filter).items():
+        try:
+            await get_async_qdrant_client().create_payload_index(
+                collection_name=collection_name, field_name=key, field_schema=schema, wait=False
+            )
+        except Exception as e:
+            _index_failed(collection_name, key, e)
+
+
+def _created_elsewhere(error: Exception) -> bool:
+    """Whether a create call lost a race with another writer, which created the same thing"""
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code == 409 or "already exists" in str(error).lower()
+    return isinstance(error, grpc.RpcError) and error.code() == grpc.StatusCode.ALREADY_EXISTS
+
+
+def _search_params(hnsw_ef: Optional[int] = None) -> rest.SearchParams:
+    """
+    Search quantized vectors first, then rescore the oversampled candidates
+    with the originals; ignored by collections without quantization
+    """
+    return rest.SearchParams(
+        hnsw_ef=hnsw_ef or settings.QDRANT_HNSW_EF or None,
+        quantization=rest.QuantizationSearchParams(
+            rescore=True, oversampling=settings.VECTOR_QUANTIZATION_OVERSAMPLING
+        ),
+    )
+
+
+def _to_document(point: Any) -> Document:
+    payload = point.payload or {}
+    return Document(
+        page_content=payload.get(CONTENT_KEY) or "",
+        metadata=payload.get(METADATA_KEY) or {},
+        id=str(point.id),
+    )
+
+
+class _QdrantLangchainStore(VectorStore):
+    """
+    LangChain view of one collection on the native clients, so retrievers,
+    MMR and relevance scores work unchanged and async retrieval never
+    blocks the event loop
+    """
+
+    def __init__(self, collection_name: str, embedding: Embeddings, hnsw_ef: Optional[int] = None):
+        self.collection_name = collection_name
+        self.embedding = embedding
+        self.hnsw_ef = hnsw_ef
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        raise NotImplementedError("Write through QdrantStore.upsert")
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        client = get_qdrant_client()
+        # Collections are created on first write; there is nothing to delete before
+        if ids and client.collection_exists(self.collection_name):
+            client.delete(
+                collection_name=self.collection_name,
+                points_selector=rest.PointIdsList(points=[_point_id(id) for id in ids]),
+            )
+        return True
+
+    def _query(self, embedding: List[float], k: int, filter: Any, with_vectors: bool = False):
+        query_filter = _payload_filter(filter)
+        _ensure_payload_indexes(self.collection_name, query_filter)
+        return get_qdrant_client().query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            query_filter=query_filter,
+            search_params=_search_params(self.hnsw_ef),
+            limit=k,
+            with_payload=True,
+            with_vectors=with_vectors,
+        ).points
+
+    async def _aquery(self, embedding: List[float], k: int, filter: Any, with_vectors: bool = False):
+        query_filter = _payload_filter(filter)
+        await _aensure_payload_indexes(self.collection_name, query_filter)
+        response = await get_async_qdrant_client().query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            query_filter=query_filter,
+            search_params=_search_params(self.hnsw_ef),
+            limit=k,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+        return response.points
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Any = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return [(_to_document(point), point.score) for point in self._query(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Any = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Any = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Any = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Any = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return [(_to_document(point), point.score) for point in await self._aquery(embedding, k, filter)]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, filter: Any = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        embedding = await self.embedding.aembed_query(query)
+        return await self.asimilarity_search_with_score_by_vector(embedding, k, filter)
+
+    async def asimilarity_search(self, query: str, k: int = 4, filter: Any = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k, filter)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Any = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self._select_mmr(embedding, self._query(embedding, fetch_k, filter, with_vectors=True), k, lambda_mult)
+
+    def max_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Any = None, **kwargs: Any
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding.embed_query(query), k, fetch_k, lambda_mult, filter
+        )
+
+    async def amax_marginal_relevance_search(
+        self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Any = None, **kwargs: Any
+    ) -> List[Document]:
+        embedding = await self.embedding.aembed_query(query)
+        points = await self._aquery(embedding, fetch_k, filter, with_vectors=True)
+        return self._select_mmr(embedding, points, k, lambda_mult)
+
+    @staticmethod
+    def _select_mmr(embedding: List[float], points: List[Any], k: int, lambda_mult: float) -> List[Document]:
+        if not points:
+            return []
+        selected = maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            [point.vector for point in points],
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return [_to_document(points[index]) for index in selected]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Cosine similarity in [-1, 1] mapped onto [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Create Qdrant collections through VectorStoreFactory")
+
 
 class QdrantStore(BaseVectorStore):
-    """Qdrant vector store implementation"""
-    
+    """
+    Qdrant vector store on the native clients: synchronous calls share one
+    process-wide client, async ones an AsyncQdrantClient per event loop;
+    both use gRPC when QDRANT_PREFER_GRPC is set.
+
+    Collections are created on first write with the QDRANT_* HNSW and
+    on_disk settings, VECTOR_QUANTIZATION and payload indexes on the
+    filtered metadata fields; configure_collection() tunes one knowledge
+    base's collection afterwards. Collections shared by many knowledge
+    bases (shared=True) build their HNSW links per kb_id instead of one
+    global graph, since every search on them filters by knowledge base.
+    """
+
+    # Collections already created (or found) by this process
+    _prepared: Set[str] = set()
+    _prepared_lock = threading.Lock()
+
     def __init__(self, collection_name: str, embedding_function: Embeddings, **kwargs):
         """Initialize Qdrant vector store"""
-        self._store = Qdrant(
-            collection_name=collection_name,
-            embeddings=embedding_function,
-            url=settings.QDRANT_URL,
-            prefer_grpc=settings.QDRANT_PREFER_GRPC
+        self._collection_name = collection_name
+        self._embeddings = embedding_function
+        self._shared = bool(kwargs.get("shared"))
+        self._store = _QdrantLangchainStore(collection_name, embedding_function, kwargs.get("hnsw_ef"))
+
+    @staticmethod
+    def _point_id(chunk_id: str) -> str:
+        """Map a chunk ID onto a stable Qdrant point ID (UUIDs or integers only)"""
+        return _point_id(chunk_id)
+
+    def _collection_config(self, dimension: int) -> Dict[str, Any]:
+        quantization = _quantization_config()
+        if self._shared:
+            # Per-tenant subgraphs over the kb_id index; small knowledge bases are scanned through the index instead
+            hnsw_config = rest.HnswConfigDiff(
+                m=0, payload_m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT
+            )
+        else:
+            hnsw_config = rest.HnswConfigDiff(m=settings.QDRANT_HNSW_M, ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT)
+        return {
+            "collection_name": self._collection_name,
+            "vectors_config": rest.VectorParams(
+                size=dimension,
+                distance=rest.Distance.COSINE,
+                on_disk=settings.QDRANT_ON_DISK or quantization is not None,
+            ),
+            "hnsw_config": hnsw_config,
+            "quantization_config": quantization,
+            "on_disk_payload": settings.QDRANT_ON_DISK,
+        }
+
+    def _payload_indexes(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "collection_name": self._collection_name,
+                "field_name": f"{METADATA_KEY}.{field}",
+                "field_schema": schema,
+                "wait": True,
+            }
+            for field, schema in PAYLOAD_INDEXES.items()
+        ]
+
+    def _prepare_collection(self, dimension: int) -> None:
+        """Create the collection on first write; existing collections keep their own configuration"""
+        if self._collection_name in self._prepared:
+            return
+        with self._prepared_lock:
+            if self._collection_name in self._prepared:
+                return
+            client = get_qdrant_client()
+            if not client.collection_exists(self._collection_name):
+                # Other processes may create it concurrently; whoever loses the race uses theirs
+                try:
+                    client.create_collection(**self._collection_config(dimension))
+                except Exception as e:
+                    if not _created_elsewhere(e):
+                        raise
+                for index in self._payload_indexes():
+                    try:
+                        client.create_payload_index(**index)
+                    except Exception as e:
+                        if not _created_elsewhere(e):
+                            raise
+            self._prepared.add(self._collection_name)
+
+    async def _aprepare_collection(self, dimension: int) -> None:
+        """_prepare_collection on the async client; aupsert creates the collection before writing concurrently"""
+        if self._collection_name in self._prepared:
+            return
+        client = get_async_qdrant_client()
+
+        async def create(call: Callable[..., Any], **kwargs: Any) -> None:
+            # Concurrent first writes, here or in other processes, all try to create the collection
+            try:
+                await call(**kwargs)
+            except Exception as e:
+                if not _created_elsewhere(e):
+                    raise
+
+        if not await client.collection_exists(self._collection_name):
+            await create(client.create_collection, **self._collection_config(dimension))
+            await asyncio.gather(*(create(client.create_payload_index, **index) for index in self._payload_indexes()))
+        self._prepared.add(self._collection_name)
+
+    def _exists(self) -> bool:
+        """Whether the collection exists, asked of the server until it is found; searches skip missing ones"""
+        if self._collection_name in self._prepared:
+            return True
+        if get_qdrant_client().collection_exists(self._collection_name):
+            self._prepared.add(self._collection_name)
+            return True
+        return False
+
+    async def _aexists(self) -> bool:
+        if self._collection_name in self._prepared:
+            return True
+        if await get_async_qdrant_client().collection_exists(self._collection_name):
+            self._prepared.add(self._collection_name)
+            return True
+        return False
+
+    def _points(self, ids: List[str], documents: List[Document], vectors: List[List[float]]) -> List[rest.PointStruct]:
+        return [
+            rest.PointStruct(
+                id=self._point_id(id),
+                vector=vector,
+                payload={CONTENT_KEY: doc.page_content, METADATA_KEY: doc.metadata},
+            )
+            for id, doc, vector in zip(ids, documents, vectors)
+        ]
+
+    def _upsert_batch(self, ids: List[str], documents: List[Document]) -> None:
+        vectors = self._embeddings.embed_documents([doc.page_content for doc in documents])
+        self._prepare_collection(len(vectors[0]))
+        get_qdrant_client().upsert(
+            collection_name=self._collection_name,
+            points=self._points(ids, documents, vectors),
+            wait=True,
         )
-    
+
+    def _batches(self, ids: List[str], documents: List[Document]) -> List[Tuple[List[str], List[Document]]]:
+        size = settings.QDRANT_UPSERT_BATCH_SIZE
+        return [(ids[start:start + size], documents[start:start + size]) for start in range(0, len(ids), size)]
+
     def add_documents(self, documents: List[Document]) -> None:
         """Add documents to Qdrant"""
-        self._store.add_documents(documents)
-    
+        ids = [doc.metadata.get("chunk_id") or str(uuid.uuid4()) for doc in documents]
+        self.upsert(ids, documents)
+
+    def upsert(self, ids: List[str], documents: List[Document]) -> None:
+        """
+        Upsert documents under deterministic point IDs. Batches of
+        QDRANT_UPSERT_BATCH_SIZE are embedded and written
+        QDRANT_UPSERT_PARALLELISM at a time.
+        """
+        if not documents:
+            return
+        batches = self._batches(ids, documents)
+        if self._collection_name not in self._prepared:
+            # The first batch creates the collection before the others race to write
+            self._upsert_batch(*batches.pop(0))
+        if len(batches) == 1:
+            self._upsert_batch(*batches[0])
+            return
+        executor = _get_upsert_executor()
+        for future in [executor.submit(self._upsert_batch, *batch) for batch in batches]:
+            future.result()
+
+    async def aupsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert on the async client, QDRANT_UPSERT_PARALLELISM batches in flight"""
+        if not documents:
+            return
+        client = get_async_qdrant_client()
+        semaphore = asyncio.Semaphore(settings.QDRANT_UPSERT_PARALLELISM)
+
+        async def upsert_batch(batch_ids: List[str], batch_documents: List[Document]) -> None:
+            async with semaphore:
+                vectors = await self._embeddings.aembed_documents([doc.page_content for doc in batch_documents])
+                await self._aprepare_collection(len(vectors[0]))
+                await client.upsert(
+                    collection_name=self._collection_name,
+                    points=self._points(batch_ids, batch_documents, vectors),
+                    wait=True,
+                )
+
+        batches = self._batches(ids, documents)
+        if self._collection_name not in self._prepared:
+            await upsert_batch(*batches.pop(0))
+        await asyncio.gather(*(upsert_batch(*batch) for batch in batches))
+
     def delete(self, ids: List[str]) -> None:
-        """Delete documents from Qdrant"""
+        """Delete documents from Qdrant by chunk ID, including ones stored under a random point ID"""
+        if not ids or not self._exists():
+            return
         self._store.delete(ids)
-    
+        get_qdrant_client().delete(
+            collection_name=self._collection_name,
+            points_selector=rest.FilterSelector(filter=_payload_filter({"chunk_id": {"$in": ids}})),
+        )
+
+    def delete_by_filter(self, kb_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """Delete matching points with a server-side payload filter"""
+        if not self._exists():
+            return
+        conditions = self._filter_conditions(kb_id=kb_id, document_id=document_id)
+        get_qdrant_client().delete(
+            collection_name=self._collection_name,
+            points_selector=rest.FilterSelector(filter=_payload_filter(conditions)),
+        )
+
     def as_retriever(self, **kwargs: Any):
         """Return a retriever interface"""
         return self._store.as_retriever(**kwargs)
-    
+
     def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
         """Search for similar documents in Qdrant"""
+        if not self._exists():
+            return []
         return self._store.similarity_search(query, k=k, **kwargs)
-    
+
     def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
         """Search for similar documents in Qdrant with score"""
+        if not self._exists():
+            return []
         return self._store.similarity_search_with_score(query, k=k, **kwargs)
 
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search on the async client"""
+        if not await self._aexists():
+            return []
+        return await self._store.asimilarity_search(query, k=k, **kwargs)
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search on the async client, with cosine similarity scores"""
+        if not await self._aexists():
+            return []
+        return await self._store.asimilarity_search_with_score(query, k=k, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search with an already embedded query, with cosine similarity scores"""
+        if not self._exists():
+            return []
+        return self._store.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search by vector on the async client"""
+        if not await self._aexists():
+            return []
+        return await self._store.asimilarity_search_with_score_by_vector(embedding, k=k, **kwargs)
+
     def delete_collection(self) -> None:
         """Delete the entire collection"""
-        self._store._client.delete_collection(self._store._collection_name) 
\ No newline at end of file
+        get_qdrant_client().delete_collection(self._collection_name)
+        self._prepared.discard(self._collection_name)
+        with _indexed_lock:
+            _indexed.difference_update({entry for entry in _indexed if entry[0] == self._collection_name})
+
+    def iter_ids(self, batch_size: int = 1000, kb_id: Optional[int] = None) -> Iterator[List[str]]:
+        """Scroll through the collection, yielding the chunk IDs kept in the payload"""
+        for points in self._scroll(batch_size, kb_id, with_payload=[f"{METADATA_KEY}.chunk_id"], with_vectors=False):
+            ids = [
+                chunk_id for chunk_id in ((point.payload or {}).get(METADATA_KEY, {}).get("chunk_id") for point in points)
+                if chunk_id
+            ]
+            if ids:
+                yield ids
+
+    def iter_records(
+        self, batch_size: int = 1000, kb_id: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[Document]]]:
+        """Scroll through the points with their payloads and vectors"""
+        for points in self._scroll(batch_size, kb_id, with_payload=True, with_vectors=True):
+            documents = [_to_document(point) for point in points]
+            ids = [doc.metadata.get("chunk_id") or doc.id for doc in documents]
+            yield ids, [point.vector for point in points], documents
+
+    def upsert_records(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Upsert points with precomputed vectors"""
+        if not documents:
+            return
+        self._prepare_collection(len(embeddings[0]))
+        get_qdrant_client().upsert(
+            collection_name=self._collection_name,
+            points=self._points(ids, documents, embeddings),
+            wait=True,
+        )
+
+    def partition_filter(self, kb_id: int, filter: Any = None) -> rest.Filter:
+        """`filter` (a metadata filter or a Filter) and the knowledge base as one payload filter"""
+        condition = rest.FieldCondition(key=f"{METADATA_KEY}.kb_id", match=rest.MatchValue(value=kb_id))
+        if not filter:
+            return rest.Filter(must=[condition])
+        return rest.Filter(must=[_payload_filter(filter), condition])
+
+    def _scroll(self, batch_size: int, kb_id: Optional[int], **kwargs: Any) -> Iterator[List[Any]]:
+        client = get_qdrant_client()
+        if not client.collection_exists(self._collection_name):
+            # Knowledge bases that never ingested anything have no collection
+            return
+        offset = None
+        scroll_filter = _payload_filter({"kb_id": kb_id}) if kb_id is not None else None
+        while True:
+            points, offset = client.scroll(
+                collection_name=self._collection_name,
+                scroll_filter=scroll_filter,
+                limit=batch_size,
+                offset=offset,
+                **kwargs,
+            )
+            if points:
+                yield points
+            if offset is None:
+                return
+
+    def configure_collection(
+        self,
+        m: Optional[int] = None,
+        ef_construction: Optional[int] = None,
+        on_disk: Optional[bool] = None,
+        quantization: Optional[str] = None,
+    ) -> None:
+        """
+        Tune this knowledge base's collection: HNSW m and ef_construct, whether
+        vectors live on disk, and quantization (none, int8 or binary). Qdrant
+        applies the changes and re-optimizes the collection in the background.
+        """
+        hnsw_config = None
+        if m is not None or ef_construction is not None:
+            hnsw_config = rest.HnswConfigDiff(m=m, ef_construct=ef_construction)
+        vectors_config = None
+        if on_disk is not None or hnsw_config is not None:
+            # "" is the collection's unnamed vector
+            vectors_config = {"": rest.VectorParamsDiff(on_disk=on_disk, hnsw_config=hnsw_config)}
+        quantization_config = None
+        if quantization is not None:
+            quantization_config = _quantization_config(quantization) or rest.Disabled.DISABLED
+        get_qdrant_client().update_collection(
+            collection_name=self._collection_name,
+            vectors_config=vectors_config,
+            hnsw_config=hnsw_config,
+            quantization_config=quantization_config,
+        )
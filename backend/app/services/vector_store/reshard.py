@@ -0,0 +1,67 @@
+"""
+Spread a large knowledge base's vectors over more collections, moving the
+chunks that route to the new shards with their stored embeddings:
+
+    python -m app.services.vector_store.reshard --kb-id 7 --shards 8
+
+The new shard count is recorded first, so writes route to the new layout
+while chunks are moved; searches cover every shard throughout. Running it
+again with the same count moves anything written to an old shard meanwhile.
+Shards can only be added, only under VECTOR_TENANCY=collection, and not
+while the knowledge base is being rebuilt.
+"""
+import argparse
+import logging
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.knowledge import KnowledgeBase
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+
+from .factory import VectorStoreFactory
+from .generations import invalidate_kb_layout
+from .sharded import ShardedVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def reshard_knowledge_base(kb_id: int, shards: int, batch_size: int = 500) -> Dict[str, Any]:
+    """Record the new shard count of a knowledge base, then rebalance its chunks"""
+    if settings.VECTOR_TENANCY.lower() != "collection":
+        raise ValueError("Knowledge bases are only sharded under VECTOR_TENANCY=collection")
+    db = SessionLocal()
+    try:
+        kb = db.query(KnowledgeBase).filter(KnowledgeBase.id == kb_id, KnowledgeBase.deleted_at.is_(None)).first()
+        if kb is None:
+            raise ValueError(f"Knowledge base {kb_id} not found")
+        if kb.rebuild_generation is not None:
+            raise ValueError(f"Knowledge base {kb_id} is being rebuilt; swap or cancel the rebuild first")
+        previous = kb.vector_shards or 1
+        if shards < previous:
+            raise ValueError(f"Knowledge base {kb_id} has {previous} shards; shards can only be added")
+        kb.vector_shards = shards
+        db.commit()
+        invalidate_kb_layout(kb_id)
+    finally:
+        db.close()
+
+    embeddings = EmbeddingsFactory.create()
+    store = VectorStoreFactory.create_for_kb(settings.VECTOR_STORE_TYPE, kb_id, embeddings, shards=shards)
+    moved = store.rebalance(batch_size) if isinstance(store, ShardedVectorStore) else 0
+    logger.info(f"Knowledge base {kb_id}: {previous} -> {shards} shards, moved {moved} chunks")
+    return {"kb_id": kb_id, "previous_shards": previous, "shards": shards, "moved": moved}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spread a knowledge base's vectors over more collections")
+    parser.add_argument("--kb-id", type=int, required=True)
+    parser.add_argument("--shards", type=int, required=True, help="New number of shards")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    reshard_knowledge_base(args.kb_id, args.shards, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
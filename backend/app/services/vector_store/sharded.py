@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import heapq
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.core.config import settings
+
+from .base import BaseVectorStore
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.VECTOR_SHARD_PARALLELISM, thread_name_prefix="vector-shard"
+            )
+        return _executor
+
+
+def shard_collection_name(kb_id: int, shard: int, generation: int = 0) -> str:
+    """
+    Shard 0 of generation 0 is the knowledge base's original collection, so
+    a single-shard knowledge base that was never rebuilt is unchanged
+    """
+    name = f"kb_{kb_id}" if generation == 0 else f"kb_{kb_id}_g{generation}"
+    return name if shard == 0 else f"{name}_shard_{shard}"
+
+
+def shard_of(chunk_id: str, shards: int) -> int:
+    """
+    Jump consistent hash of the chunk ID: going from n to m shards moves
+    only the (m - n) / m of chunks that belong to the new shards
+    """
+    key = int.from_bytes(hashlib.blake2b(chunk_id.encode(), digest_size=8).digest(), "big")
+    bucket, jump = -1, 0
+    while jump < shards:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+class _ShardedLangchainStore(VectorStore):
+    """LangChain view of a ShardedVectorStore, so retrievers fan out like direct searches"""
+
+    def __init__(self, store: "ShardedVectorStore"):
+        self.store = store
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.store._embeddings
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        raise NotImplementedError("Write through ShardedVectorStore.upsert")
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.store.similarity_search_with_score(query, k=k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.store.similarity_search(query, k=k, **kwargs)
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return await self.store.asimilarity_search_with_score(query, k=k, **kwargs)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return await self.store.asimilarity_search(query, k=k, **kwargs)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Create sharded stores through VectorStoreFactory")
+
+
+class ShardedVectorStore(BaseVectorStore):
+    """
+    One knowledge base spread over several collections of the same backend.
+    Writes are routed by a consistent hash of the chunk ID; a search embeds
+    the query once, runs on every shard concurrently and merges the shards'
+    ranked hits with a heap.
+
+    Reads and deletes always cover every shard, so a chunk written under an
+    older shard count stays visible and deletable until rebalance() moves
+    it; a chunk seen in two shards meanwhile is returned once.
+    """
+
+    def __init__(self, shards: List[BaseVectorStore], embedding_function: Embeddings):
+        self.shards = shards
+        self._embeddings = embedding_function
+        self.distance_scores = shards[0].distance_scores
+        self._store = _ShardedLangchainStore(self)
+
+    def _route(self, ids: List[str], *columns: List[Any]) -> Dict[int, Tuple[List[Any], ...]]:
+        routed: Dict[int, Tuple[List[Any], ...]] = {}
+        for row in zip(ids, *columns):
+            groups = routed.setdefault(shard_of(row[0], len(self.shards)), tuple([] for _ in row))
+            for group, value in zip(groups, row):
+                group.append(value)
+        return routed
+
+    @staticmethod
+    def _concurrently(call: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+        """call(item) for every item on the shard executor; results in item order"""
+        if len(items) <= 1:
+            return [call(item) for item in items]
+        executor = _get_executor()
+        return [future.result() for future in [executor.submit(call, item) for item in items]]
+
+    def _merge(self, results: List[List[Tuple[Document, float]]], k: int) -> List[Tuple[Document, float]]:
+        """k best hits over the shards' ranked lists, each chunk once; hits without an ID are all kept"""
+        merged, seen = [], set()
+        for doc, score in heapq.merge(*results, key=lambda hit: hit[1], reverse=not self.distance_scores):
+            chunk_id = doc.metadata.get("chunk_id") or doc.id
+            if chunk_id is not None:
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+            merged.append((doc, score))
+            if len(merged) == k:
+                break
+        return merged
+
+    def add_documents(self, documents: List[Document]) -> None:
+        """Add documents, routed by chunk ID"""
+        self.upsert([doc.metadata.get("chunk_id") or str(uuid.uuid4()) for doc in documents], documents)
+
+    def upsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert documents into their shards, the shards written concurrently"""
+        routed = self._route(ids, documents)
+        self._concurrently(lambda item: self.shards[item[0]].upsert(*item[1]), list(routed.items()))
+
+    async def aupsert(self, ids: List[str], documents: List[Document]) -> None:
+        """Upsert documents into their shards without blocking the event loop"""
+        routed = self._route(ids, documents)
+        await asyncio.gather(*(self.shards[shard].aupsert(*group) for shard, group in routed.items()))
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete documents from every shard"""
+        self._concurrently(lambda shard: shard.delete(ids), self.shards)
+
+    def delete_by_filter(self, kb_id: Optional[int] = None, document_id: Optional[int] = None) -> None:
+        """Delete matching documents from every shard"""
+        self._concurrently(
+            lambda shard: shard.delete_by_filter(kb_id=kb_id, document_id=document_id), self.shards
+        )
+
+    def as_retriever(self, **kwargs: Any):
+        """Return a retriever interface searching every shard"""
+        return self._store.as_retriever(**kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search every shard for similar documents"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        """Search every shard for similar documents with score"""
+        return self.similarity_search_with_score_by_vector(self._embeddings.embed_query(query), k=k, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search every shard with an already embedded query, with score"""
+        results = self._concurrently(
+            lambda shard: shard.similarity_search_with_score_by_vector(embedding, k=k, **kwargs), self.shards
+        )
+        return self._merge(results, k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        """Search every shard without blocking the event loop"""
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k=k, **kwargs)]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search every shard with score without blocking the event loop"""
+        embedding = await self._embeddings.aembed_query(query)
+        return await self.asimilarity_search_with_score_by_vector(embedding, k=k, **kwargs)
+
+    async def asimilarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Search every shard by vector concurrently on the event loop"""
+        results = await asyncio.gather(*(
+            shard.asimilarity_search_with_score_by_vector(embedding, k=k, **kwargs) for shard in self.shards
+        ))
+        return self._merge(list(results), k)
+
+    def delete_collection(self) -> None:
+        """Delete every shard's collection"""
+        self._concurrently(lambda shard: shard.delete_collection(), self.shards)
+
+    def iter_ids(self, batch_size: int = 1000, kb_id: Optional[int] = None) -> Iterator[List[str]]:
+        """Yield the chunk IDs of every shard in turn"""
+        for shard in self.shards:
+            yield from shard.iter_ids(batch_size, kb_id=kb_id)
+
+    def iter_records(
+        self, batch_size: int = 1000, kb_id: Optional[int] = None
+    ) -> Iterator[Tuple[List[str], List[List[float]], List[Document]]]:
+        """Yield the chunks of every shard in turn, with their embeddings"""
+        for shard in self.shards:
+            yield from shard.iter_records(batch_size, kb_id=kb_id)
+
+    def upsert_records(self, ids: List[str], embeddings: List[List[float]], documents: List[Document]) -> None:
+        """Upsert chunks with precomputed embeddings into their shards"""
+        routed = self._route(ids, embeddings, documents)
+        self._concurrently(lambda item: self.shards[item[0]].upsert_records(*item[1]), list(routed.items()))
+
+    def compact(self) -> bool:
+        """Compact every shard"""
+        return any(self._concurrently(lambda shard: shard.compact(), self.shards))
+
+    def partition_filter(self, kb_id: int, filter: Optional[Any] = None) -> Any:
+        return self.shards[0].partition_filter(kb_id, filter)
+
+    def rebalance(self, batch_size: int = 500) -> int:
+        """
+        Move every chunk that is not in the shard its ID routes to, copying
+        its stored embedding; returns the number moved. Safe to repeat.
+        """
+        moved = 0
+        for index, shard in enumerate(self.shards):
+            misplaced = []
+            for ids, embeddings, documents in shard.iter_records(batch_size):
+                routed = self._route(ids, embeddings, documents)
+                routed.pop(index, None)
+                for target, group in routed.items():
+                    self.shards[target].upsert_records(*group)
+                    misplaced.extend(group[0])
+            # Delete after the scan so offset-based paging is not disturbed
+            for start in range(0, len(misplaced), batch_size):
+                shard.delete(misplaced[start:start + batch_size])
+            moved += len(misplaced)
+        return moved
@@ -0,0 +1,116 @@
+"""
+Move knowledge bases between their own kb_{id} collections and the shared,
+kb_id-partitioned collections of VECTOR_TENANCY=shared, with their stored
+embeddings, so nothing is re-embedded:
+
+    python -m app.services.vector_store.tenancy_migrate --to shared
+    python -m app.services.vector_store.tenancy_migrate --to collection --kb-ids 1,2 --delete-source
+
+The source is the other tenancy. Copies are upserts, so the run can be
+repeated: copy, switch VECTOR_TENANCY, then copy again to pick up what
+was ingested in between (vectors of chunks deleted in between are removed
+by the garbage collector). A knowledge base's source is only deleted once
+every one of its chunk IDs is in the target.
+"""
+import argparse
+import logging
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.knowledge import KnowledgeBase
+from app.services.embedding.embedding_factory import EmbeddingsFactory
+
+from .factory import VectorStoreFactory
+from .partitioned import TENANCIES
+
+logger = logging.getLogger(__name__)
+
+
+def _knowledge_base_ids(batch_size: int) -> Iterator[int]:
+    """Every live knowledge base, in keyset-paged batches"""
+    db = SessionLocal()
+    try:
+        last_kb_id = 0
+        while True:
+            kb_ids = [
+                row[0] for row in db.query(KnowledgeBase.id)
+                .filter(KnowledgeBase.id > last_kb_id, KnowledgeBase.deleted_at.is_(None))
+                .order_by(KnowledgeBase.id)
+                .limit(batch_size)
+                .all()
+            ]
+            if not kb_ids:
+                return
+            yield from kb_ids
+            last_kb_id = kb_ids[-1]
+    finally:
+        db.close()
+
+
+def migrate_knowledge_base(
+    kb_id: int,
+    target_tenancy: str,
+    embeddings,
+    batch_size: int = 500,
+    delete_source: bool = False,
+) -> Dict[str, Any]:
+    """Copy one knowledge base's chunks into the target tenancy; returns the counts"""
+    source_tenancy = next(tenancy for tenancy in TENANCIES if tenancy != target_tenancy)
+    source = VectorStoreFactory.create_for_kb(settings.VECTOR_STORE_TYPE, kb_id, embeddings, tenancy=source_tenancy)
+    target = VectorStoreFactory.create_for_kb(settings.VECTOR_STORE_TYPE, kb_id, embeddings, tenancy=target_tenancy)
+    source_ids = set()
+    for ids, vectors, documents in source.iter_records(batch_size, kb_id=kb_id):
+        target.upsert_records(ids, vectors, documents)
+        source_ids.update(ids)
+    missing = set(source_ids)
+    for ids in target.iter_ids(batch_size, kb_id=kb_id):
+        missing.difference_update(ids)
+    result = {"kb_id": kb_id, "copied": len(source_ids), "missing": len(missing), "source_deleted": False}
+    if missing:
+        logger.warning(f"Knowledge base {kb_id}: {len(missing)} chunks missing from {target_tenancy}; keeping the source")
+    elif delete_source:
+        source.delete_collection()
+        result["source_deleted"] = True
+    logger.info(f"Knowledge base {kb_id}: copied {len(source_ids)} chunks from {source_tenancy} to {target_tenancy}")
+    return result
+
+
+def migrate(
+    target_tenancy: str,
+    kb_ids: Optional[List[int]] = None,
+    batch_size: int = 500,
+    delete_source: bool = False,
+) -> List[Dict[str, Any]]:
+    embeddings = EmbeddingsFactory.create()
+    results = []
+    for kb_id in kb_ids or _knowledge_base_ids(batch_size):
+        try:
+            results.append(migrate_knowledge_base(kb_id, target_tenancy, embeddings, batch_size, delete_source))
+        except Exception as e:
+            logger.warning(f"Knowledge base {kb_id}: migration failed: {str(e)}")
+            results.append({"kb_id": kb_id, "copied": 0, "missing": None, "source_deleted": False, "error": str(e)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move knowledge bases between per-knowledge-base and shared vector collections"
+    )
+    parser.add_argument("--to", dest="target", required=True, choices=TENANCIES, help="Tenancy to copy into")
+    parser.add_argument("--kb-ids", help="Comma-separated knowledge base IDs (default: all)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--delete-source", action="store_true", help="Delete each source once fully copied")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    kb_ids = [int(kb_id) for kb_id in args.kb_ids.split(",")] if args.kb_ids else None
+    results = migrate(args.target, kb_ids, args.batch_size, args.delete_source)
+    incomplete = [str(result["kb_id"]) for result in results if result["missing"] or result.get("error")]
+    if incomplete:
+        sys.exit(f"Chunks missing from the target for knowledge bases: {', '.join(incomplete)}")
+
+
+if __name__ == "__main__":
+    main()
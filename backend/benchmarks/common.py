@@ -0,0 +1,317 @@
+"""
+Shared pieces of the benchmark suite: environment bootstrap, local
+stand-ins for MinIO and the vector database, result helpers.
+
+configure_environment() has to run before anything under `app` is
+imported, because settings are read at import time.
+"""
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+BENCHMARK_VECTOR_STORE = "memory"
+
+
+def configure_environment(workdir: str, database_url: Optional[str] = None, **overrides: str) -> None:
+    """Point the app at offline providers and a throwaway database unless told otherwise"""
+    os.makedirs(workdir, exist_ok=True)
+    defaults = {
+        "SQLALCHEMY_DATABASE_URI": database_url or f"sqlite:///{os.path.join(workdir, 'benchmark.db')}",
+        "EMBEDDINGS_PROVIDER": "fake",
+        "CHAT_PROVIDER": "fake",
+        "VECTOR_STORE_TYPE": BENCHMARK_VECTOR_STORE,
+        # Used when VECTOR_STORE_TYPE=local is set to benchmark the on-disk backend
+        "LOCAL_VECTOR_STORE_PATH": os.path.join(workdir, "vectors"),
+        "GC_ENABLED": "false",
+        "TRACE_EXPORTER": "none",
+    }
+    defaults.update(overrides)
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def bootstrap_app(workdir: str, database_url: Optional[str] = None, **overrides: str):
+    """
+    Configure the offline environment, import the app with its stand-ins
+    in place and create the schema. Returns the FastAPI app.
+    """
+    configure_environment(workdir, database_url, **overrides)
+    register_memory_vector_store()
+    from app.main import app
+
+    # After importing the app, so the patch reaches every module holding get_minio_client
+    use_local_object_store(os.path.join(workdir, "objects"))
+    prepare_database()
+    return app
+
+
+def prepare_database() -> None:
+    """
+    Create the schema directly from the models. On SQLite, MySQL-only
+    types and server defaults get local equivalents.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.dialects.mysql import LONGTEXT
+    from sqlalchemy.ext.compiler import compiles
+
+    import app.models  # noqa: F401  registers every table
+    import app.models.knowledge  # noqa: F401
+    from app.db.session import engine
+    from app.models.base import Base
+
+    if engine.dialect.name == "sqlite":
+        @compiles(LONGTEXT, "sqlite")
+        def _longtext(element, compiler, **kw):
+            return "TEXT"
+
+        @event.listens_for(engine, "connect")
+        def _now_function(dbapi_connection, connection_record):
+            dbapi_connection.create_function(
+                "now", 0, lambda: datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            )
+
+    Base.metadata.create_all(bind=engine)
+
+
+def create_benchmark_user(db, kb_name: Optional[str] = None):
+    """A throwaway user, and a knowledge base of theirs when kb_name is given"""
+    from app.models.knowledge import KnowledgeBase, KnowledgeBaseStats
+    from app.models.user import User
+
+    suffix = os.urandom(4).hex()
+    user = User(
+        email=f"bench-{suffix}@example.com",
+        username=f"bench-{suffix}",
+        hashed_password="!",
+        is_active=True,
+    )
+    db.add(user)
+    db.commit()
+    kb = None
+    if kb_name:
+        kb = KnowledgeBase(name=kb_name, description="", user_id=user.id)
+        kb.stats = KnowledgeBaseStats()
+        db.add(kb)
+        db.commit()
+    return user, kb
+
+
+def register_memory_vector_store() -> None:
+    """Register an in-process vector store under VECTOR_STORE_TYPE=memory"""
+    from langchain_core.vectorstores import InMemoryVectorStore
+
+    from app.services.vector_store import BaseVectorStore, VectorStoreFactory
+    from app.services.vector_store.filters import matches_filter, normalize_filter
+
+    collections: Dict[str, InMemoryVectorStore] = {}
+
+    class MemoryVectorStore(BaseVectorStore):
+        """Brute-force store kept in this process; collections live until exit"""
+
+        def __init__(self, collection_name: str, embedding_function, **kwargs):
+            self.collection_name = collection_name
+            if collection_name not in collections:
+                collections[collection_name] = InMemoryVectorStore(embedding_function)
+            self._store = collections[collection_name]
+
+        def add_documents(self, documents):
+            self._store.add_documents(documents)
+
+        def upsert(self, ids, documents):
+            if documents:
+                self._store.add_documents(documents, ids=ids)
+
+        def delete(self, ids):
+            self._store.delete(ids)
+
+        def delete_by_filter(self, kb_id=None, document_id=None):
+            conditions = self._filter_conditions(kb_id=kb_id, document_id=document_id)
+            ids = [
+                id for id, record in self._store.store.items()
+                if all(record["metadata"].get(key) == value for key, value in conditions.items())
+            ]
+            if ids:
+                self._store.delete(ids)
+
+        @staticmethod
+        def _scoped(kwargs):
+            # InMemoryVectorStore filters with a predicate over documents
+            filter = kwargs.get("filter")
+            if not isinstance(filter, dict):
+                return kwargs
+            filter = normalize_filter(filter)
+            return {**kwargs, "filter": lambda doc: matches_filter(doc.metadata, filter)}
+
+        def as_retriever(self, **kwargs):
+            if kwargs.get("search_kwargs"):
+                kwargs["search_kwargs"] = self._scoped(kwargs["search_kwargs"])
+            return self._store.as_retriever(**kwargs)
+
+        def similarity_search(self, query, k=4, **kwargs):
+            return self._store.similarity_search(query, k=k, **self._scoped(kwargs))
+
+        def similarity_search_with_score(self, query, k=4, **kwargs):
+            return self._store.similarity_search_with_score(query, k=k, **self._scoped(kwargs))
+
+        def similarity_search_with_score_by_vector(self, embedding, k=4, **kwargs):
+            return self._store.similarity_search_with_score_by_vector(embedding, k=k, **self._scoped(kwargs))
+
+        def delete_collection(self):
+            collections.pop(self.collection_name, None)
+
+        def partition_filter(self, kb_id, filter=None):
+            if isinstance(filter, dict):
+                filter = self._scoped({"filter": filter})["filter"]
+            return lambda doc: doc.metadata.get("kb_id") == kb_id and (filter is None or filter(doc))
+
+        def iter_ids(self, batch_size=1000, kb_id=None) -> Iterator[List[str]]:
+            ids = [
+                id for id, record in self._store.store.items()
+                if kb_id is None or record["metadata"].get("kb_id") == kb_id
+            ]
+            for start in range(0, len(ids), batch_size):
+                yield ids[start:start + batch_size]
+
+    VectorStoreFactory.register_store(BENCHMARK_VECTOR_STORE, MemoryVectorStore)
+
+
+class LocalObjectStore:
+    """
+    The subset of the MinIO client API the app uses, backed by a local
+    directory, so ingestion can be measured without an object store.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, bucket_name: str, object_name: str) -> str:
+        return os.path.join(self.root, bucket_name, object_name)
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        return os.path.isdir(os.path.join(self.root, bucket_name))
+
+    def make_bucket(self, bucket_name: str) -> None:
+        os.makedirs(os.path.join(self.root, bucket_name), exist_ok=True)
+
+    def put_object(self, bucket_name, object_name, data, length, content_type=None, **kwargs):
+        path = self._path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(data, f)
+        return SimpleNamespace(object_name=object_name)
+
+    def get_object(self, bucket_name, object_name, **kwargs):
+        with open(self._path(bucket_name, object_name), "rb") as f:
+            response = BytesIO(f.read())
+        response.release_conn = lambda: None
+        return response
+
+    def fget_object(self, bucket_name, object_name, file_path, **kwargs):
+        shutil.copyfile(self._path(bucket_name, object_name), file_path)
+
+    def copy_object(self, bucket_name, object_name, source, **kwargs):
+        path = self._path(bucket_name, object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(self._path(source.bucket_name, source.object_name), path)
+
+    def stat_object(self, bucket_name, object_name, **kwargs):
+        path = self._path(bucket_name, object_name)
+        return SimpleNamespace(object_name=object_name, size=os.path.getsize(path))
+
+    def remove_object(self, bucket_name, object_name, **kwargs):
+        try:
+            os.remove(self._path(bucket_name, object_name))
+        except FileNotFoundError:
+            pass
+
+    def remove_objects(self, bucket_name, delete_object_list, **kwargs):
+        for item in delete_object_list:
+            self.remove_object(bucket_name, getattr(item, "name", None) or item._name)
+        return iter(())
+
+    def list_objects(self, bucket_name, prefix=None, recursive=False, **kwargs):
+        base = os.path.join(self.root, bucket_name)
+        for directory, _, files in sorted(os.walk(base)):
+            for name in sorted(files):
+                path = os.path.join(directory, name)
+                object_name = os.path.relpath(path, base)
+                if prefix and not object_name.startswith(prefix):
+                    continue
+                yield SimpleNamespace(
+                    object_name=object_name,
+                    size=os.path.getsize(path),
+                    last_modified=datetime.fromtimestamp(os.path.getmtime(path), timezone.utc),
+                )
+
+
+def use_local_object_store(root: str) -> LocalObjectStore:
+    """Make every loaded app module's get_minio_client return a LocalObjectStore"""
+    from app.core.config import settings
+
+    store = LocalObjectStore(root)
+    store.make_bucket(settings.MINIO_BUCKET_NAME)
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app") and hasattr(module, "get_minio_client"):
+            module.get_minio_client = lambda: store
+    return store
+
+
+def percentiles(values: List[float], points=(50, 95, 99)) -> Dict[str, Optional[float]]:
+    """Nearest-rank percentiles, plus mean and max"""
+    if not values:
+        return {f"p{point}": None for point in points}
+    ordered = sorted(values)
+    result = {
+        f"p{point}": round(ordered[max(0, math.ceil(point / 100 * len(ordered)) - 1)], 6)
+        for point in points
+    }
+    result["mean"] = round(sum(ordered) / len(ordered), 6)
+    result["max"] = round(ordered[-1], 6)
+    return result
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def write_result(name: str, config: Dict[str, Any], results: Dict[str, Any], output: Optional[str]) -> None:
+    """Emit a benchmark result as JSON to `output` or stdout"""
+    document = {
+        "benchmark": name,
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, default=str)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+class Stopwatch:
+    def __init__(self):
+        self.started = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
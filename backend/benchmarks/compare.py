@@ -0,0 +1,67 @@
+"""
+Compare two benchmark result files, e.g. from the base and head commit:
+
+    python -m benchmarks.compare base.json head.json --threshold 10
+
+Prints every numeric result that changed by more than the threshold
+(percent) and exits with status 1 if any did, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves keyed by dotted path; list items by index or their 'name'/'concurrency'"""
+    leaves: Dict[str, float] = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            leaves.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = index
+            if isinstance(item, dict):
+                label = item.get("name") or item.get("concurrency") or index
+                if "file_type" in item:
+                    label = f"{item['file_type']}/{item.get('size_bucket')}"
+            leaves.update(flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        leaves[prefix] = float(value)
+    return leaves
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=5.0, help="Percent change to report")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+    if base.get("benchmark") != head.get("benchmark"):
+        sys.exit(f"Cannot compare {base.get('benchmark')} with {head.get('benchmark')}")
+    if base.get("config") != head.get("config"):
+        print("warning: the runs used different configurations", file=sys.stderr)
+
+    base_values = flatten(base["results"])
+    head_values = flatten(head["results"])
+    changed = 0
+    print(f"{'metric':60} {base.get('commit') or 'base':>14} {head.get('commit') or 'head':>14} {'change':>9}")
+    for key in sorted(base_values.keys() & head_values.keys()):
+        old, new = base_values[key], head_values[key]
+        if old == new:
+            continue
+        delta = (new - old) / abs(old) * 100 if old else float("inf")
+        if abs(delta) < args.threshold:
+            continue
+        changed += 1
+        print(f"{key:60} {old:14.4f} {new:14.4f} {delta:+8.1f}%")
+    sys.exit(1 if changed else 0)
+
+
+if __name__ == "__main__":
+    main()
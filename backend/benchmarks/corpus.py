@@ -0,0 +1,164 @@
+"""
+Deterministic synthetic documents for the benchmarks.
+
+Text is drawn from a fixed vocabulary with a seeded RNG, so the same
+arguments always produce byte-identical files and results stay
+comparable between commits.
+"""
+import os
+import random
+from io import BytesIO
+from typing import Dict, List, Tuple
+
+FILE_TYPES = ("txt", "md", "pdf", "docx")
+
+_SYLLABLES = (
+    "ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "dan", "fer", "gol", "hin",
+    "jor", "kel", "mar", "nol", "pre", "sto", "tur", "vel", "wen", "xan", "yor", "zul", "bri", "cro",
+)
+
+
+def _vocabulary(rng: random.Random, size: int = 2000) -> List[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+class CorpusGenerator:
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.vocabulary = _vocabulary(self.rng)
+
+    def sentence(self) -> str:
+        words = self.rng.choices(self.vocabulary, k=self.rng.randint(8, 20))
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self) -> str:
+        return " ".join(self.sentence() for _ in range(self.rng.randint(3, 7)))
+
+    def paragraphs(self, target_bytes: int) -> List[str]:
+        result, size = [], 0
+        while size < target_bytes:
+            paragraph = self.paragraph()
+            result.append(paragraph)
+            size += len(paragraph) + 2
+        return result
+
+    def render(self, file_type: str, target_bytes: int) -> bytes:
+        paragraphs = self.paragraphs(target_bytes)
+        if file_type == "txt":
+            return "\n\n".join(paragraphs).encode("utf-8")
+        if file_type == "md":
+            return _markdown(paragraphs, self.rng).encode("utf-8")
+        if file_type == "pdf":
+            return _pdf(paragraphs)
+        if file_type == "docx":
+            return _docx(paragraphs)
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+
+def _markdown(paragraphs: List[str], rng: random.Random) -> str:
+    lines = []
+    for index, paragraph in enumerate(paragraphs):
+        if index % 4 == 0:
+            lines.append(f"{'#' * rng.randint(1, 3)} Section {index // 4 + 1}")
+        lines.append(paragraph)
+    return "\n\n".join(lines) + "\n"
+
+
+def _docx(paragraphs: List[str]) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    buffer = BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf(paragraphs: List[str], chars_per_line: int = 90, lines_per_page: int = 50) -> bytes:
+    """Minimal PDF 1.4: one Helvetica text stream per page, readable by pypdf"""
+    lines: List[str] = []
+    for paragraph in paragraphs:
+        line = ""
+        for word in paragraph.split():
+            if len(line) + len(word) + 1 > chars_per_line:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.extend([line, ""])
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    # Objects 1-3 are catalog, page tree and font; each page adds a page and a content object
+    objects: List[bytes] = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        text = "\n".join(f"({_pdf_escape(line)}) Tj T*" for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 800 Td\n{text}\nET".encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects) + 2} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>".encode()
+    )
+
+    output = BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return output.getvalue()
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """'txt=2,pdf=1' -> normalized weights per file type"""
+    weights = {}
+    for part in mix.split(","):
+        file_type, _, weight = part.strip().partition("=")
+        if file_type not in FILE_TYPES:
+            raise ValueError(f"Unsupported file type: {file_type}. Supported types are: {', '.join(FILE_TYPES)}")
+        weights[file_type] = float(weight or 1)
+    total = sum(weights.values())
+    return {file_type: weight / total for file_type, weight in weights.items()}
+
+
+def generate_corpus(
+    directory: str,
+    documents: int,
+    mix: Dict[str, float],
+    min_bytes: int,
+    max_bytes: int,
+    seed: int = 42,
+) -> List[Tuple[str, int]]:
+    """Write `documents` files to `directory`; returns (path, size) of each"""
+    os.makedirs(directory, exist_ok=True)
+    generator = CorpusGenerator(seed)
+    file_types = list(mix.keys())
+    weights = list(mix.values())
+    files = []
+    for index in range(documents):
+        file_type = generator.rng.choices(file_types, weights=weights)[0]
+        target = generator.rng.randint(min_bytes, max_bytes)
+        content = generator.render(file_type, target)
+        path = os.path.join(directory, f"doc_{index:05d}.{file_type}")
+        with open(path, "wb") as f:
+            f.write(content)
+        files.append((path, len(content)))
+    return files
@@ -0,0 +1,216 @@
+"""
+End-to-end ingestion benchmark.
+
+Generates a synthetic corpus and pushes it through the real endpoints,
+upload_kb_documents -> process_kb_documents -> process_document_background,
+with offline stand-ins: fake embeddings, an in-process vector store, a
+directory instead of MinIO and SQLite (or --database-url for MySQL).
+
+    python -m benchmarks.ingestion --documents 200 --mix txt=2,md=1,pdf=1,docx=1 \
+        --output ingestion.json
+
+The app is driven in-process over ASGI, so background tasks run on the
+benchmark's event loop exactly as they would on the server's.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.common import (
+    Stopwatch,
+    bootstrap_app,
+    create_benchmark_user,
+    percentiles,
+    write_result,
+)
+from benchmarks.corpus import generate_corpus, parse_mix
+
+CONTENT_TYPES = {
+    "txt": "text/plain",
+    "md": "text/markdown",
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingestion throughput and per-stage latency benchmark")
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--mix", default="txt=1,md=1,pdf=1,docx=1", help="Weighted file types, e.g. txt=2,pdf=1")
+    parser.add_argument("--min-kb", type=int, default=4, help="Smallest document, in KB of text")
+    parser.add_argument("--max-kb", type=int, default=64, help="Largest document, in KB of text")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=20, help="Files per upload/process request")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds to wait for processing")
+    parser.add_argument("--database-url", help="SQLAlchemy URL; defaults to a SQLite file in the work directory")
+    parser.add_argument("--workdir", help="Keep corpus, database and objects here instead of a temp directory")
+    parser.add_argument("--output", help="Write the JSON result here instead of stdout")
+    return parser.parse_args()
+
+
+async def ingest(client, kb_id: int, files: List[Tuple[str, int]], batch_size: int, timeout: float) -> Dict[str, Any]:
+    """Upload and process `files` through the API, then wait for every processing task"""
+    from app.db.session import SessionLocal
+    from app.models.knowledge import ProcessingTask
+
+    task_ids = []
+    upload_latencies = []
+    started = Stopwatch()
+    for start in range(0, len(files), batch_size):
+        batch = files[start:start + batch_size]
+        with contextlib.ExitStack() as stack:
+            uploads = [
+                (
+                    "files",
+                    (
+                        os.path.basename(path),
+                        stack.enter_context(open(path, "rb")),
+                        CONTENT_TYPES[path.rsplit(".", 1)[1]],
+                    ),
+                )
+                for path, _ in batch
+            ]
+            request_started = time.perf_counter()
+            response = await client.post(f"/api/knowledge-base/{kb_id}/documents/upload", files=uploads)
+        response.raise_for_status()
+        upload_latencies.append(time.perf_counter() - request_started)
+        response = await client.post(f"/api/knowledge-base/{kb_id}/documents/process", json=response.json())
+        response.raise_for_status()
+        task_ids.extend(task["task_id"] for task in response.json()["tasks"])
+    upload_seconds = started.elapsed()
+
+    # Tasks run on this loop; poll the database the way the UI polls the tasks endpoint
+    deadline = time.monotonic() + timeout
+    while True:
+        db = SessionLocal()
+        try:
+            pending = db.query(ProcessingTask).filter(
+                ProcessingTask.id.in_(task_ids),
+                ProcessingTask.status.notin_(("completed", "failed"))
+            ).count()
+        finally:
+            db.close()
+        if not pending:
+            break
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{pending} tasks still running after {timeout}s")
+        await asyncio.sleep(0.2)
+
+    return {
+        "task_ids": task_ids,
+        "upload_latencies": upload_latencies,
+        "upload_seconds": upload_seconds,
+        "total_seconds": started.elapsed(),
+    }
+
+
+def authenticate_as(app, user_id: int) -> None:
+    """Serve every request of the in-process app as the given user"""
+    from app.api.api_v1.auth import get_current_user as get_token_user
+    from app.core.security import get_current_user
+    from app.db.session import SessionLocal
+    from app.models.user import User
+
+    def current_user():
+        db = SessionLocal()
+        try:
+            return db.query(User).get(user_id)
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_current_user] = current_user
+    app.dependency_overrides[get_token_user] = current_user
+
+
+async def run(args, app, files):
+    import httpx
+
+    from app.db.session import SessionLocal
+    from app.models.knowledge import DocumentChunk, ProcessingTask
+    from app.services.task_metrics import aggregate_stage_timings, peak_rss_bytes
+
+    db = SessionLocal()
+    try:
+        user, kb = create_benchmark_user(db, "ingestion benchmark")
+        user_id, kb_id = user.id, kb.id
+    finally:
+        db.close()
+    authenticate_as(app, user_id)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        run_result = await ingest(client, kb_id, files, args.batch_size, args.timeout)
+    total_seconds = run_result["total_seconds"]
+
+    db = SessionLocal()
+    try:
+        tasks = db.query(ProcessingTask).filter(ProcessingTask.id.in_(run_result["task_ids"])).all()
+        chunks = db.query(DocumentChunk).filter(DocumentChunk.kb_id == kb_id).count()
+    finally:
+        db.close()
+
+    completed = [task for task in tasks if task.status == "completed"]
+    failed = [task for task in tasks if task.status == "failed"]
+    metrics = [task.metrics for task in tasks if task.metrics]
+    overall = aggregate_stage_timings({**m, "file_type": "all", "size_bucket": "all"} for m in metrics)
+
+    return {
+        "documents": len(files),
+        "corpus_bytes": sum(size for _, size in files),
+        "completed": len(completed),
+        "failed": len(failed),
+        "errors": sorted({task.error_message for task in failed if task.error_message})[:10],
+        "chunks": chunks,
+        "upload_seconds": round(run_result["upload_seconds"], 4),
+        "total_seconds": round(total_seconds, 4),
+        "docs_per_second": round(len(completed) / total_seconds, 4) if total_seconds else None,
+        "chunks_per_second": round(chunks / total_seconds, 4) if total_seconds else None,
+        "upload_request_seconds": percentiles(run_result["upload_latencies"]),
+        "task_seconds": percentiles([m["total_seconds"] for m in metrics if "total_seconds" in m]),
+        "stages": overall[0]["stages"] if overall else {},
+        "stages_by_group": aggregate_stage_timings(metrics),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def main():
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ragwebui-bench-")
+    app = bootstrap_app(workdir, args.database_url)
+
+    files = generate_corpus(
+        os.path.join(workdir, "corpus"),
+        args.documents,
+        parse_mix(args.mix),
+        args.min_kb * 1024,
+        args.max_kb * 1024,
+        args.seed,
+    )
+
+    try:
+        results = asyncio.run(run(args, app, files))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    from app.core.config import settings
+    config = {
+        key: value for key, value in vars(args).items() if key not in ("output", "workdir", "database_url")
+    }
+    config.update(
+        database=settings.get_database_url.split(":", 1)[0],
+        embeddings_provider=settings.EMBEDDINGS_PROVIDER,
+        vector_store=settings.VECTOR_STORE_TYPE,
+        fake_embeddings_latency_ms=settings.FAKE_EMBEDDINGS_LATENCY_MS,
+        fake_embeddings_per_text_latency_ms=settings.FAKE_EMBEDDINGS_PER_TEXT_LATENCY_MS,
+    )
+    write_result("ingestion", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
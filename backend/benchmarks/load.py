@@ -0,0 +1,373 @@
+"""
+Chat and retrieval load benchmark.
+
+Opens N concurrent clients against the streaming chat endpoint
+(/api/chat/{id}/messages) and the API-key query endpoint
+(/openapi/knowledge/{kb_id}/query) at increasing concurrency, and reports
+for each level TTFT, inter-token latency, total latency (p50/p95/p99),
+throughput, error rate, server CPU and RSS. Together the levels form a
+saturation curve.
+
+    python -m benchmarks.load --concurrency 1,2,4,8,16,32 --duration 20 --output load.json
+
+By default a benchmark server (benchmarks.server) with the fake providers
+is started in a subprocess; pass --fixtures to target one that is already
+running. While the clients run, /api/health is probed every 100ms: its
+latency is the time the event loop takes to pick up a trivial request,
+so it rises as soon as request handling blocks the loop.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import percentiles, write_result
+from benchmarks.corpus import CorpusGenerator
+
+TARGETS = ("chat", "query")
+CONTEXT_SEPARATOR = "__LLM_RESPONSE__"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent chat/retrieval load benchmark")
+    parser.add_argument("--targets", default="chat,query", help="Comma-separated: chat, query")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated client counts")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=2, help="Seconds of load before measuring each level")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--request-timeout", type=float, default=120)
+    parser.add_argument("--fixtures", help="Fixtures file of a running benchmarks.server; skips starting one")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the server started by this run")
+    parser.add_argument("--documents", type=int, default=50, help="Documents seeded into the started server")
+    parser.add_argument("--database-url", help="Database of the started server; defaults to SQLite")
+    parser.add_argument("--output", help="Write the JSON result here instead of stdout")
+    return parser.parse_args()
+
+
+class ProcessSampler:
+    """CPU and RSS of the server process, read from /proc (or psutil elsewhere)"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._psutil = None
+        if not os.path.exists(f"/proc/{pid}/stat"):
+            try:
+                import psutil
+                self._psutil = psutil.Process(pid)
+            except Exception:
+                self._psutil = None
+
+    def cpu_seconds(self) -> Optional[float]:
+        try:
+            if self._psutil is not None:
+                times = self._psutil.cpu_times()
+                return times.user + times.system
+            with open(f"/proc/{self.pid}/stat") as f:
+                # Fields after the parenthesized command name; utime and stime are the 12th and 13th
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / self._ticks
+        except Exception:
+            return None
+
+    def rss_bytes(self) -> Optional[int]:
+        try:
+            if self._psutil is not None:
+                return self._psutil.memory_info().rss
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except Exception:
+            return None
+        return None
+
+
+class Sample:
+    __slots__ = ("ok", "latency", "ttft", "gaps", "tokens", "error")
+
+    def __init__(self):
+        self.ok = False
+        self.latency: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.gaps: List[float] = []
+        self.tokens = 0
+        self.error: Optional[str] = None
+
+
+async def chat_request(client, fixtures: Dict[str, Any], query: str) -> Sample:
+    sample = Sample()
+    started = time.perf_counter()
+    last_token = None
+    try:
+        async with client.stream(
+            "POST",
+            f"/api/chat/{fixtures['chat_id']}/messages",
+            json={"messages": [{"role": "user", "content": query}]},
+            headers={"Authorization": f"Bearer {fixtures['token']}"},
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                sample.error = f"HTTP {response.status_code}"
+                return sample
+            async for line in response.aiter_lines():
+                now = time.perf_counter()
+                if line.startswith("3:"):
+                    sample.error = line[2:200]
+                elif line.startswith("0:") and CONTEXT_SEPARATOR not in line:
+                    if last_token is None:
+                        sample.ttft = now - started
+                    else:
+                        sample.gaps.append(now - last_token)
+                    last_token = now
+                    sample.tokens += 1
+        sample.ok = sample.error is None
+    except Exception as e:
+        sample.error = type(e).__name__
+    finally:
+        sample.latency = time.perf_counter() - started
+    return sample
+
+
+async def query_request(client, fixtures: Dict[str, Any], query: str, top_k: int) -> Sample:
+    sample = Sample()
+    started = time.perf_counter()
+    try:
+        response = await client.get(
+            f"/openapi/knowledge/{fixtures['kb_id']}/query",
+            params={"query": query, "top_k": top_k},
+            headers={"X-API-Key": fixtures["api_key"]},
+        )
+        if response.status_code == 200:
+            sample.ok = True
+        else:
+            sample.error = f"HTTP {response.status_code}"
+    except Exception as e:
+        sample.error = type(e).__name__
+    finally:
+        sample.latency = time.perf_counter() - started
+    return sample
+
+
+async def run_level(client, fixtures, target: str, concurrency: int, args, sampler: ProcessSampler) -> Dict[str, Any]:
+    generator = CorpusGenerator(args.seed)
+    rng = random.Random(args.seed + concurrency)
+    queries = [generator.sentence() for _ in range(200)]
+    samples: List[Sample] = []
+    probes: List[float] = []
+    measuring = False
+    stop = False
+
+    async def worker():
+        while not stop:
+            query = rng.choice(queries)
+            if target == "chat":
+                sample = await chat_request(client, fixtures, query)
+            else:
+                sample = await query_request(client, fixtures, query, args.top_k)
+            if measuring and not stop:
+                samples.append(sample)
+
+    async def probe():
+        while not stop:
+            started = time.perf_counter()
+            try:
+                await client.get("/api/health")
+                if measuring:
+                    probes.append(time.perf_counter() - started)
+            except Exception:
+                pass
+            await asyncio.sleep(0.1)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    tasks.append(asyncio.create_task(probe()))
+    await asyncio.sleep(args.warmup)
+
+    measuring = True
+    cpu_before = sampler.cpu_seconds()
+    rss_peak = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < args.duration:
+        await asyncio.sleep(0.5)
+        rss_peak = max(rss_peak, sampler.rss_bytes() or 0)
+    elapsed = time.perf_counter() - started
+    cpu_after = sampler.cpu_seconds()
+    stop = True
+    # In-flight requests are not counted; give them a moment to finish instead of cutting connections
+    await asyncio.wait(tasks, timeout=args.request_timeout)
+    for task in tasks:
+        task.cancel()
+
+    succeeded = [sample for sample in samples if sample.ok]
+    errors: Dict[str, int] = {}
+    for sample in samples:
+        if not sample.ok:
+            errors[sample.error] = errors.get(sample.error, 0) + 1
+    level = {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": len(samples) - len(succeeded),
+        "error_rate": round((len(samples) - len(succeeded)) / len(samples), 4) if samples else None,
+        "error_kinds": errors,
+        "throughput_rps": round(len(succeeded) / elapsed, 4),
+        "latency_seconds": percentiles([sample.latency for sample in succeeded]),
+        "health_probe_seconds": percentiles(probes),
+        "server_cpu_percent": (
+            round((cpu_after - cpu_before) / elapsed * 100, 1)
+            if cpu_before is not None and cpu_after is not None else None
+        ),
+        "server_rss_bytes": rss_peak or None,
+    }
+    if target == "chat":
+        level.update(
+            ttft_seconds=percentiles([sample.ttft for sample in succeeded if sample.ttft is not None]),
+            inter_token_seconds=percentiles([gap for sample in succeeded for gap in sample.gaps]),
+            tokens_per_second=round(sum(sample.tokens for sample in succeeded) / elapsed, 2),
+        )
+    return level
+
+
+def saturation(levels: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Where the curve bends: the level with the highest throughput, and the
+    first level whose p95 latency is more than twice that of the lightest load.
+    """
+    measured = [level for level in levels if level["latency_seconds"].get("p95") is not None]
+    if not measured:
+        return {}
+    peak = max(measured, key=lambda level: level["throughput_rps"])
+    baseline = measured[0]["latency_seconds"]["p95"]
+    degraded = next(
+        (level["concurrency"] for level in measured if level["latency_seconds"]["p95"] > 2 * baseline),
+        None
+    )
+    return {
+        "peak_throughput_rps": peak["throughput_rps"],
+        "peak_throughput_concurrency": peak["concurrency"],
+        "latency_doubled_at_concurrency": degraded,
+    }
+
+
+def print_curve(target: str, levels: List[Dict[str, Any]]) -> None:
+    print(f"\n{target}", file=sys.stderr)
+    print(f"{'clients':>8} {'req/s':>9} {'p50 s':>9} {'p95 s':>9} {'p99 s':>9} {'errors':>7} "
+          f"{'health p95':>11} {'cpu %':>7}", file=sys.stderr)
+    for level in levels:
+        latency = level["latency_seconds"]
+        print(
+            f"{level['concurrency']:>8} {level['throughput_rps']:>9.2f} "
+            f"{latency.get('p50') or 0:>9.3f} {latency.get('p95') or 0:>9.3f} {latency.get('p99') or 0:>9.3f} "
+            f"{level['errors']:>7} {level['health_probe_seconds'].get('p95') or 0:>11.3f} "
+            f"{level['server_cpu_percent'] if level['server_cpu_percent'] is not None else '-':>7}",
+            file=sys.stderr,
+        )
+
+
+def start_server(args, workdir: str):
+    fixtures_path = os.path.join(workdir, "fixtures.json")
+    command = [
+        sys.executable, "-m", "benchmarks.server",
+        "--port", str(args.port),
+        "--documents", str(args.documents),
+        "--seed", str(args.seed),
+        "--workdir", workdir,
+        "--fixtures", fixtures_path,
+    ]
+    if args.database_url:
+        command += ["--database-url", args.database_url]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    deadline = time.monotonic() + 1800
+    while not os.path.exists(fixtures_path):
+        if process.poll() is not None:
+            sys.exit(f"Benchmark server exited with status {process.returncode}")
+        if time.monotonic() > deadline:
+            process.terminate()
+            sys.exit("Benchmark server did not come up")
+        time.sleep(0.5)
+    return process, fixtures_path
+
+
+async def wait_until_healthy(client, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError("Server did not become healthy")
+        await asyncio.sleep(0.2)
+
+
+async def run(args, fixtures: Dict[str, Any]) -> Dict[str, Any]:
+    import httpx
+
+    levels = [int(value) for value in args.concurrency.split(",")]
+    targets = [target.strip() for target in args.targets.split(",")]
+    for target in targets:
+        if target not in TARGETS:
+            sys.exit(f"Unsupported target: {target}. Supported targets are: {', '.join(TARGETS)}")
+
+    sampler = ProcessSampler(fixtures["pid"])
+    limits = httpx.Limits(max_connections=max(levels) + 1, max_keepalive_connections=max(levels) + 1)
+    results = {}
+    async with httpx.AsyncClient(
+        base_url=fixtures["base_url"], timeout=args.request_timeout, limits=limits
+    ) as client:
+        await wait_until_healthy(client)
+        for target in targets:
+            curve = []
+            for concurrency in levels:
+                curve.append(await run_level(client, fixtures, target, concurrency, args, sampler))
+            print_curve(target, curve)
+            results[target] = {"levels": curve, "saturation": saturation(curve)}
+    return results
+
+
+def main():
+    args = parse_args()
+    process = None
+    workdir = None
+    fixtures_path = args.fixtures
+    if not fixtures_path:
+        workdir = tempfile.mkdtemp(prefix="ragwebui-load-")
+        process, fixtures_path = start_server(args, workdir)
+    try:
+        with open(fixtures_path, encoding="utf-8") as f:
+            fixtures = json.load(f)
+        results = asyncio.run(run(args, fixtures))
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    config = {
+        key: value for key, value in vars(args).items()
+        if key not in ("output", "fixtures", "database_url", "port")
+    }
+    # The server's provider settings come from the same environment
+    config.update(
+        server="started" if process is not None else "external",
+        fake_llm_ttft_ms=os.getenv("FAKE_LLM_TTFT_MS"),
+        fake_llm_tokens_per_second=os.getenv("FAKE_LLM_TOKENS_PER_SECOND"),
+        fake_embeddings_latency_ms=os.getenv("FAKE_EMBEDDINGS_LATENCY_MS"),
+    )
+    write_result("load", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Retrieval quality and latency evaluation over labeled query sets.
+
+A dataset is JSON lines, one labeled query per line:
+
+    {"kb_ids": [3, 5], "query": "...", "relevant_chunk_ids": ["..."], "relevant_document_ids": [12]}
+
+kb_ids[0] is the knowledge base searched by the single-KB modes; the
+multi_kb mode fuses results from all of them. Results are judged at chunk
+level when relevant_chunk_ids is given, otherwise at document level. An
+optional "grades" object ({chunk or document id: gain}) enables graded nDCG.
+
+Against the configured deployment (settings from the environment):
+
+    python -m benchmarks.retrieval_eval --dataset queries.jsonl --modes vector,mmr --k 1,3,5,10
+
+Offline, on a synthetic corpus with generated labels:
+
+    python -m benchmarks.retrieval_eval --synthetic --documents 100 --queries 200
+
+Queries run in parallel (--parallelism). Each mode reports recall@k, MRR,
+nDCG@k, latency percentiles and the tokens of context it returns.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.common import percentiles, write_result
+
+# Standard reciprocal rank fusion constant
+RRF_K = 60
+
+
+def _vector(stores, query: str, k: int):
+    _, store = stores[0]
+    return [doc for doc, _ in store.similarity_search_with_score(query, k=k)]
+
+
+def _mmr(stores, query: str, k: int):
+    _, store = stores[0]
+    return store.as_retriever(search_type="mmr", search_kwargs={"k": k}).invoke(query)
+
+
+def _multi_kb(stores, query: str, k: int):
+    """Reciprocal rank fusion of the top k of every knowledge base"""
+    scores: Dict[str, float] = {}
+    documents = {}
+    for _, store in stores:
+        for rank, doc in enumerate(store.similarity_search(query, k=k), start=1):
+            key = doc.metadata.get("chunk_id") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank)
+            documents[key] = doc
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
+
+
+# mode name -> fn(stores: [(kb_id, store)], query, k) -> ranked documents
+RETRIEVAL_MODES: Dict[str, Callable] = {
+    "vector": _vector,
+    "mmr": _mmr,
+    "multi_kb": _multi_kb,
+}
+
+
+def register_mode(name: str, retrieve: Callable) -> None:
+    """Register another retrieval mode (e.g. hybrid or reranked) for evaluation"""
+    RETRIEVAL_MODES[name] = retrieve
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency on labeled queries")
+    parser.add_argument("--dataset", help="JSON lines of labeled queries")
+    parser.add_argument("--modes", default="vector", help=f"Comma-separated: {', '.join(RETRIEVAL_MODES)}")
+    parser.add_argument("--k", default="1,3,5,10", help="Cut-offs for recall@k and nDCG@k")
+    parser.add_argument("--parallelism", type=int, default=8, help="Queries in flight at once")
+    parser.add_argument("--synthetic", action="store_true", help="Build a synthetic corpus and labels offline")
+    parser.add_argument("--documents", type=int, default=100, help="Synthetic documents")
+    parser.add_argument("--knowledge-bases", type=int, default=2, help="Synthetic knowledge bases")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic labeled queries")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-dataset", help="Write the synthetic labeled queries here")
+    parser.add_argument("--output", help="Write the JSON result here instead of stdout")
+    return parser.parse_args()
+
+
+def load_dataset(path: str) -> List[Dict[str, Any]]:
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "kb_id" in item and "kb_ids" not in item:
+                item["kb_ids"] = [item.pop("kb_id")]
+            if not item.get("kb_ids") or not item.get("query"):
+                sys.exit(f"{path}:{number}: every query needs kb_ids and query")
+            if not item.get("relevant_chunk_ids") and not item.get("relevant_document_ids"):
+                sys.exit(f"{path}:{number}: no relevant_chunk_ids or relevant_document_ids")
+            items.append(item)
+    return items
+
+
+def judge(item: Dict[str, Any], documents) -> Tuple[List[float], List[float], int]:
+    """
+    Gain of every returned position (0 for irrelevant or repeated hits),
+    the ideal gains and the number of relevant units.
+    """
+    grades = {str(key): float(value) for key, value in (item.get("grades") or {}).items()}
+    by_chunk = bool(item.get("relevant_chunk_ids"))
+    relevant = {str(value) for value in (item.get("relevant_chunk_ids") or item.get("relevant_document_ids"))}
+    gains, seen = [], set()
+    for doc in documents:
+        unit = str(doc.metadata.get("chunk_id" if by_chunk else "document_id"))
+        if unit in relevant and unit not in seen:
+            seen.add(unit)
+            gains.append(grades.get(unit, 1.0))
+        else:
+            gains.append(0.0)
+    ideal = sorted((grades.get(unit, 1.0) for unit in relevant), reverse=True)
+    return gains, ideal, len(relevant)
+
+
+def _dcg(gains: List[float]) -> float:
+    return sum(gain / math.log2(rank + 2) for rank, gain in enumerate(gains))
+
+
+def score(gains: List[float], ideal: List[float], relevant: int, cutoffs: List[int]) -> Dict[str, float]:
+    scores = {}
+    first_hit = next((rank for rank, gain in enumerate(gains, start=1) if gain > 0), None)
+    scores["mrr"] = 1.0 / first_hit if first_hit else 0.0
+    for k in cutoffs:
+        hits = sum(1 for gain in gains[:k] if gain > 0)
+        scores[f"recall@{k}"] = hits / relevant if relevant else 0.0
+        best = _dcg(ideal[:k])
+        scores[f"ndcg@{k}"] = _dcg(gains[:k]) / best if best else 0.0
+    return scores
+
+
+def evaluate_mode(mode: str, dataset: List[Dict[str, Any]], cutoffs: List[int], parallelism: int) -> Dict[str, Any]:
+    from app.core.config import settings
+    from app.services.embedding.embedding_factory import EmbeddingsFactory
+    from app.services.task_metrics import count_tokens
+    from app.services.vector_store import VectorStoreFactory
+
+    retrieve = RETRIEVAL_MODES[mode]
+    embeddings = EmbeddingsFactory.create()
+    stores = {}
+    for item in dataset:
+        for kb_id in item["kb_ids"]:
+            if kb_id not in stores:
+                stores[kb_id] = VectorStoreFactory.create_for_kb(
+                    store_type=settings.VECTOR_STORE_TYPE,
+                    kb_id=kb_id,
+                    embedding_function=embeddings,
+                )
+    depth = max(cutoffs)
+
+    def run_query(item):
+        started = time.perf_counter()
+        try:
+            documents = retrieve([(kb_id, stores[kb_id]) for kb_id in item["kb_ids"]], item["query"], depth)
+        except Exception as e:
+            return None, time.perf_counter() - started, f"{type(e).__name__}: {e}"
+        return documents, time.perf_counter() - started, None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        outcomes = list(executor.map(run_query, dataset))
+    wall_seconds = time.perf_counter() - started
+
+    totals: Dict[str, float] = {}
+    latencies, context_tokens, errors = [], [], []
+    for item, (documents, latency, error) in zip(dataset, outcomes):
+        if error:
+            errors.append(error)
+            continue
+        latencies.append(latency)
+        context_tokens.append(count_tokens([doc.page_content for doc in documents]))
+        for name, value in score(*judge(item, documents), cutoffs).items():
+            totals[name] = totals.get(name, 0.0) + value
+    evaluated = len(latencies)
+
+    return {
+        "name": mode,
+        "queries": len(dataset),
+        "errors": len(errors),
+        "error_examples": sorted(set(errors))[:5],
+        "quality": {name: round(value / evaluated, 4) for name, value in totals.items()} if evaluated else {},
+        "latency_seconds": percentiles(latencies),
+        "queries_per_second": round(evaluated / wall_seconds, 2) if wall_seconds else None,
+        "context_tokens": percentiles(context_tokens),
+    }
+
+
+def build_synthetic(args, workdir: str) -> List[Dict[str, Any]]:
+    """Ingest a synthetic corpus into several knowledge bases and label queries cut from its chunks"""
+    import asyncio
+
+    import httpx
+
+    from app.db.session import SessionLocal
+    from app.models.knowledge import DocumentChunk, KnowledgeBase, KnowledgeBaseStats
+    from benchmarks.common import bootstrap_app, create_benchmark_user
+    from benchmarks.corpus import generate_corpus, parse_mix
+    from benchmarks.ingestion import authenticate_as, ingest
+
+    app = bootstrap_app(workdir)
+    files = generate_corpus(
+        os.path.join(workdir, "corpus"), args.documents, parse_mix("txt=1,md=1"), 2048, 16384, args.seed
+    )
+
+    db = SessionLocal()
+    try:
+        user, kb = create_benchmark_user(db, "retrieval evaluation 1")
+        kb_ids = [kb.id]
+        for index in range(1, args.knowledge_bases):
+            extra = KnowledgeBase(name=f"retrieval evaluation {index + 1}", description="", user_id=user.id)
+            extra.stats = KnowledgeBaseStats()
+            db.add(extra)
+            db.commit()
+            kb_ids.append(extra.id)
+        user_id = user.id
+    finally:
+        db.close()
+    authenticate_as(app, user_id)
+
+    async def ingest_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for index, kb_id in enumerate(kb_ids):
+                await ingest(client, kb_id, files[index::len(kb_ids)], batch_size=20, timeout=1800)
+
+    asyncio.run(ingest_all())
+
+    db = SessionLocal()
+    try:
+        chunks = db.query(DocumentChunk).filter(DocumentChunk.kb_id.in_(kb_ids)).all()
+        chunks = [(chunk.id, chunk.kb_id, chunk.document_id, chunk.chunk_metadata) for chunk in chunks]
+    finally:
+        db.close()
+
+    rng = random.Random(args.seed)
+    dataset = []
+    for chunk_id, kb_id, document_id, metadata in rng.sample(chunks, min(args.queries, len(chunks))):
+        words = (metadata or {}).get("page_content", "").split()
+        if len(words) < 6:
+            continue
+        length = min(len(words), rng.randint(6, 16))
+        start = rng.randint(0, len(words) - length)
+        dataset.append({
+            "kb_ids": [kb_id] + [other for other in kb_ids if other != kb_id],
+            "query": " ".join(words[start:start + length]),
+            "relevant_chunk_ids": [chunk_id],
+            "relevant_document_ids": [document_id],
+        })
+    return dataset
+
+
+def main():
+    args = parse_args()
+    if not args.dataset and not args.synthetic:
+        sys.exit("Pass --dataset or --synthetic")
+    cutoffs = sorted({int(value) for value in args.k.split(",")})
+    modes = [mode.strip() for mode in args.modes.split(",")]
+
+    workdir: Optional[str] = None
+    try:
+        if args.synthetic:
+            workdir = tempfile.mkdtemp(prefix="ragwebui-eval-")
+            dataset = build_synthetic(args, workdir)
+            if args.save_dataset:
+                with open(args.save_dataset, "w", encoding="utf-8") as f:
+                    for item in dataset:
+                        f.write(json.dumps(item) + "\n")
+        else:
+            dataset = load_dataset(args.dataset)
+
+        for mode in modes:
+            if mode not in RETRIEVAL_MODES:
+                sys.exit(f"Unsupported retrieval mode: {mode}. Supported modes are: {', '.join(RETRIEVAL_MODES)}")
+        results = {"modes": [evaluate_mode(mode, dataset, cutoffs, args.parallelism) for mode in modes]}
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    from app.core.config import settings
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "save_dataset")}
+    config.update(
+        queries=len(dataset),
+        vector_store=settings.VECTOR_STORE_TYPE,
+        embeddings_provider=settings.EMBEDDINGS_PROVIDER,
+    )
+    write_result("retrieval_eval", config, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark API server: the real app with the offline stand-ins, seeded
+with a synthetic knowledge base, served by uvicorn.
+
+    python -m benchmarks.server --port 8765 --documents 50 --fixtures fixtures.json
+
+Once the server is listening, the fixtures file holds what a client
+needs: base URL, bearer token, API key, knowledge base and chat ids and
+the server's pid. benchmarks.load starts this automatically.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from benchmarks.common import bootstrap_app, create_benchmark_user
+from benchmarks.corpus import generate_corpus, parse_mix
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the app with offline providers and a seeded knowledge base")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--mix", default="txt=1,md=1")
+    parser.add_argument("--min-kb", type=int, default=4)
+    parser.add_argument("--max-kb", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="SQLAlchemy URL; defaults to a SQLite file in the work directory")
+    parser.add_argument("--workdir")
+    parser.add_argument("--fixtures", required=True, help="Where to write connection details once seeded")
+    return parser.parse_args()
+
+
+async def seed(app, files):
+    import httpx
+
+    from app.core.security import create_access_token
+    from app.db.session import SessionLocal
+    from app.models.chat import Chat
+    from app.services.api_key import APIKeyService
+    from benchmarks.ingestion import authenticate_as, ingest
+
+    db = SessionLocal()
+    try:
+        user, kb = create_benchmark_user(db, "load benchmark")
+        chat = Chat(title="load benchmark", user_id=user.id)
+        chat.knowledge_bases = [kb]
+        db.add(chat)
+        db.commit()
+        api_key = APIKeyService.create_api_key(db, user.id, "load benchmark")
+        fixtures = {
+            "user_id": user.id,
+            "kb_id": kb.id,
+            "chat_id": chat.id,
+            "token": create_access_token({"sub": user.username}),
+            "api_key": api_key._plaintext_key,
+        }
+    finally:
+        db.close()
+
+    authenticate_as(app, fixtures["user_id"])
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await ingest(client, fixtures["kb_id"], files, batch_size=20, timeout=1800)
+    # Requests under load go through real authentication
+    app.dependency_overrides.clear()
+    return fixtures
+
+
+def main():
+    args = parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ragwebui-bench-")
+    app = bootstrap_app(workdir, args.database_url)
+    files = generate_corpus(
+        os.path.join(workdir, "corpus"),
+        args.documents,
+        parse_mix(args.mix),
+        args.min_kb * 1024,
+        args.max_kb * 1024,
+        args.seed,
+    )
+    fixtures = asyncio.run(seed(app, files))
+    fixtures.update(base_url=f"http://{args.host}:{args.port}", pid=os.getpid())
+
+    import uvicorn
+
+    from app.core.config import settings
+    from app.core.metrics import register_routes
+    from app.services.api_key import flush_last_used_periodically
+
+    # The schema already exists and storage is local: skip MinIO setup and migrations
+    async def startup():
+        if settings.METRICS_ENABLED:
+            register_routes(app)
+        asyncio.create_task(flush_last_used_periodically())
+
+        # Clients wait for this file, then for /api/health to answer
+        with open(args.fixtures, "w", encoding="utf-8") as f:
+            json.dump(fixtures, f)
+
+    app.router.on_startup = [startup]
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -48,6 +48,9 @@ export interface APIKeyUpdate {
   is_active?: boolean;
 }
 
+// Matches APIKeyService.KEY_PREFIX_LENGTH on the backend
+const KEY_PREFIX_LENGTH = 11; // "sk-" + 8 hex digits
+
 export default function APIKeysPage() {
   const [apiKeys, setApiKeys] = useState<APIKey[]>([]);
   const [isLoading, setIsLoading] = useState(true);
@@ -55,7 +58,8 @@ export default function APIKeysPage() {
   const [newKeyName, setNewKeyName] = useState("");
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [isAPIListDialogOpen, setIsAPIListDialogOpen] = useState(false);
-  const [copiedId, setCopiedId] = useState<number | null>(null);
+  const [createdKey, setCreatedKey] = useState<APIKey | null>(null);
+  const [isCopied, setIsCopied] = useState(false);
   const { toast } = useToast();
   const router = useRouter();
 
@@ -97,13 +101,15 @@ export default function APIKeysPage() {
         is_active: true,
       });
 
-      setApiKeys([...apiKeys, data]);
+      // The plaintext key is only returned here; the list keeps the masked form
+      setApiKeys([
+        ...apiKeys,
+        { ...data, key: `${data.key.slice(0, KEY_PREFIX_LENGTH)}********` },
+      ]);
       setNewKeyName("");
       setIsDialogOpen(false);
-      toast({
-        title: "Success",
-        description: "API key created successfully",
-      });
+      setIsCopied(false);
+      setCreatedKey(data);
     } catch (error) {
       toast({
         title: "Error",
@@ -162,13 +168,13 @@ export default function APIKeysPage() {
     }
   };
 
-  // 复制 API Key
-  const copyAPIKey = async (id: number, key: string) => {
+  // 复制新创建的 API Key
+  const copyAPIKey = async (key: string) => {
     try {
       await navigator.clipboard.writeText(key);
-      setCopiedId(id);
+      setIsCopied(true);
       setTimeout(() => {
-        setCopiedId(null);
+        setIsCopied(false);
       }, 3000);
       toast({
         title: "Success",
@@ -305,6 +311,40 @@ export default function APIKeysPage() {
           </div>
         </div>
 
+        <Dialog
+          open={createdKey !== null}
+          onOpenChange={(open) => !open && setCreatedKey(null)}
+        >
+          <DialogContent>
+            <DialogHeader>
+              <DialogTitle>API Key Created</DialogTitle>
+              <DialogDescription>
+                Copy your new API key now. For security it will not be shown
+                again.
+              </DialogDescription>
+            </DialogHeader>
+            <div className="flex items-center gap-2 py-4">
+              <code className="flex-1 break-all rounded bg-muted px-[0.3rem] py-[0.2rem] font-mono text-sm">
+                {createdKey?.key}
+              </code>
+              <Button
+                variant="ghost"
+                size="icon"
+                onClick={() => createdKey && copyAPIKey(createdKey.key)}
+              >
+                {isCopied ? (
+                  <Check className="h-4 w-4" />
+                ) : (
+                  <Copy className="h-4 w-4" />
+                )}
+              </Button>
+            </div>
+            <DialogFooter>
+              <Button onClick={() => setCreatedKey(null)}>Done</Button>
+            </DialogFooter>
+          </DialogContent>
+        </Dialog>
+
         <div className="rounded-md border">
           <Table>
             <TableHeader>
@@ -321,21 +361,10 @@ export default function APIKeysPage() {
               {apiKeys.map((apiKey) => (
                 <TableRow key={apiKey.id}>
                   <TableCell>{apiKey.name}</TableCell>
-                  <TableCell className="flex items-center gap-2">
+                  <TableCell>
                     <code className="relative rounded bg-muted px-[0.3rem] py-[0.2rem] font-mono text-sm">
                       {apiKey.key}
                     </code>
-                    <Button
-                      variant="ghost"
-                      size="icon"
-                      onClick={() => copyAPIKey(apiKey.id, apiKey.key)}
-                    >
-                      {copiedId === apiKey.id ? (
-                        <Check className="h-4 w-4" />
-                      ) : (
-                        <Copy className="h-4 w-4" />
-                      )}
-                    </Button>
                   </TableCell>
                   <TableCell>
                     <Switch
@@ -2,8 +2,7 @@
 
 import { useEffect, useState } from "react";
 import Link from "next/link";
-import { FileIcon, defaultStyles } from "react-file-icon";
-import { ArrowRight, Plus, Settings, Trash2, Search } from "lucide-react";
+import { Plus, Settings, Trash2, Search } from "lucide-react";
 import DashboardLayout from "@/components/layout/dashboard-layout";
 import { api, ApiError } from "@/lib/api";
 import { useToast } from "@/components/ui/use-toast";
@@ -12,20 +11,11 @@ interface KnowledgeBase {
   id: number;
   name: string;
   description: string;
-  documents: Document[];
+  document_count: number;
+  chunk_count: number;
+  total_bytes: number;
   created_at: string;
 }
-interface Document {
-  id: number;
-  file_name: string;
-  file_path: string;
-  file_size: number;
-  content_type: string;
-  knowledge_base_id: number;
-  created_at: string;
-  updated_at: string;
-  processing_tasks: any[];
-}
 
 export default function KnowledgeBasePage() {
   const [knowledgeBases, setKnowledgeBases] = useState<KnowledgeBase[]>([]);
@@ -110,7 +100,8 @@ export default function KnowledgeBasePage() {
                     {kb.description || "No description"}
                   </p>
                   <p className="text-sm text-muted-foreground mt-1">
-                    {kb.documents.length} documents •{" "}
+                    {kb.document_count} documents • {kb.chunk_count} chunks •{" "}
+                    {(kb.total_bytes / 1024 / 1024).toFixed(2)} MB •{" "}
                     {new Date(kb.created_at).toLocaleDateString()}
                   </p>
                 </div>
@@ -137,61 +128,6 @@ export default function KnowledgeBasePage() {
                 </div>
               </div>
 
-              {kb.documents.length > 0 && (
-                <div className="border-t pt-4">
-                  <h4 className="text-sm font-medium mb-2">Documents</h4>
-                  <div className="flex flex-wrap gap-2 max-h-[400px] overflow-y-auto">
-                    {kb.documents.slice(0, 9).map((doc) => (
-                      <div
-                        key={doc.id}
-                        className="flex flex-col items-center gap-2 p-2 rounded-lg border bg-card hover:bg-accent/50 cursor-pointer transition-colors w-[150px] h-[150px] justify-center"
-                      >
-                        <div className="w-8 h-8 mb-2">
-                          {doc.content_type.toLowerCase().includes("pdf") ? (
-                            <FileIcon extension="pdf" {...defaultStyles.pdf} />
-                          ) : doc.content_type.toLowerCase().includes("doc") ? (
-                            <FileIcon extension="doc" {...defaultStyles.docx} />
-                          ) : doc.content_type.toLowerCase().includes("txt") ? (
-                            <FileIcon extension="txt" {...defaultStyles.txt} />
-                          ) : doc.content_type.toLowerCase().includes("md") ? (
-                            <FileIcon extension="md" {...defaultStyles.md} />
-                          ) : (
-                            <FileIcon
-                              extension={doc.file_name.split(".").pop() || ""}
-                              color="#E2E8F0"
-                              labelColor="#94A3B8"
-                            />
-                          )}
-                        </div>
-                        <div className="text-sm font-medium text-center max-w-[100px]">
-                          <div className="line-clamp-2 overflow-hidden text-ellipsis">
-                            {doc.file_name}
-                          </div>
-                        </div>
-                        <span className="text-xs text-muted-foreground mt-1">
-                          {new Date(doc.created_at).toLocaleDateString()}
-                        </span>
-                      </div>
-                    ))}
-                    {kb.documents.length > 9 && (
-                      <Link
-                        href={`/dashboard/knowledge/${kb.id}`}
-                        className="flex flex-col items-center p-2 rounded-lg border bg-card hover:bg-accent/50 cursor-pointer transition-colors w-[150px] h-[150px] justify-center"
-                      >
-                        <div className="w-8 h-8 mb-2 flex items-center justify-center">
-                          <ArrowRight className="w-6 h-6" />
-                        </div>
-                        <span className="text-sm font-medium text-center">
-                          View All Documents
-                        </span>
-                        <span className="text-xs text-muted-foreground mt-1">
-                          {kb.documents.length} total
-                        </span>
-                      </Link>
-                    )}
-                  </div>
-                </div>
-              )}
             </div>
           ))}
 
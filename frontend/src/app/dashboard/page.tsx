@@ -18,7 +18,7 @@ interface KnowledgeBase {
   id: number;
   name: string;
   description: string;
-  documents: any[];
+  document_count: number;
 }
 
 interface Chat {
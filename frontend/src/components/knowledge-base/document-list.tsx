@@ -22,20 +22,17 @@ interface Document {
   file_size: number;
   content_type: string;
   created_at: string;
-  processing_tasks: Array<{
-    id: number;
-    status: string;
-    error_message: string | null;
-  }>;
+  status: string | null;
+  task_type: string | null;
 }
 
-interface KnowledgeBase {
-  id: number;
-  name: string;
-  description: string;
-  documents: Document[];
+interface DocumentPage {
+  items: Document[];
+  next_cursor: number | null;
 }
 
+const PAGE_SIZE = 50;
+
 interface DocumentListProps {
   knowledgeBaseId: number;
 }
@@ -44,26 +41,50 @@ export function DocumentList({ knowledgeBaseId }: DocumentListProps) {
   const [documents, setDocuments] = useState<Document[]>([]);
   const [error, setError] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
 
-  useEffect(() => {
-    const fetchDocuments = async () => {
-      try {
-        const data = await api.get(`/api/knowledge-base/${knowledgeBaseId}`);
-        setDocuments(data.documents);
-      } catch (error) {
-        if (error instanceof ApiError) {
-          setError(error.message);
-        } else {
-          setError("Failed to fetch documents");
-        }
-      } finally {
-        setLoading(false);
-      }
-    };
+  const fetchDocuments = async (cursor: number | null) => {
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor !== null) {
+      params.set("cursor", String(cursor));
+    }
+    const data: DocumentPage = await api.get(
+      `/api/knowledge-base/${knowledgeBaseId}/documents?${params.toString()}`
+    );
+    setDocuments((prev) =>
+      cursor === null ? data.items : [...prev, ...data.items]
+    );
+    setNextCursor(data.next_cursor);
+  };
+
+  const handleError = (error: unknown) => {
+    if (error instanceof ApiError) {
+      setError(error.message);
+    } else {
+      setError("Failed to fetch documents");
+    }
+  };
 
-    fetchDocuments();
+  useEffect(() => {
+    setLoading(true);
+    fetchDocuments(null)
+      .catch(handleError)
+      .finally(() => setLoading(false));
   }, [knowledgeBaseId]);
 
+  const loadMore = async () => {
+    if (nextCursor === null) return;
+    setLoadingMore(true);
+    try {
+      await fetchDocuments(nextCursor);
+    } catch (error) {
+      handleError(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div className="flex justify-center items-center p-8">
@@ -104,64 +125,77 @@ export function DocumentList({ knowledgeBaseId }: DocumentListProps) {
   }
 
   return (
-    <Table>
-      <TableHeader>
-        <TableRow>
-          <TableHead>Name</TableHead>
-          <TableHead>Size</TableHead>
-          <TableHead>Created</TableHead>
-          <TableHead>Status</TableHead>
-        </TableRow>
-      </TableHeader>
-      <TableBody>
-        {documents.map((doc) => (
-          <TableRow key={doc.id}>
-            <TableCell className="font-medium">
-              <div className="flex items-center gap-2">
-                <div className="w-6 h-6">
-                  {doc.content_type.toLowerCase().includes("pdf") ? (
-                    <FileIcon extension="pdf" {...defaultStyles.pdf} />
-                  ) : doc.content_type.toLowerCase().includes("doc") ? (
-                    <FileIcon extension="doc" {...defaultStyles.docx} />
-                  ) : doc.content_type.toLowerCase().includes("txt") ? (
-                    <FileIcon extension="txt" {...defaultStyles.txt} />
-                  ) : doc.content_type.toLowerCase().includes("md") ? (
-                    <FileIcon extension="md" {...defaultStyles.md} />
-                  ) : (
-                    <FileIcon
-                      extension={doc.file_name.split(".").pop() || ""}
-                      color="#E2E8F0"
-                      labelColor="#94A3B8"
-                    />
-                  )}
-                </div>
-                {doc.file_name}
-              </div>
-            </TableCell>
-            <TableCell>{(doc.file_size / 1024 / 1024).toFixed(2)} MB</TableCell>
-            <TableCell>
-              {formatDistanceToNow(new Date(doc.created_at), {
-                addSuffix: true,
-              })}
-            </TableCell>
-            <TableCell>
-              {doc.processing_tasks.length > 0 && (
-                <Badge
-                  variant={
-                    doc.processing_tasks[0].status === "completed"
-                      ? "secondary" // Green for completed
-                      : doc.processing_tasks[0].status === "failed"
-                      ? "destructive" // Red for failed
-                      : "default" // Default for pending/processing
-                  }
-                >
-                  {doc.processing_tasks[0].status}
-                </Badge>
-              )}
-            </TableCell>
+    <div className="space-y-4">
+      <Table>
+        <TableHeader>
+          <TableRow>
+            <TableHead>Name</TableHead>
+            <TableHead>Size</TableHead>
+            <TableHead>Created</TableHead>
+            <TableHead>Status</TableHead>
           </TableRow>
-        ))}
-      </TableBody>
-    </Table>
+        </TableHeader>
+        <TableBody>
+          {documents.map((doc) => (
+            <TableRow key={doc.id}>
+              <TableCell className="font-medium">
+                <div className="flex items-center gap-2">
+                  <div className="w-6 h-6">
+                    {doc.content_type.toLowerCase().includes("pdf") ? (
+                      <FileIcon extension="pdf" {...defaultStyles.pdf} />
+                    ) : doc.content_type.toLowerCase().includes("doc") ? (
+                      <FileIcon extension="doc" {...defaultStyles.docx} />
+                    ) : doc.content_type.toLowerCase().includes("txt") ? (
+                      <FileIcon extension="txt" {...defaultStyles.txt} />
+                    ) : doc.content_type.toLowerCase().includes("md") ? (
+                      <FileIcon extension="md" {...defaultStyles.md} />
+                    ) : (
+                      <FileIcon
+                        extension={doc.file_name.split(".").pop() || ""}
+                        color="#E2E8F0"
+                        labelColor="#94A3B8"
+                      />
+                    )}
+                  </div>
+                  {doc.file_name}
+                </div>
+              </TableCell>
+              <TableCell>{(doc.file_size / 1024 / 1024).toFixed(2)} MB</TableCell>
+              <TableCell>
+                {formatDistanceToNow(new Date(doc.created_at), {
+                  addSuffix: true,
+                })}
+              </TableCell>
+              <TableCell>
+                {doc.status && (
+                  <Badge
+                    variant={
+                      doc.status === "completed"
+                        ? "secondary" // Green for completed
+                        : doc.status === "failed"
+                        ? "destructive" // Red for failed
+                        : "default" // Default for pending/processing
+                    }
+                  >
+                    {doc.status}
+                  </Badge>
+                )}
+              </TableCell>
+            </TableRow>
+          ))}
+        </TableBody>
+      </Table>
+      {nextCursor !== null && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="inline-flex items-center justify-center rounded-md bg-secondary px-4 py-2 text-sm font-medium hover:bg-secondary/80 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+    </div>
   );
 }
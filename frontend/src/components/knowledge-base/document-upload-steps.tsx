@@ -11,7 +11,7 @@ import { Label } from "@/components/ui/label";
 import { useToast } from "@/components/ui/use-toast";
 import { Loader2, Upload, X, Settings, FileText } from "lucide-react";
 import { cn } from "@/lib/utils";
-import { api, ApiError } from "@/lib/api";
+import { api, ApiError, streamEvents } from "@/lib/api";
 import { useDropzone } from "react-dropzone";
 import {
   Select,
@@ -76,8 +76,20 @@ interface TaskResponse {
 
 interface TaskStatus {
   document_id: number;
+  upload_id?: number;
   status: "pending" | "processing" | "completed" | "failed";
   error_message?: string;
+  stage?: string | null;
+  progress?: {
+    pages_parsed?: number;
+    chunks_total?: number;
+    chunks_stored?: number;
+    chunks_upserted?: number;
+  };
+}
+
+interface TaskEvent extends TaskStatus {
+  task_id: number;
 }
 
 interface TaskStatusMap {
@@ -262,6 +274,7 @@ export function DocumentUploadSteps({
           ...acc,
           [task.task_id]: {
             document_id: task.upload_id,
+            upload_id: task.upload_id,
             status: "pending" as const,
           },
         }),
@@ -269,8 +282,8 @@ export function DocumentUploadSteps({
       );
       setTaskStatuses(initialStatuses);
 
-      // Start polling for task status
-      pollTaskStatus(data.tasks.map((t) => t.task_id));
+      // Follow task progress
+      watchTaskStatus(data.tasks.map((t) => t.task_id));
     } catch (error) {
       setIsLoading(false);
       toast({
@@ -282,6 +295,60 @@ export function DocumentUploadSteps({
     }
   };
 
+  const finishProcessing = (data: TaskStatusMap) => {
+    setIsLoading(false);
+    const hasErrors = Object.values(data).some(
+      (task) => task.status === "failed"
+    );
+    if (!hasErrors) {
+      toast({
+        title: "Processing completed",
+        description: "All documents have been processed successfully.",
+      });
+      onComplete?.();
+    } else {
+      toast({
+        title: "Processing completed with errors",
+        description: "Some documents failed to process.",
+        variant: "destructive",
+      });
+    }
+  };
+
+  // Follow task progress over Server-Sent Events, falling back to polling
+  const watchTaskStatus = async (taskIds: number[]) => {
+    const latest: TaskStatusMap = {};
+    let finished = false;
+    try {
+      await streamEvents(
+        `/api/knowledge-base/${knowledgeBaseId}/documents/tasks/stream?task_ids=${taskIds.join(
+          ","
+        )}`,
+        (event, data) => {
+          if (event === "task") {
+            const { task_id, ...status } = data as TaskEvent;
+            latest[task_id] = {
+              ...status,
+              // Keep the upload ID the file list matches on until the document exists
+              document_id: status.document_id ?? status.upload_id!,
+            };
+            setTaskStatuses((prev) => ({ ...prev, [task_id]: latest[task_id] }));
+          } else if (event === "done") {
+            finished = true;
+          }
+        }
+      );
+    } catch (error) {
+      console.error("Task progress stream failed, polling instead:", error);
+    }
+
+    if (finished) {
+      finishProcessing(latest);
+    } else {
+      pollTaskStatus(taskIds);
+    }
+  };
+
   // Poll task status
   const pollTaskStatus = async (taskIds: number[]) => {
     const poll = async () => {
@@ -309,23 +376,7 @@ export function DocumentUploadSteps({
         );
 
         if (allDone) {
-          setIsLoading(false);
-          const hasErrors = Object.values(data).some(
-            (task) => task.status === "failed"
-          );
-          if (!hasErrors) {
-            toast({
-              title: "Processing completed",
-              description: "All documents have been processed successfully.",
-            });
-            onComplete?.();
-          } else {
-            toast({
-              title: "Processing completed with errors",
-              description: "Some documents failed to process.",
-              variant: "destructive",
-            });
-          }
+          finishProcessing(data);
         } else {
           // Continue polling
           setTimeout(poll, 2000);
@@ -607,8 +658,11 @@ export function DocumentUploadSteps({
                   .filter((f) => f.status === "uploaded")
                   .map((file) => {
                     const task = Object.values(taskStatuses).find(
-                      (t) => t.document_id === file.documentId
+                      (t) =>
+                        t.upload_id === file.uploadId ||
+                        t.document_id === file.documentId
                     );
+                    const chunksTotal = task?.progress?.chunks_total;
                     return (
                       <div
                         key={file.uploadId}
@@ -636,6 +690,14 @@ export function DocumentUploadSteps({
                               {task && (
                                 <p className="text-xs text-muted-foreground">
                                   Status: {task.status || "pending"}
+                                  {task.status === "processing" &&
+                                    task.stage &&
+                                    ` · ${task.stage}`}
+                                  {task.status === "processing" &&
+                                    chunksTotal !== undefined &&
+                                    ` · ${
+                                      task.progress?.chunks_upserted ?? 0
+                                    }/${chunksTotal} chunks`}
                                 </p>
                               )}
                             </div>
@@ -650,7 +712,16 @@ export function DocumentUploadSteps({
                           (task.status === "pending" ||
                             task.status === "processing") && (
                             <Progress
-                              value={task.status === "processing" ? 50 : 25}
+                              value={
+                                task.status === "processing"
+                                  ? chunksTotal
+                                    ? 50 +
+                                      (50 *
+                                        (task.progress?.chunks_upserted ?? 0)) /
+                                        chunksTotal
+                                    : 50
+                                  : 25
+                              }
                               className="w-full"
                             />
                           )}